@@ -13,12 +13,15 @@ sys.path.insert(0, str(Path(__file__).parent))
 from dotenv import load_dotenv
 load_dotenv()
 
-from config import DATA_DIR, GROQ_API_KEY
-from src.document_loader import load_all_documents
-from src.text_splitter import split_documents
-from src.vector_store import create_vector_store
+from config import DATA_DIR, GRADIO_CONCURRENCY_LIMIT
+from src.backends import missing_api_keys
+from src.embeddings import get_embeddings
+from src.indexer import ensure_index
+from src.snapshot import open_snapshot
 from src.retriever import create_retriever
-from src.generator import create_rag_chain, query
+from src.generator import create_rag_chain, astream_query
+from src.semantic_cache import create_semantic_cache
+from src.metrics import start_metrics_server
 
 # Global variables
 rag_chain = None
@@ -29,41 +32,34 @@ def initialize_rag():
     """Initialize the RAG system on startup."""
     global rag_chain, init_status
     
-    from config import GOOGLE_API_KEY, GROQ_API_KEY
-    
-    if not GOOGLE_API_KEY:
-        init_status = "❌ Missing GOOGLE_API_KEY"
-        print(init_status)
-        return False
-    
-    if not GROQ_API_KEY:
-        init_status = "❌ Missing GROQ_API_KEY"
+    # Only the keys of the configured backends are needed (none offline)
+    missing = missing_api_keys()
+    if missing:
+        init_status = f"❌ Missing {missing[0]}"
         print(init_status)
         return False
     
     print("✅ API Keys configured")
     
     try:
-        print("📄 Loading documents...")
-        documents = load_all_documents(directory=DATA_DIR)
+        # Reuse the persisted index when the corpus fingerprint matches;
+        # otherwise embed only new or changed documents
+        print("📄 Checking documents against the index...")
+        indexed = ensure_index(DATA_DIR)
         
-        if not documents:
+        # Serve the memory-mapped snapshot written by the indexer
+        vector_store = open_snapshot(get_embeddings()) if indexed else None
+        if vector_store is None or vector_store.count() == 0:
             init_status = "❌ No documents found"
             print(init_status)
             return False
         
-        print(f"✅ Loaded {len(documents)} documents")
-        
-        chunks = split_documents(documents)
-        print(f"✅ Split into {len(chunks)} chunks")
-        
-        vector_store = create_vector_store(chunks)
-        print("✅ Vector store created")
-        
         retriever = create_retriever(vector_store)
-        rag_chain = create_rag_chain(retriever)
+        rag_chain = create_rag_chain(
+            retriever, cache=create_semantic_cache(vector_store.embeddings)
+        )
         
-        init_status = f"✅ Loaded {len(chunks)} document chunks"
+        init_status = f"✅ Loaded {vector_store.count()} document chunks"
         print("✅ RAG system initialized successfully!")
         return True
         
@@ -75,24 +71,39 @@ def initialize_rag():
         return False
 
 
-def respond(message, history):
-    """Handle chat messages."""
+async def respond(message, history):
+    """Handle chat messages, streaming the answer into the chat.
+    
+    Runs on Gradio's event loop, so concurrent chats interleave while they
+    wait on retrieval and the LLM.
+    """
     global rag_chain
     
     if not message.strip():
-        return history
+        yield history
+        return
     
     if rag_chain is None:
         history.append([message, "⚠️ System not initialized. Please check API key configuration."])
-        return history
+        yield history
+        return
     
+    history.append([message, ""])
     try:
-        response = query(rag_chain, message)
-        history.append([message, response])
+        async for token in astream_query(rag_chain, message):
+            history[-1][1] += token
+            yield history
     except Exception as e:
-        history.append([message, f"❌ 错误: {str(e)}"])
-    
-    return history
+        history[-1][1] = f"❌ 错误: {str(e)}"
+        yield history
+
+
+def example_question(question):
+    """Chat handler for an example button (an async generator, so Gradio streams it)."""
+    async def handler(history):
+        async for update in respond(question, history):
+            yield update
+    return handler
 
 
 # Initialize on startup
@@ -124,13 +135,13 @@ with gr.Blocks(
     
     with gr.Row():
         gr.Button("What is machine learning?").click(
-            lambda h: respond("What is machine learning?", h), [chatbot], [chatbot]
+            example_question("What is machine learning?"), [chatbot], [chatbot]
         )
         gr.Button("What are RAG advantages?").click(
-            lambda h: respond("What are the advantages of RAG?", h), [chatbot], [chatbot]
+            example_question("What are the advantages of RAG?"), [chatbot], [chatbot]
         )
         gr.Button("How does gradient descent work?").click(
-            lambda h: respond("How does gradient descent work?", h), [chatbot], [chatbot]
+            example_question("How does gradient descent work?"), [chatbot], [chatbot]
         )
     
     gr.Markdown("---\n*Powered by LangChain + Groq + ChromaDB*")
@@ -139,5 +150,10 @@ with gr.Blocks(
     send.click(respond, [msg, chatbot], [chatbot]).then(lambda: "", None, [msg])
 
 
+# Many chats in flight at once; LLM calls are capped separately (LLM_MAX_CONCURRENCY)
+demo.queue(default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT)
+
+
 if __name__ == "__main__":
+    start_metrics_server()
     demo.launch(server_name="0.0.0.0", server_port=7860)
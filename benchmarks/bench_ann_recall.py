@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+ANN Recall Benchmark
+Reports recall@k and query latency of the IVF index (per nprobe) and of
+Chroma's HNSW graph (per search ef) against exact search on the same
+synthetic collection, to pick IVF_NPROBE / HNSW_SEARCH_EF knowingly
+
+Usage:
+    python benchmarks/bench_ann_recall.py --chunks 200000 --dim 768 --k 4
+    python benchmarks/bench_ann_recall.py --skip-chroma --json ann_report.json
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.ann_index import IVFIndex, auto_nlist
+from src.flat_index import normalize_rows, top_k
+
+
+def clustered_collection(n, dim, clusters, seed):
+    """Gaussian mixture: real embeddings are clustered, not uniform."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    return normalize_rows(vectors)
+
+
+def make_queries(vectors, count, seed):
+    """Perturbed copies of random rows, like paraphrased questions."""
+    rng = np.random.default_rng(seed)
+    base = vectors[rng.choice(vectors.shape[0], size=count, replace=False)]
+    return normalize_rows(base + 0.3 * rng.standard_normal(base.shape, dtype=np.float32))
+
+
+def recall_at_k(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def summarize(latencies):
+    return {
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+
+
+def run_queries(search, queries):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+
+def bench_exact(vectors, queries, k):
+    results, latencies = run_queries(lambda q: top_k(vectors @ q, k), queries)
+    return results, {"index": "exact", "param": "-", "recall": 1.0, **summarize(latencies)}
+
+
+def bench_ivf(vectors, queries, truth, k, nlist, nprobes):
+    start = time.perf_counter()
+    index = IVFIndex(nlist=nlist)
+    index.train(vectors)
+    print(f"   IVF trained with nlist={index.nlist} in {time.perf_counter() - start:.1f}s")
+
+    rows = []
+    for nprobe in nprobes:
+        def search(query):
+            candidates = index.candidates(query, vectors.shape[0], nprobe)
+            return candidates[top_k(vectors[candidates] @ query, k)]
+
+        results, latencies = run_queries(search, queries)
+        rows.append({
+            "index": "ivf",
+            "param": f"nprobe={nprobe}",
+            "recall": recall_at_k(results, truth),
+            **summarize(latencies),
+        })
+    return rows
+
+
+def bench_hnsw(vectors, queries, truth, k, m, construction_ef, search_efs):
+    import chromadb
+
+    workdir = tempfile.mkdtemp(prefix="bench_hnsw_")
+    try:
+        client = chromadb.PersistentClient(path=workdir)
+        collection = client.create_collection(
+            "bench_ann",
+            metadata={"hnsw:M": m, "hnsw:construction_ef": construction_ef},
+        )
+        start = time.perf_counter()
+        for i in range(0, vectors.shape[0], 5000):
+            block = vectors[i:i + 5000]
+            collection.add(
+                ids=[str(j) for j in range(i, i + block.shape[0])],
+                embeddings=block.tolist(),
+            )
+        print(f"   HNSW built with M={m} in {time.perf_counter() - start:.1f}s")
+
+        rows = []
+        for ef in search_efs:
+            collection.modify(configuration={"hnsw": {"ef_search": ef}})
+
+            def search(query):
+                hits = collection.query(query_embeddings=[query.tolist()], n_results=k)
+                return [int(i) for i in hits["ids"][0]]
+
+            results, latencies = run_queries(search, queries)
+            rows.append({
+                "index": "hnsw",
+                "param": f"ef={ef}",
+                "recall": recall_at_k(results, truth),
+                **summarize(latencies),
+            })
+        return rows
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN recall@k vs latency report")
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nlist", type=int, default=0, help="0 = about 4·sqrt(chunks)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--hnsw-construction-ef", type=int, default=100)
+    parser.add_argument("--ef", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--skip-chroma", action="store_true")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"📊 {args.chunks} chunks × {args.dim} dims, {args.queries} queries, k={args.k}")
+    vectors = clustered_collection(args.chunks, args.dim, args.clusters, args.seed)
+    queries = make_queries(vectors, args.queries, args.seed + 1)
+
+    truth, exact_row = bench_exact(vectors, queries, args.k)
+    rows = [exact_row]
+    rows += bench_ivf(
+        vectors, queries, truth, args.k, args.nlist or auto_nlist(args.chunks), args.nprobe
+    )
+    if not args.skip_chroma:
+        rows += bench_hnsw(
+            vectors, queries, truth, args.k,
+            args.hnsw_m, args.hnsw_construction_ef, args.ef,
+        )
+
+    print(f"\n{'index':<6} {'param':<12} {'recall@' + str(args.k):>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in rows:
+        print(
+            f"{row['index']:<6} {row['param']:<12} {row['recall']:>9.3f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}"
+        )
+
+    if args.json:
+        config = {key: str(value) if isinstance(value, Path) else value
+                  for key, value in vars(args).items()}
+        args.json.write_text(json.dumps({"config": config, "results": rows}, indent=2))
+        print(f"\n💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Batch Retrieval Benchmark
+Compares one-query-at-a-time retrieval with batch_retrieve on a synthetic
+flat index, using a local embedding stand-in with simulated request latency
+(no API keys needed)
+
+Usage:
+    python benchmarks/bench_batch_retrieval.py --chunks 100000 --queries 10000
+    python benchmarks/bench_batch_retrieval.py --latency-ms 0   # search cost only
+"""
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.embedding_scheduler import EmbeddingScheduler, ScheduledEmbeddings
+from src.flat_index import FlatVectorStore
+from src.retriever import batch_retrieve
+
+
+class LatencyEmbeddings(Embeddings):
+    """Deterministic hash-seeded vectors; every call sleeps like a remote request."""
+
+    def __init__(self, dim: int, latency: float):
+        self.dim = dim
+        self.latency = latency
+
+    def _vector(self, text):
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.dim).tolist()
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return self._vector(text)
+
+
+def build_store(n, dim, embeddings, seed):
+    rng = np.random.default_rng(seed)
+    store = FlatVectorStore(embeddings)
+    store.upsert_embeddings(
+        [f"chunk-{i}" for i in range(n)],
+        rng.standard_normal((n, dim), dtype=np.float32),
+        [f"synthetic chunk {i}" for i in range(n)],
+        [{"source": f"doc-{i // 10}.md"} for i in range(n)],
+    )
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-query vs batch retrieval throughput")
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated embedding request latency")
+    parser.add_argument("--single-sample", type=int, default=500,
+                        help="Per-query baseline is timed on this many queries and extrapolated")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model = LatencyEmbeddings(args.dim, args.latency_ms / 1000)
+    embeddings = ScheduledEmbeddings(
+        model,
+        scheduler=EmbeddingScheduler(
+            model, requests_per_minute=1e9, tokens_per_minute=1e12
+        ),
+        query_batch_fn=model.embed_documents,
+    )
+    store = build_store(args.chunks, args.dim, embeddings, args.seed)
+    queries = [f"benchmark question {i}" for i in range(args.queries)]
+    print(f"📊 {args.chunks} chunks × {args.dim} dims, {args.queries} queries, "
+          f"k={args.k}, {args.latency_ms:g} ms per embedding request\n")
+
+    sample = queries[:args.single_sample]
+    start = time.perf_counter()
+    single = [store.similarity_search(query, k=args.k) for query in sample]
+    single_rate = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batched = batch_retrieve(store, queries, k=args.k, mode="dense")
+    batch_rate = len(queries) / (time.perf_counter() - start)
+
+    same = all(
+        [doc.id for doc in a] == [doc.id for doc in b] for a, b in zip(single, batched)
+    )
+    print(f"{'mode':<10} {'queries/s':>10} {'10k queries s':>14}")
+    print(f"{'single':<10} {single_rate:>10.0f} {10_000 / single_rate:>14.1f}")
+    print(f"{'batch':<10} {batch_rate:>10.0f} {10_000 / batch_rate:>14.1f}")
+    print(f"\n⚡ Speedup: {batch_rate / single_rate:.1f}x (results identical: {same})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Indexing throughput, query latency and peak memory of the real src/ pipeline
+on a synthetic corpus, with local stand-in models (no API keys needed).
+Each scenario runs in a fresh process; results are written as JSON and can
+be compared against a previous run to catch regressions
+
+Usage:
+    python benchmarks/bench_suite.py --files 500 --size-kb 20 --json bench.json
+    python benchmarks/bench_suite.py --embed-latency-ms 150 --token-latency-ms 10
+    python benchmarks/bench_suite.py --json new.json --baseline bench.json
+"""
+import os
+
+# Benchmark runs must not add to the project's persisted metrics
+os.environ["METRICS_ENABLED"] = "false"
+
+import argparse
+import json
+import multiprocessing
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+from local_models import LocalChatModel, LocalEmbeddings
+from synthetic_corpus import generate_corpus
+
+
+SCENARIOS = ("index", "query")
+
+# Result keys where larger is better; every other numeric key is a cost
+HIGHER_IS_BETTER = ("docs_per_second", "chunks_per_second", "queries_per_second")
+# Workload sizes, reported but never treated as regressions
+WORKLOAD_KEYS = ("documents", "chunks", "queries", "concurrency")
+
+
+def peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def stage_summary() -> dict:
+    """p50/p95/p99 per src/ stage, from the in-process metrics registry."""
+    from src.metrics import metrics
+    return {
+        name: {
+            "calls": stats.latency.count,
+            "items": stats.items,
+            "errors": stats.errors,
+            "p50_ms": stats.latency.percentile(0.5) * 1000,
+            "p95_ms": stats.latency.percentile(0.95) * 1000,
+            "p99_ms": stats.latency.percentile(0.99) * 1000,
+        }
+        for name, stats in metrics.stages.items()
+    }
+
+
+def make_embeddings(args):
+    from src.embedding_scheduler import EmbeddingScheduler, ScheduledEmbeddings
+    model = LocalEmbeddings(
+        dim=args.dim,
+        latency=args.embed_latency_ms / 1000,
+        per_text_latency=args.embed_per_text_ms / 1000,
+    )
+    scheduler = EmbeddingScheduler(
+        model, requests_per_minute=args.requests_per_minute, tokens_per_minute=1e12
+    )
+    return ScheduledEmbeddings(model, scheduler=scheduler, query_batch_fn=model.embed_documents)
+
+
+def build_index(args, corpus: Path, workdir: Path):
+    """Run load → split → embed → upsert over the corpus into a store in `workdir`."""
+    from src.document_loader import find_supported_files, iter_loaded_files
+    from src.flat_index import FlatVectorStore
+    from src.indexer import generate_chunk_id
+    from src.pipeline import IndexingPipeline
+
+    embeddings = make_embeddings(args)
+    if args.backend == "flat":
+        store = FlatVectorStore(embeddings, persist_directory=str(workdir / "flat"))
+    else:
+        from langchain_chroma import Chroma
+        from src.vector_store import HNSW_METADATA
+        store = Chroma(
+            collection_name="bench",
+            embedding_function=embeddings,
+            persist_directory=str(workdir / "chroma"),
+            collection_metadata=HNSW_METADATA,
+        )
+
+    files = find_supported_files(corpus)
+    sources = (
+        (str(path), "bench", docs)
+        for path, docs, error in iter_loaded_files(files, workers=args.workers)
+        if not error
+    )
+    stats = IndexingPipeline(store, chunk_id_fn=generate_chunk_id).run(
+        sources, on_source_done=lambda key, ids: None
+    )
+    return store, stats
+
+
+def scenario_index(args, corpus: Path, workdir: Path) -> dict:
+    """Indexing throughput: documents and chunks per second end to end."""
+    _, stats = build_index(args, corpus, workdir)
+    seconds = stats["seconds"]
+    return {
+        "documents": stats["sources"],
+        "chunks": stats["chunks"],
+        "seconds": seconds,
+        "docs_per_second": stats["sources"] / seconds,
+        "chunks_per_second": stats["chunks"] / seconds,
+    }
+
+
+def scenario_query(args, corpus: Path, workdir: Path) -> dict:
+    """Query latency through stream_query over a snapshot of the corpus."""
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from src.generator import GENERAL_PROMPT, RAG_PROMPT, RAGChain, stream_query
+    from src.metrics import metrics
+    from src.retriever import create_retriever
+    from src.snapshot import SnapshotVectorStore, write_snapshot
+
+    store, _ = build_index(args, corpus, workdir)
+    write_snapshot(store, directory=workdir / "snapshot")
+    snapshot = SnapshotVectorStore(workdir / "snapshot", store.embeddings)
+    # Only query-time stages are reported for this scenario
+    metrics.stages.clear()
+
+    llm = LocalChatModel(
+        first_token_latency=args.first_token_latency_ms / 1000,
+        token_latency=args.token_latency_ms / 1000,
+        answer_tokens=args.answer_tokens,
+    )
+    chain = RAGChain(
+        create_retriever(snapshot, mode=args.mode),
+        ChatPromptTemplate.from_template(RAG_PROMPT) | llm | StrOutputParser(),
+        general_chain=ChatPromptTemplate.from_template(GENERAL_PROMPT) | llm | StrOutputParser(),
+    )
+    files = sorted(corpus.glob("*.md"))
+    questions = [
+        f"What does {files[i % len(files)].stem} say about topic {i}?" for i in range(args.queries)
+    ]
+
+    def run(question):
+        start = time.perf_counter()
+        first = None
+        for _ in stream_query(chain, question):
+            if first is None:
+                first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        timings = list(pool.map(run, questions))
+    elapsed = time.perf_counter() - start
+
+    first_tokens = np.array([first for first, _ in timings]) * 1000
+    totals = np.array([total for _, total in timings]) * 1000
+    return {
+        "queries": len(questions),
+        "concurrency": args.concurrency,
+        "seconds": elapsed,
+        "queries_per_second": len(questions) / elapsed,
+        "p50_ms": float(np.percentile(totals, 50)),
+        "p99_ms": float(np.percentile(totals, 99)),
+        "ttft_p50_ms": float(np.percentile(first_tokens, 50)),
+        "ttft_p99_ms": float(np.percentile(first_tokens, 99)),
+    }
+
+
+def run_scenario(name: str, args, corpus: Path) -> dict:
+    """Entry point of a scenario's child process."""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        result = {"index": scenario_index, "query": scenario_query}[name](args, corpus, Path(workdir))
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["stages"] = stage_summary()
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> bool:
+    """Print per-metric changes against `baseline`; True if nothing regressed
+    by more than `tolerance` (a fraction)."""
+    ok = True
+    print(f"\n{'scenario.metric':<32} {'baseline':>12} {'current':>12} {'change':>9}")
+    for scenario, results in current["results"].items():
+        before = baseline.get("results", {}).get(scenario, {})
+        for key, value in results.items():
+            old = before.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            worse = -change if key in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > tolerance and key not in WORKLOAD_KEYS:
+                flag = " ⚠️"
+                ok = False
+            print(f"{scenario + '.' + key:<32} {old:>12.2f} {value:>12.2f} {change:>+8.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexing and query benchmark suite")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--corpus", type=Path, help="Existing corpus (default: generate one)")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-kb", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["flat", "chroma"], default="flat")
+    parser.add_argument("--workers", type=int, default=1, help="Document loader processes")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Per embedding request")
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.0, help="Per text in a request")
+    parser.add_argument("--requests-per-minute", type=float, default=1e9,
+                        help="Embedding request budget (default: unlimited)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--mode", choices=["hybrid", "dense"], default="hybrid")
+    parser.add_argument("--first-token-latency-ms", type=float, default=0.0)
+    parser.add_argument("--token-latency-ms", type=float, default=0.0)
+    parser.add_argument("--answer-tokens", type=int, default=64, help="Longest streamed answer")
+    parser.add_argument("--json", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative regression before --baseline fails (default 10%%)")
+    args = parser.parse_args()
+    scenarios = args.scenario or list(SCENARIOS)
+
+    with tempfile.TemporaryDirectory(prefix="bench-corpus-") as tmp:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = Path(tmp)
+            generate_corpus(corpus, args.files, args.size_kb, args.seed)
+        print(f"📊 Corpus: {len(list(corpus.glob('*.md')))} file(s) in {corpus}, "
+              f"backend {args.backend}, scenarios: {', '.join(scenarios)}")
+
+        results = {}
+        context = multiprocessing.get_context("spawn")
+        for name in scenarios:
+            # A fresh process per scenario, so peak RSS is the scenario's own
+            with context.Pool(1) as pool:
+                results[name] = pool.apply(run_scenario, (name, args, corpus))
+            summary = {k: v for k, v in results[name].items() if k != "stages"}
+            print(f"\n▶ {name}")
+            for key, value in summary.items():
+                print(f"   {key:<20} {value:,.2f}" if isinstance(value, float) else f"   {key:<20} {value}")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if not compare(baseline, report, args.tolerance):
+            print(f"\n❌ Regression beyond {args.tolerance:.0%} against {args.baseline}")
+            sys.exit(1)
+        print(f"\n✅ No regression beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Text Splitter Benchmark
+Checks that FastTextSplitter produces exactly the chunks of LangChain's
+RecursiveCharacterTextSplitter, then compares their throughput
+
+Equivalence is checked on the documents in data/documents and on random
+texts built to hit every separator level (runs of newlines, words longer
+than a chunk, Unicode whitespace) over a sweep of chunk sizes and overlaps.
+Chunk offsets must slice the chunk out of the source text, and
+`whitespace_after` must be the whitespace that follows it. Exits non-zero
+on any mismatch.
+
+Usage:
+    python benchmarks/bench_text_splitter.py --mb 50
+    python benchmarks/bench_text_splitter.py --check-only --cases 5000
+"""
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS, DATA_DIR
+from src.document_loader import find_supported_files, load_single_document
+from src.text_splitter import FastTextSplitter
+from synthetic_corpus import generate_corpus
+
+
+# Chunks longer than chunk_size are expected for unsplittable words
+logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+
+# Random text is drawn from these, weighted towards words
+TOKENS = (
+    ["alpha", "beta", "gamma", "delta", "x", "Σίσυφος", "数据", "end."] * 6
+    + [" ", " ", " ", "\n", "\n\n", "\n\n\n", ". ", "\t", " ", "　", "  ", ".", ""]
+)
+
+
+def langchain_splitter(chunk_size, chunk_overlap, separators):
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=separators,
+        add_start_index=True,
+    )
+
+
+def random_text(rng: random.Random, chunk_size: int) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 80)):
+        if rng.random() < 0.03:
+            # A word no separator but "" can break
+            parts.append("w" * rng.randint(chunk_size // 2, chunk_size * 2 + 1))
+        else:
+            parts.append(rng.choice(TOKENS))
+    return "".join(parts)
+
+
+def offsets_match(text: str, doc: Document) -> bool:
+    """Whether a chunk's offsets slice it out of `text` and `whitespace_after`
+    is the whole whitespace run that follows it."""
+    start, end = doc.metadata["start_index"], doc.metadata["end_index"]
+    after = doc.metadata["whitespace_after"]
+    following = end + len(after)
+    return (
+        text[start:end] == doc.page_content
+        and text[end:following] == after
+        and (after == "" or after.isspace())
+        and (following == len(text) or not text[following].isspace())
+    )
+
+
+def compare(text: str, reference, fast) -> tuple:
+    """(mismatched chunks, bad offsets, differing start_index) for one text."""
+    expected = reference.split_documents([Document(page_content=text)])
+    actual = fast.split_documents([Document(page_content=text)])
+    if [d.page_content for d in expected] != [d.page_content for d in actual]:
+        return 1, 0, 0
+    bad_offsets = sum(not offsets_match(text, d) for d in actual)
+    # LangChain finds each chunk with text.find from an estimated position,
+    # which can land on another occurrence of the same text
+    differing = sum(
+        e.metadata["start_index"] != a.metadata["start_index"] for e, a in zip(expected, actual)
+    )
+    return 0, bad_offsets, differing
+
+
+def check_equivalence(cases: int, seed: int) -> bool:
+    """Compare both splitters on the corpus and on `cases` random texts."""
+    mismatched = bad_offsets = differing = texts = 0
+    reference = langchain_splitter(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS)
+    fast = FastTextSplitter(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS)
+    for path in find_supported_files(DATA_DIR):
+        for doc in load_single_document(path):
+            m, b, d = compare(doc.page_content, reference, fast)
+            mismatched, bad_offsets, differing = mismatched + m, bad_offsets + b, differing + d
+            texts += 1
+
+    rng = random.Random(seed)
+    separator_sets = [CHUNK_SEPARATORS, ["\n\n", "\n", " ", ""], ["\n\n", ". "], [" "]]
+    for _ in range(cases):
+        chunk_size = rng.choice([1, 2, 5, 10, 20, 50, 100])
+        chunk_overlap = rng.randint(0, chunk_size)
+        separators = rng.choice(separator_sets)
+        reference = langchain_splitter(chunk_size, chunk_overlap, separators)
+        fast = FastTextSplitter(chunk_size, chunk_overlap, separators)
+        m, b, d = compare(random_text(rng, chunk_size), reference, fast)
+        if m and mismatched < 3:
+            print(f"   ❌ Mismatch: chunk_size={chunk_size} overlap={chunk_overlap} separators={separators!r}")
+        mismatched, bad_offsets, differing = mismatched + m, bad_offsets + b, differing + d
+        texts += 1
+
+    print(f"🔍 Equivalence: {texts} text(s), {mismatched} with different chunks, "
+          f"{bad_offsets} chunk offset(s) not matching the chunk text")
+    if differing:
+        print(f"   {differing} start_index value(s) differ from LangChain's, "
+              "where its text.find estimate matched another occurrence of the chunk")
+    return mismatched == 0 and bad_offsets == 0
+
+
+def build_corpus(mb: float, seed: int, flat: bool) -> list:
+    """About `mb` MiB of markdown documents; `flat` collapses all whitespace
+    to single spaces so every piece needs the deeper separator levels."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_corpus(Path(tmp), files=max(1, int(mb * 1024 / 256)), size_kb=256, seed=seed)
+        texts = [path.read_text(encoding="utf-8") for path in paths]
+    if flat:
+        texts = [" ".join(text.split()) for text in texts]
+    return [Document(page_content=text, metadata={"source": f"doc-{i}.md"}) for i, text in enumerate(texts)]
+
+
+def time_split(splitter, documents, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = splitter.split_documents(documents)
+        best = min(best, time.perf_counter() - start)
+    return best, len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastTextSplitter equivalence and throughput")
+    parser.add_argument("--mb", type=float, default=20.0, help="Corpus size for the throughput run")
+    parser.add_argument("--cases", type=int, default=2000, help="Random texts for the equivalence check")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per splitter (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-only", action="store_true", help="Skip the throughput run")
+    args = parser.parse_args()
+
+    if not check_equivalence(args.cases, args.seed):
+        print("❌ FastTextSplitter does not match RecursiveCharacterTextSplitter")
+        sys.exit(1)
+    print("✅ Same chunks as RecursiveCharacterTextSplitter")
+    if args.check_only:
+        return
+
+    splitters = (
+        ("langchain", langchain_splitter(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS)),
+        ("fast", FastTextSplitter(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS)),
+    )
+    for shape, flat in (("markdown", False), ("flat", True)):
+        documents = build_corpus(args.mb, args.seed, flat)
+        size = sum(len(doc.page_content) for doc in documents) / 1024 / 1024
+        print(f"\n📊 {shape}: {len(documents)} document(s), {size:.1f} M characters")
+        print(f"{'splitter':<10} {'seconds':>9} {'Mchar/s':>8} {'chunks/s':>10} {'speedup':>8}")
+        baseline = None
+        for name, splitter in splitters:
+            seconds, chunks = time_split(splitter, documents, args.repeat)
+            baseline = baseline or seconds
+            print(f"{name:<10} {seconds:>9.2f} {size / seconds:>8.1f} {chunks / seconds:>10.0f} "
+                  f"{baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Vector Store Benchmark
+Compares load time and query latency of ChromaDB and the in-process flat index
+on the same synthetic collection (no API keys needed)
+
+Usage:
+    python benchmarks/bench_vector_store.py --chunks 50000 --dim 768 --queries 200
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from langchain_chroma import Chroma
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.flat_index import FlatVectorStore
+
+
+class RandomEmbeddings:
+    """Placeholder embedding function; the benchmark only searches by vector."""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def time_queries(search, queries, k):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query.tolist(), k)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def build_collection(n, dim, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    ids = [f"chunk-{i}" for i in range(n)]
+    texts = [f"synthetic chunk {i}" for i in range(n)]
+    metadatas = [{"source": f"doc-{i // 10}.md"} for i in range(n)]
+    return ids, vectors, texts, metadatas
+
+
+def bench_flat(workdir, ids, vectors, texts, metadatas, queries, k):
+    store = FlatVectorStore(RandomEmbeddings(), persist_directory=str(workdir))
+    start = time.perf_counter()
+    store.upsert_embeddings(ids, vectors, texts, metadatas)
+    store.persist()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = FlatVectorStore.load(workdir, RandomEmbeddings())
+    load = time.perf_counter() - start
+
+    latencies = time_queries(store.similarity_search_by_vector, queries, k)
+    return build, load, latencies
+
+
+def bench_chroma(workdir, ids, vectors, texts, metadatas, queries, k, batch_size=5000):
+    start = time.perf_counter()
+    store = Chroma(
+        collection_name="bench",
+        embedding_function=RandomEmbeddings(),
+        persist_directory=str(workdir),
+    )
+    for i in range(0, len(ids), batch_size):
+        store._collection.upsert(
+            ids=ids[i:i + batch_size],
+            embeddings=vectors[i:i + batch_size].tolist(),
+            documents=texts[i:i + batch_size],
+            metadatas=metadatas[i:i + batch_size],
+        )
+    build = time.perf_counter() - start
+    del store
+
+    start = time.perf_counter()
+    store = Chroma(
+        collection_name="bench",
+        embedding_function=RandomEmbeddings(),
+        persist_directory=str(workdir),
+    )
+    # Chroma loads its HNSW segment lazily; count the first query as load time
+    store.similarity_search_by_vector(queries[0].tolist(), k=k)
+    load = time.perf_counter() - start
+
+    latencies = time_queries(store.similarity_search_by_vector, queries, k)
+    return build, load, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma vs flat index benchmark")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ids, vectors, texts, metadatas = build_collection(args.chunks, args.dim, args.seed)
+    queries = np.random.default_rng(args.seed + 1).standard_normal(
+        (args.queries, args.dim), dtype=np.float32
+    )
+
+    print(f"📊 {args.chunks} chunks × {args.dim} dims, {args.queries} queries, k={args.k}\n")
+    print(f"{'backend':<8} {'build s':>9} {'load ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    for name, bench in (("flat", bench_flat), ("chroma", bench_chroma)):
+        workdir = Path(tempfile.mkdtemp(prefix=f"bench_{name}_"))
+        try:
+            build, load, latencies = bench(
+                workdir, ids, vectors, texts, metadatas, queries, args.k
+            )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        print(
+            f"{name:<8} {build:>9.2f} {load * 1000:>9.1f} "
+            f"{percentile_ms(latencies, 50):>8.2f} {percentile_ms(latencies, 95):>8.2f} "
+            f"{percentile_ms(latencies, 99):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
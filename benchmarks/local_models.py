@@ -0,0 +1,98 @@
+"""
+Local Stand-in Models
+The offline backends of src/local_models.py with configurable artificial
+latency, so benchmarks exercise src/ without Gemini or Groq keys
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.local_models import ExtractiveChatModel, HashingEmbeddings
+
+
+class LocalEmbeddings(HashingEmbeddings):
+    """HashingEmbeddings that answer like a remote batch request.
+
+    Every call sleeps `latency` seconds plus `per_text_latency` per text.
+    """
+
+    def __init__(self, dim: int = 768, latency: float = 0.0, per_text_latency: float = 0.0):
+        super().__init__(dim)
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.requests = 0
+
+    def _wait(self, n: int) -> None:
+        self.requests += 1
+        delay = self.latency + self.per_text_latency * n
+        if delay > 0:
+            time.sleep(delay)
+
+    def embed_documents(self, texts: List[str], **kwargs: Any) -> List[List[float]]:
+        self._wait(len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._wait(1)
+        return super().embed_query(text)
+
+
+class LocalChatModel(ExtractiveChatModel):
+    """ExtractiveChatModel streamed at the pace of a hosted LLM.
+
+    The first token arrives after `first_token_latency` seconds and each
+    following one after `token_latency`; answers are cut to at most
+    `answer_tokens` tokens.
+    """
+
+    first_token_latency: float = 0.0
+    token_latency: float = 0.0
+    answer_tokens: int = 64
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-benchmark"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        return super()._tokens(messages)[:self.answer_tokens]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep(self.first_token_latency + self.token_latency * max(0, len(tokens) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for i, chunk in enumerate(super()._stream(messages, stop, run_manager, **kwargs)):
+            time.sleep(self.first_token_latency if i == 0 else self.token_latency)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        i = 0
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            await asyncio.sleep(self.first_token_latency if i == 0 else self.token_latency)
+            i += 1
+            yield chunk
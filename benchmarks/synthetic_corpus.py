@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Synthetic Corpus Generator
+Scales the markdown guides in data/documents to any number of files of a
+chosen size, deterministically from a seed
+
+Usage:
+    python benchmarks/synthetic_corpus.py --files 1000 --size-kb 20 --out /tmp/corpus
+"""
+import argparse
+import random
+import re
+import sys
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import DATA_DIR
+
+
+def load_sections(source_dir: Path = DATA_DIR) -> List[str]:
+    """"## " sections of every markdown file in `source_dir`."""
+    sections = []
+    for path in sorted(Path(source_dir).glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        sections += [
+            "## " + part.strip() for part in re.split(r"^## ", text, flags=re.MULTILINE)[1:]
+        ]
+    if not sections:
+        raise ValueError(f"No markdown sections found in {source_dir}")
+    return sections
+
+
+def _vary(section: str, rng: random.Random, tag: str) -> str:
+    """Shuffle list items within each run of bullets and tag the heading, so
+    files differ in text (and embeddings) but keep the guides' structure."""
+    lines = section.splitlines()
+    out, bullets = [], []
+    for line in lines:
+        if line.startswith(("- ", "* ")):
+            bullets.append(line)
+            continue
+        rng.shuffle(bullets)
+        out += bullets
+        bullets = []
+        out.append(line)
+    rng.shuffle(bullets)
+    out += bullets
+    out[0] = f"{out[0]} ({tag})"
+    return "\n".join(out)
+
+
+def generate_corpus(
+    out_dir: Path,
+    files: int,
+    size_kb: float,
+    seed: int = 0,
+    source_dir: Path = DATA_DIR,
+) -> List[Path]:
+    """Write `files` markdown documents of about `size_kb` KiB each.
+
+    Returns:
+        Paths of the generated files
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sections = load_sections(source_dir)
+    target = int(size_kb * 1024)
+    paths = []
+    for i in range(files):
+        rng = random.Random(f"{seed}-{i}")
+        parts = [f"# Synthetic Guide {i}\n"]
+        size = len(parts[0])
+        n = 0
+        while size < target:
+            part = _vary(rng.choice(sections), rng, f"doc {i}, part {n}")
+            parts.append(part)
+            size += len(part) + 2
+            n += 1
+        path = out_dir / f"guide_{i:06d}.md"
+        path.write_text("\n\n".join(parts)[:target] + "\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown corpus")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--size-kb", type=float, default=20.0, help="Approximate size of each file")
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", type=Path, default=DATA_DIR, help="Markdown files to sample from")
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.out, args.files, args.size_kb, args.seed, args.source)
+    total = sum(path.stat().st_size for path in paths)
+    print(f"📄 Wrote {len(paths)} file(s), {total / 1024 / 1024:.1f} MiB, to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,21 +21,116 @@ DB_DIR.mkdir(parents=True, exist_ok=True)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 # Model Configuration
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "gemini")  # "gemini" or "local" (offline, see src/backends.py)
 EMBEDDING_MODEL = "models/text-embedding-004"  # Gemini embedding model
+LOCAL_EMBEDDING_DIM = 1024  # Hashed feature buckets of the local embedding backend
+
+# Embedding Scheduler Configuration (tune the quotas to your provider tier)
+EMBEDDING_BATCH_SIZE = 100  # Texts per embedding request (Gemini accepts up to 100)
+EMBEDDING_MIN_BATCH_SIZE = 10  # Floor when batches shrink under throttling
+EMBEDDING_INITIAL_CONCURRENCY = 4  # Concurrent requests at start
+EMBEDDING_MAX_CONCURRENCY = 16  # Ceiling for additive concurrency increase
+EMBEDDING_REQUESTS_PER_MINUTE = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", 1500))
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", 1_000_000))
+EMBEDDING_MAX_RETRIES = 8  # Throttled retries per batch before giving up
+
+# Embedding Cache Configuration (kept outside DB_DIR so it survives re-indexing)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = BASE_DIR / "db" / "cache" / "embeddings.sqlite"
+EMBEDDING_CACHE_MAX_ENTRIES = 1_000_000  # LRU-evicted beyond this many vectors
 
 # LLM Configuration (using Groq for faster response)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")  # "groq" or "local" (offline extractive answers)
 LLM_MODEL = "llama-3.3-70b-versatile"  # Groq LLM model
+LOCAL_LLM_MAX_SENTENCES = 3  # Context sentences quoted by the local LLM backend
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))  # In-flight async LLM calls
+GRADIO_CONCURRENCY_LIMIT = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", 64))  # Concurrent chat handlers
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 0))  # 0 = learn the limit from throttling
+LLM_MIN_REQUESTS_PER_MINUTE = 6  # Floor when the rate is halved under throttling
+LLM_BACKOFF_BASE_SECONDS = 1.0  # Retry backoff doubles from here (with jitter)
+LLM_BACKOFF_MAX_SECONDS = 60.0
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive provider failures that open the circuit
+LLM_CIRCUIT_RESET_SECONDS = 30.0  # Fail fast this long before probing the provider again
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"  # Coalesce identical in-flight questions
+
+# Document Loading Configuration
+LOADER_WORKERS = int(os.getenv("LOADER_WORKERS", os.cpu_count() or 1))  # Parser processes (1 = serial)
+LOADER_PREFETCH = 4  # Files queued per worker ahead of the consumer
 
 # Text Splitting Configuration
 CHUNK_SIZE = 1000  # Characters per chunk
 CHUNK_OVERLAP = 200  # Overlap between chunks
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]  # Split points, coarsest first
+TEXT_SPLITTER = os.getenv("TEXT_SPLITTER", "fast")  # "fast" (offset-based) or "langchain"
 
 # Retrieval Configuration
 TOP_K = 4  # Number of documents to retrieve
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # "hybrid" (BM25 + dense) or "dense"
+HYBRID_CANDIDATES = 20  # Results taken from each ranker before fusion
+RRF_K = 60  # Reciprocal rank fusion constant (higher = flatter rank weights)
+KEYWORD_QUERY_MAX_TERMS = 3  # Short identifier-like queries skip the embedding call
+BM25_K1 = 1.5  # Term frequency saturation
+BM25_B = 0.75  # Document length normalization
+QUERY_BATCH_SIZE = 1024  # Queries embedded and searched together by batch_retrieve
+ADAPTIVE_RETRIEVAL = os.getenv("ADAPTIVE_RETRIEVAL", "false").lower() == "true"  # Score-thresholded variable k
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", 0.5))  # Min cosine similarity of a sent chunk
+ADAPTIVE_MIN_K = 2  # Chunks sent once anything qualifies (padded with the next best)
+ADAPTIVE_MAX_K = 8  # Cap on qualifying chunks sent
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))  # Prompt context cap (~4 chars per token)
+CONTEXT_DUPLICATE_THRESHOLD = 0.9  # Shingle containment above which a passage is a near duplicate
+
+# Semantic Cache Configuration (answers reused for near-duplicate questions)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = 0.95  # Minimum query cosine similarity for a hit
+SEMANTIC_CACHE_MAX_ENTRIES = 1000  # LRU-evicted beyond this many answers
+SEMANTIC_CACHE_TTL_SECONDS = 3600  # Answers older than this are recomputed
+
+# Answer Cache Configuration (exact question + retrieved chunks + prompt)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_MAX_ENTRIES = 1000  # In-memory LRU tier
+ANSWER_CACHE_DISK_ENABLED = os.getenv("ANSWER_CACHE_DISK_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_PATH = BASE_DIR / "db" / "cache" / "answers.sqlite"  # Shared by all front ends
+ANSWER_CACHE_DISK_MAX_ENTRIES = 100_000  # LRU-trimmed beyond this many answers
 
 # Vector Store Configuration
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")  # "chroma" or "flat"
 COLLECTION_NAME = "rag_documents"
+FLAT_INDEX_DIR = DB_DIR / "flat"  # Matrix + docstore of the in-process flat index
+
+# Approximate Nearest Neighbour Configuration (see benchmarks/bench_ann_recall.py)
+# Chroma always searches an HNSW graph; M and construction ef apply to new collections
+HNSW_M = 16  # Graph neighbours per node (recall and memory grow with M)
+HNSW_CONSTRUCTION_EF = 100  # Candidate list size while building the graph
+HNSW_SEARCH_EF = 10  # Candidate list size per query (recall vs latency)
+# The flat backend searches exactly unless FLAT_INDEX_TYPE is "ivf"
+FLAT_INDEX_TYPE = os.getenv("FLAT_INDEX_TYPE", "exact")  # "exact" or "ivf"
+IVF_NLIST = 0  # Number of inverted lists (0 = about 4·sqrt(chunks))
+IVF_NPROBE = 8  # Lists visited per query (recall vs latency)
+IVF_MIN_ROWS = 10_000  # Smaller stores are always searched exactly
+UPSERT_BATCH_SIZE = 500  # Chunks per add/delete call against the vector store
+
+# Incremental Indexing Configuration
+MANIFEST_PATH = DB_DIR / "manifest.json"  # Per-file size/mtime/hash of indexed sources
+CHECKPOINT_INTERVAL_SECONDS = 30  # How often a running index persists its progress
+INDEX_LOCK_PATH = DB_DIR.parent / "index.lock"  # One index update at a time (outside DB_DIR, which resets delete)
+
+# Snapshot Configuration
+SNAPSHOT_DIR = DB_DIR / "snapshot"  # Memory-mapped, read-only copy of the index for servers
+
+# Streaming Pipeline Configuration
+PIPELINE_BATCH_SIZE = 1024  # Chunks per embed/upsert batch
+PIPELINE_MAX_INFLIGHT_CHUNKS = 8192  # Cap on chunks buffered between stages
+
+# Metrics Configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # Persist stage metrics on exit
+METRICS_PATH = BASE_DIR / "db" / "metrics.sqlite"  # Totals across runs, read by main.py --stats
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # Prometheus endpoint port (0 = off)
+
+# Profiling Configuration (python main.py --profile)
+PROFILE_DIR = BASE_DIR / "db" / "profiles"  # One timestamped directory per profiled run
+PROFILE_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples for the collapsed stacks
+PROFILE_TOP_ALLOCATORS = 25  # Source lines listed in memory.txt
 
 
 def validate_api_keys() -> tuple[bool, list[str]]:
@@ -45,9 +140,9 @@ def validate_api_keys() -> tuple[bool, list[str]]:
         tuple: (is_valid, list of missing key names)
     """
     missing = []
-    if not GOOGLE_API_KEY:
+    if EMBEDDING_BACKEND == "gemini" and not GOOGLE_API_KEY:
         missing.append("GOOGLE_API_KEY")
-    if not GROQ_API_KEY:
+    if LLM_BACKEND == "groq" and not GROQ_API_KEY:
         missing.append("GROQ_API_KEY")
     return len(missing) == 0, missing
 
@@ -63,5 +158,10 @@ GROQ_API_KEY=your_groq_api_key
 Get your keys from:
 - Gemini: https://aistudio.google.com/apikey
 - Groq: https://console.groq.com/keys
+
+Or run without keys using the offline backends:
+
+EMBEDDING_BACKEND=local
+LLM_BACKEND=local
 """
 
@@ -11,42 +11,55 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import DATA_DIR, DB_DIR
-from src.document_loader import load_all_documents
-from src.text_splitter import split_documents
-from src.vector_store import load_vector_store, create_vector_store
+from src.vector_store import load_vector_store
+from src.embeddings import get_embeddings
+from src.snapshot import open_snapshot
 from src.retriever import create_retriever
-from src.generator import create_rag_chain, query
+from src.generator import create_rag_chain, query, stream_query
+from src.semantic_cache import create_semantic_cache, report_semantic_cache_stats
+from src.indexer import index_sources
+from src.metrics import load_persisted, render_prometheus, report_stats, start_metrics_server
+from src.profiler import Profiler
 
 
-def index_documents(urls: list = None):
-    """Index documents from the data directory and optional URLs."""
+def index_documents(
+    urls: list = None,
+    incremental: bool = False,
+    workers: int = None,
+    resume: bool = False,
+):
+    """Index documents from the data directory and optional URLs.
+    
+    Files stream through load → split → embed → upsert in bounded batches.
+    Without `incremental` or `resume` the store is rebuilt from scratch.
+    """
     print("\n" + "="*50)
     print("📚 RAG System - Document Indexing")
     print("="*50 + "\n")
     
-    # Load documents
-    documents = load_all_documents(directory=DATA_DIR, urls=urls)
+    indexed = index_sources(
+        directory=DATA_DIR,
+        urls=urls,
+        workers=workers,
+        rebuild=not (incremental or resume),
+        resume=resume,
+    )
     
-    if not documents:
+    if not indexed:
         print("\n❌ No documents found to index!")
         print(f"   Please add documents to: {DATA_DIR}")
         print("   Supported formats: PDF, TXT, MD")
         return False
     
-    # Split documents
-    chunks = split_documents(documents)
-    
-    if not chunks:
-        print("\n❌ Failed to split documents!")
-        return False
-    
-    # Create vector store
-    create_vector_store(chunks)
-    
     print("\n✅ Indexing complete!")
     return True
 
 
+def load_search_store():
+    """Open the index snapshot (with its BM25 index), else the live vector store."""
+    return open_snapshot(get_embeddings()) or load_vector_store()
+
+
 def interactive_query():
     """Start interactive query mode."""
     print("\n" + "="*50)
@@ -59,7 +72,7 @@ def interactive_query():
     print("-"*50 + "\n")
     
     # Load vector store
-    vector_store = load_vector_store()
+    vector_store = load_search_store()
     
     if vector_store is None:
         print("❌ No indexed documents found!")
@@ -67,9 +80,12 @@ def interactive_query():
         print("   Then run: python main.py --index")
         return
     
+    start_metrics_server()
+    
     # Create RAG chain
     retriever = create_retriever(vector_store)
-    rag_chain = create_rag_chain(retriever)
+    cache = create_semantic_cache(vector_store.embeddings)
+    rag_chain = create_rag_chain(retriever, cache=cache)
     
     print("✅ RAG system ready! Ask me anything about your documents.\n")
     
@@ -81,6 +97,7 @@ def interactive_query():
                 continue
             
             if question.lower() in ["quit", "exit", "q"]:
+                report_semantic_cache_stats(cache)
                 print("\n👋 Goodbye!")
                 break
             
@@ -89,17 +106,36 @@ def interactive_query():
                 continue
             
             print("\n🔍 Searching documents...")
-            response = query(rag_chain, question)
-            print(f"\n🤖 Assistant:\n{response}\n")
+            first = True
+            for token in stream_query(rag_chain, question):
+                if first:
+                    print("\n🤖 Assistant:")
+                    first = False
+                print(token, end="", flush=True)
+            print("\n")
             print("-"*50 + "\n")
             
         except KeyboardInterrupt:
+            report_semantic_cache_stats(cache)
             print("\n\n👋 Goodbye!")
             break
         except Exception as e:
             print(f"\n❌ Error: {e}\n")
 
 
+def show_stats(output_format: str = "table"):
+    """Print stage metrics accumulated by every run so far."""
+    registry = load_persisted()
+    if output_format == "prometheus":
+        print(render_prometheus(registry), end="")
+        return
+    
+    print("\n" + "="*50)
+    print("📊 RAG System - Pipeline Stats")
+    print("="*50 + "\n")
+    report_stats(registry)
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -109,8 +145,12 @@ def main():
 Examples:
   python main.py --index              Index documents in data/documents/
   python main.py --index --url URL    Index documents + web page
+  python main.py --index --incremental  Re-embed only new/changed files
+  python main.py --index --resume     Continue an interrupted indexing run
   python main.py                      Start interactive query mode
   python main.py --query "question"   Single query mode
+  python main.py --stats              Per-stage latency and throughput report
+  python main.py --index --profile    Per-stage CPU/memory profiles in db/profiles/
         """
     )
     
@@ -126,17 +166,76 @@ Examples:
         help="URL to index (can be used multiple times)"
     )
     
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="With --index, only re-embed new or changed files (uses a manifest)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted indexing run from its last checkpoint"
+    )
+    
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        help="Processes used to parse documents while indexing (default: all cores)"
+    )
+    
     parser.add_argument(
         "--query", "-q",
         type=str,
         help="Single query mode (non-interactive)"
     )
     
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="table",
+        choices=["table", "prometheus"],
+        help="Show recorded per-stage metrics (table, or Prometheus text format)"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="With --index/--query, write per-stage cProfile, stack and memory profiles"
+    )
+    
     args = parser.parse_args()
     
+    if args.stats:
+        show_stats(args.stats)
+        return
+    
+    if args.profile:
+        if not (args.index or args.resume or args.query):
+            parser.error("--profile needs --index, --resume or --query")
+        # Parse documents in this process so the load stage is profiled
+        if args.workers is None:
+            args.workers = 1
+        label = "-".join(
+            mode for mode, on in (("index", args.index or args.resume), ("query", args.query)) if on
+        )
+        with Profiler(label):
+            run(args)
+        return
+    
+    run(args)
+
+
+def run(args):
+    """Index and/or answer a query as requested, else start interactive mode."""
     # Index mode
-    if args.index:
-        success = index_documents(urls=args.url)
+    if args.index or args.resume:
+        success = index_documents(
+            urls=args.url,
+            incremental=args.incremental,
+            workers=args.workers,
+            resume=args.resume,
+        )
         if not success:
             sys.exit(1)
         
@@ -146,7 +245,7 @@ Examples:
     
     # Single query mode
     if args.query:
-        vector_store = load_vector_store()
+        vector_store = load_search_store()
         if vector_store is None:
             print("❌ No indexed documents. Run with --index first.")
             sys.exit(1)
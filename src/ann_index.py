@@ -0,0 +1,128 @@
+"""
+ANN Index Module
+Inverted-file (IVF) approximate nearest-neighbour index over the rows of
+the flat index matrix, with tunable nlist/nprobe
+"""
+from typing import Optional, Tuple
+import numpy as np
+
+
+# Rows assigned per matrix product, to bound temporary memory
+ASSIGN_BLOCK_ROWS = 65536
+
+
+def auto_nlist(rows: int) -> int:
+    """Default number of lists: about 4·sqrt(n)."""
+    return max(1, int(4 * np.sqrt(rows)))
+
+
+class IVFIndex:
+    """Spherical k-means coarse quantizer plus per-row list assignments.
+
+    Search scores the query against the centroids, visits the `nprobe`
+    closest lists and ranks their rows exactly. Row numbers match the rows
+    of the matrix the index was built over, so the owner keeps the
+    assignments in sync on insert and delete.
+    """
+
+    def __init__(self, nlist: int, nprobe: int = 8, n_iter: int = 10, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.trained_rows = 0
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray, sample_size: int = 100_000) -> None:
+        """Fit centroids on (a sample of) normalized vectors, then assign all rows."""
+        rng = np.random.default_rng(self.seed)
+        n = vectors.shape[0]
+        self.nlist = min(self.nlist, n)
+        sample = vectors[rng.choice(n, size=min(n, sample_size), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=self.nlist, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            counts = np.bincount(labels, minlength=self.nlist)
+            # Per-list sums in one pass over the sample sorted by list
+            order = np.argsort(labels, kind="stable")
+            nonempty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+            sums = np.zeros_like(centroids)
+            sums[nonempty] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty lists with random sample points
+                sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        self.centroids = centroids
+        self.assignments = self.assign(vectors)
+        self.trained_rows = n
+        self._lists = None
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest centroid of each vector."""
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], ASSIGN_BLOCK_ROWS):
+            block = vectors[start:start + ASSIGN_BLOCK_ROWS]
+            labels[start:start + block.shape[0]] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+    def set_rows(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Assign inserted or overwritten rows."""
+        needed = int(rows.max()) + 1 if rows.size else 0
+        if needed > self.assignments.shape[0]:
+            grown = np.empty(max(needed, 2 * self.assignments.shape[0]), dtype=np.int32)
+            grown[:self.assignments.shape[0]] = self.assignments
+            self.assignments = grown
+        self.assignments[rows] = self.assign(vectors)
+        self._lists = None
+
+    def move_row(self, src: int, dst: int) -> None:
+        """Mirror the owner moving row `src` into slot `dst` on delete."""
+        self.assignments[dst] = self.assignments[src]
+        self._lists = None
+
+    def _inverted_lists(self, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by list: (row order, list offsets), rebuilt when stale."""
+        if self._lists is None or self._lists[0].shape[0] != size:
+            labels = self.assignments[:size]
+            order = np.argsort(labels, kind="stable")
+            offsets = np.searchsorted(labels[order], np.arange(self.nlist + 1))
+            self._lists = (order, offsets)
+        return self._lists
+
+    def candidates(self, query: np.ndarray, size: int, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows in the `nprobe` lists closest to a normalized query."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        order, offsets = self._inverted_lists(size)
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        return np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe])
+
+    def save(self, path) -> None:
+        np.savez(
+            path,
+            centroids=self.centroids,
+            assignments=self.assignments,
+            params=np.array([self.nlist, self.nprobe, self.trained_rows]),
+        )
+
+    @classmethod
+    def load(cls, path, size: int) -> "IVFIndex":
+        data = np.load(path)
+        nlist, nprobe, trained_rows = (int(x) for x in data["params"])
+        index = cls(nlist, nprobe)
+        index.centroids = data["centroids"]
+        index.assignments = data["assignments"][:size].copy()
+        index.trained_rows = trained_rows
+        return index
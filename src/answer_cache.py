@@ -0,0 +1,168 @@
+"""
+Answer Cache Module
+Exact-match cache of LLM answers keyed by normalized question, retrieved
+chunk IDs and prompt template, with a memory tier and an optional SQLite tier
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_DISK_ENABLED,
+    ANSWER_CACHE_PATH,
+    ANSWER_CACHE_DISK_MAX_ENTRIES,
+)
+from src.backends import llm_backend
+from src.metrics import register_collector
+
+
+def normalize_question(question: str) -> str:
+    """Unicode-normalize, casefold and collapse whitespace."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", question)).strip().casefold()
+
+
+def answer_key(question: str, chunk_ids: List[str], prompt_template: str) -> str:
+    """Cache key for an answer: the same question over the same retrieved
+    chunks with the same prompt and model gets the same key."""
+    sha = hashlib.sha256()
+    for part in (normalize_question(question), "\x1f".join(chunk_ids), prompt_template, llm_backend().model_name):
+        sha.update(part.encode("utf-8"))
+        sha.update(b"\x1e")
+    return sha.hexdigest()
+
+
+class AnswerCache:
+    """Thread-safe LRU of answers in memory, backed by SQLite when `path` is set.
+
+    Memory misses fall through to the disk tier, which is shared by every
+    process using the same file (CLI runs, Gradio and Streamlit servers).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        path: Optional[Path] = None,
+        disk_max_entries: int = ANSWER_CACHE_DISK_MAX_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY,"
+                " answer TEXT NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers (last_used)"
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, answer: str) -> None:
+        self._memory[key] = answer
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer for a key, or None."""
+        with self._lock:
+            answer = self._memory.get(key)
+            if answer is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return answer
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT answer FROM answers WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self._conn.commit()
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, answer: str) -> None:
+        """Store an answer in both tiers."""
+        with self._lock:
+            self._remember(key, answer)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, last_used) VALUES (?, ?, ?)",
+                (key, answer, time.time()),
+            )
+            # Trim the least recently used rows beyond the cap
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers "
+                "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM answers")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the memory tier size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+            }
+
+
+_answer_cache: Optional[AnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """The process-wide answer cache, or None when disabled in config."""
+    global _answer_cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = AnswerCache(
+                path=ANSWER_CACHE_PATH if ANSWER_CACHE_DISK_ENABLED else None
+            )
+            register_collector(
+                "answer_cache", _answer_cache.stats, counters=("hits", "disk_hits", "misses")
+            )
+        return _answer_cache
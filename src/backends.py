@@ -0,0 +1,141 @@
+"""
+Backends Module
+Registry of embedding and LLM providers, selected by EMBEDDING_BACKEND and
+LLM_BACKEND; the "local" backends run fully offline
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    EMBEDDING_BACKEND,
+    LLM_BACKEND,
+    GOOGLE_API_KEY,
+    GROQ_API_KEY,
+    EMBEDDING_MODEL,
+    LLM_MODEL,
+    LOCAL_EMBEDDING_DIM,
+)
+
+
+class Backend(NamedTuple):
+    """A registered provider.
+
+    `model_name` identifies its output in index fingerprints and caches, so
+    switching backends re-indexes and never serves another model's answers.
+    """
+    factory: Callable[[], object]
+    model_name: str
+    required_keys: Tuple[str, ...] = ()
+    cacheable: bool = True  # Worth putting the on-disk embedding cache in front
+
+
+EMBEDDING_BACKENDS: Dict[str, Backend] = {}
+LLM_BACKENDS: Dict[str, Backend] = {}
+
+
+def register_embedding_backend(name: str, backend: Backend) -> None:
+    """Make `backend` selectable as EMBEDDING_BACKEND=name; its factory
+    returns an Embeddings."""
+    EMBEDDING_BACKENDS[name] = backend
+
+
+def register_llm_backend(name: str, backend: Backend) -> None:
+    """Make `backend` selectable as LLM_BACKEND=name; its factory returns a
+    chat model."""
+    LLM_BACKENDS[name] = backend
+
+
+def _lookup(registry: Dict[str, Backend], name: str, setting: str) -> Backend:
+    if name not in registry:
+        raise ValueError(
+            f"❌ Unknown {setting} {name!r} (available: {', '.join(sorted(registry))})"
+        )
+    return registry[name]
+
+
+def embedding_backend(name: Optional[str] = None) -> Backend:
+    """The registered embedding backend `name` (default: EMBEDDING_BACKEND)."""
+    return _lookup(EMBEDDING_BACKENDS, name or EMBEDDING_BACKEND, "EMBEDDING_BACKEND")
+
+
+def llm_backend(name: Optional[str] = None) -> Backend:
+    """The registered LLM backend `name` (default: LLM_BACKEND)."""
+    return _lookup(LLM_BACKENDS, name or LLM_BACKEND, "LLM_BACKEND")
+
+
+def missing_api_keys() -> List[str]:
+    """API keys the configured backends need but are not set."""
+    env = {"GOOGLE_API_KEY": GOOGLE_API_KEY, "GROQ_API_KEY": GROQ_API_KEY}
+    required = embedding_backend().required_keys + llm_backend().required_keys
+    return [key for key in dict.fromkeys(required) if not env.get(key)]
+
+
+def _gemini_embeddings() -> Embeddings:
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from src.embedding_scheduler import ScheduledEmbeddings
+
+    if not GOOGLE_API_KEY:
+        raise ValueError(
+            "❌ GOOGLE_API_KEY not found!\n"
+            "Please set your API key in the .env file:\n"
+            "GOOGLE_API_KEY=your_api_key_here\n"
+            "Get your key from: https://aistudio.google.com/apikey\n"
+            "Or run offline with EMBEDDING_BACKEND=local"
+        )
+
+    # Requests go out in concurrent, rate-limited batches
+    model = GoogleGenerativeAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        google_api_key=GOOGLE_API_KEY,
+    )
+    return ScheduledEmbeddings(
+        model,
+        # One request embeds a whole batch of queries with the query task type
+        query_batch_fn=lambda texts: model.embed_documents(texts, task_type="RETRIEVAL_QUERY"),
+    )
+
+
+def _groq_llm() -> BaseChatModel:
+    from langchain_groq import ChatGroq
+
+    if not GROQ_API_KEY:
+        raise ValueError(
+            "❌ GROQ_API_KEY not found!\n"
+            "Please set your API key in the .env file:\n"
+            "GROQ_API_KEY=your_api_key_here\n"
+            "Get your key from: https://console.groq.com/keys\n"
+            "Or run offline with LLM_BACKEND=local"
+        )
+
+    return ChatGroq(
+        model=LLM_MODEL,
+        api_key=GROQ_API_KEY,
+        temperature=0.3,
+        # Retries go through the shared limiter in `query`, not the client
+        max_retries=0,
+    )
+
+
+def _local_embeddings() -> Embeddings:
+    from src.local_models import HashingEmbeddings
+    return HashingEmbeddings(LOCAL_EMBEDDING_DIM)
+
+
+def _local_llm() -> BaseChatModel:
+    from src.local_models import ExtractiveChatModel
+    return ExtractiveChatModel()
+
+
+register_embedding_backend(
+    "gemini", Backend(_gemini_embeddings, EMBEDDING_MODEL, required_keys=("GOOGLE_API_KEY",))
+)
+# Hashing is cheaper than a cache lookup
+register_embedding_backend(
+    "local", Backend(_local_embeddings, f"local-hashing-{LOCAL_EMBEDDING_DIM}", cacheable=False)
+)
+register_llm_backend("groq", Backend(_groq_llm, LLM_MODEL, required_keys=("GROQ_API_KEY",)))
+register_llm_backend("local", Backend(_local_llm, "local-extractive"))
@@ -0,0 +1,170 @@
+"""
+Context Packer Module
+Turns ranked chunks into a compact prompt context: overlapping chunks are
+merged, duplicates dropped and the rest packed into a token budget
+"""
+import re
+from pathlib import Path
+from typing import List, Optional, Set
+from langchain_core.documents import Document
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET, CONTEXT_DUPLICATE_THRESHOLD
+from src.rate_limit import estimate_tokens
+
+
+# Shortest suffix/prefix match accepted as chunk overlap when offsets are unknown
+MIN_TEXT_OVERLAP = 20
+SHINGLE_WORDS = 3
+
+
+class _Passage:
+    """One or more merged chunks of the same parent document."""
+
+    def __init__(self, doc: Document, rank: int):
+        # Offsets count from the start of the loaded document: one page of a PDF
+        self.parent = (doc.metadata.get("source"), doc.metadata.get("page"))
+        self.text = doc.page_content
+        self.start: Optional[int] = doc.metadata.get("start_index")
+        # Whitespace the splitter stripped after the chunk, when recorded
+        self.after: Optional[str] = doc.metadata.get("whitespace_after")
+        self.rank = rank
+        self.doc = doc
+        self.ids = [doc.id]
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+    def absorb(self, other: "_Passage", text: str, start: Optional[int], after: Optional[str] = None) -> None:
+        self.text = text
+        self.start = start
+        self.after = after
+        if other.rank < self.rank:
+            self.rank, self.doc = other.rank, other.doc
+        self.ids.extend(other.ids)
+
+
+def _text_overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of `first` that is a prefix of `second`
+    (0 below MIN_TEXT_OVERLAP)."""
+    probe = second[:MIN_TEXT_OVERLAP]
+    if len(probe) < MIN_TEXT_OVERLAP:
+        return 0
+    # Splitter overlap never exceeds CHUNK_OVERLAP plus a separator
+    pos = first.find(probe, max(0, len(first) - CHUNK_OVERLAP - MIN_TEXT_OVERLAP))
+    while pos != -1:
+        if second.startswith(first[pos:]):
+            return len(first) - pos
+        pos = first.find(probe, pos + 1)
+    return 0
+
+
+def _merge(a: _Passage, b: _Passage) -> bool:
+    """Merge `b` into `a` if they overlap, touch or contain one another."""
+    if a.start is not None and b.start is not None:
+        first, second = (a, b) if a.start <= b.start else (b, a)
+        if second.start > first.end:
+            # Only bridge whitespace the splitter stripped between the two
+            gap = second.start - first.end
+            if first.after is None or len(first.after) != gap:
+                return False
+            a.absorb(b, first.text + first.after + second.text, first.start, second.after)
+            return True
+        if second.end > first.end:
+            a.absorb(b, first.text + second.text[first.end - second.start:], first.start, second.after)
+        else:
+            a.absorb(b, first.text, first.start, first.after)
+        return True
+
+    if b.text in a.text:
+        a.absorb(b, a.text, a.start)
+        return True
+    if a.text in b.text:
+        a.absorb(b, b.text, b.start)
+        return True
+    for first, second in ((a, b), (b, a)):
+        overlap = _text_overlap(first.text, second.text)
+        if overlap:
+            a.absorb(b, first.text + second.text[overlap:], first.start)
+            return True
+    return False
+
+
+def _shingles(text: str) -> Set[int]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {hash(" ".join(words))}
+    return {hash(" ".join(words[i:i + SHINGLE_WORDS])) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _truncate(text: str, tokens: int) -> str:
+    """Cut `text` to about `tokens`, at a word boundary where possible
+    (without the " …" marker the caller appends)."""
+    cut = text[:tokens * 4]
+    space = cut.rfind(" ")
+    return cut[:space] if space > len(cut) // 2 else cut
+
+
+def pack_context(docs: List[Document], token_budget: int = CONTEXT_TOKEN_BUDGET) -> List[Document]:
+    """Compact ranked chunks into passages that fit `token_budget`.
+
+    Chunks of the same parent document (source and page) that overlap or
+    are adjacent (by `start_index` metadata, or by shared text when that is
+    missing) are merged into one passage ranked as its best chunk. Passages that are
+    exact or near duplicates of a better-ranked one (word-shingle
+    containment of at least CONTEXT_DUPLICATE_THRESHOLD) are dropped. The
+    rest are added best first while they fit the budget; the best passage
+    is truncated rather than left out.
+
+    Returns:
+        Passages as Documents in rank order; metadata is the best chunk's,
+        plus "chunk_ids" listing the merged chunks
+    """
+    passages: List[_Passage] = []
+    seen_texts = set()
+    for rank, doc in enumerate(docs):
+        key = " ".join(doc.page_content.split())
+        if key in seen_texts:
+            continue
+        seen_texts.add(key)
+
+        passage = _Passage(doc, rank)
+        # Merging can bridge two earlier passages, so keep absorbing
+        for other in [p for p in passages if p.parent == passage.parent]:
+            if _merge(passage, other):
+                passages.remove(other)
+        passages.append(passage)
+    passages.sort(key=lambda p: p.rank)
+
+    kept, kept_shingles = [], []
+    for passage in passages:
+        shingles = _shingles(passage.text)
+        if any(
+            len(shingles & other) >= CONTEXT_DUPLICATE_THRESHOLD * min(len(shingles), len(other))
+            for other in kept_shingles
+        ):
+            continue
+        kept.append(passage)
+        kept_shingles.append(shingles)
+
+    packed, used = [], 0
+    for passage in kept:
+        tokens = estimate_tokens(passage.text)
+        text = shown = passage.text
+        if used + tokens > token_budget:
+            if packed:
+                continue
+            text = _truncate(text, token_budget)
+            shown = text + " …"
+            tokens = token_budget
+        used += tokens
+        metadata = {**passage.doc.metadata, "chunk_ids": passage.ids}
+        metadata.pop("whitespace_after", None)
+        if passage.start is not None:
+            # The span of the source text actually included
+            metadata["start_index"] = passage.start
+            metadata["end_index"] = passage.start + len(text)
+        packed.append(Document(id=passage.doc.id, page_content=shown, metadata=metadata))
+    return packed
@@ -3,9 +3,12 @@ Document Loader Module
 Supports PDF, TXT, MD, and Web pages
 """
 import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from langchain_core.documents import Document
 from langchain_community.document_loaders import (
     PyPDFLoader,
@@ -14,6 +17,13 @@ from langchain_community.document_loaders import (
 )
 from tqdm import tqdm
 
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import LOADER_WORKERS, LOADER_PREFETCH
+
+
+SUPPORTED_EXTENSIONS = {".pdf", ".txt", ".md"}
+
 
 def generate_doc_id(content: str, source: str) -> str:
     """Generate a unique document ID based on content hash."""
@@ -21,8 +31,8 @@ def generate_doc_id(content: str, source: str) -> str:
     return hashlib.md5(combined.encode()).hexdigest()[:16]
 
 
-def load_single_document(file_path: Path) -> List[Document]:
-    """Load a single document based on its file extension."""
+def _read_document(file_path: Path) -> List[Document]:
+    """Load a single document, raising on failure."""
     suffix = file_path.suffix.lower()
     
     try:
@@ -48,32 +58,92 @@ def load_single_document(file_path: Path) -> List[Document]:
         return docs
     except UnicodeDecodeError:
         # Try with different encoding
-        try:
-            loader = TextLoader(str(file_path), encoding="latin-1")
-            docs = loader.load()
-            for doc in docs:
-                doc.metadata["source"] = str(file_path)
-                doc.metadata["file_name"] = file_path.name
-                doc.metadata["encoding"] = "latin-1"
-            return docs
-        except Exception as e:
-            print(f"❌ Error loading {file_path.name}: {e}")
-            return []
+        loader = TextLoader(str(file_path), encoding="latin-1")
+        docs = loader.load()
+        for doc in docs:
+            doc.metadata["source"] = str(file_path)
+            doc.metadata["file_name"] = file_path.name
+            doc.metadata["encoding"] = "latin-1"
+        return docs
+
+
+def load_single_document(file_path: Path) -> List[Document]:
+    """Load a single document based on its file extension."""
+    try:
+        return _read_document(file_path)
     except Exception as e:
         print(f"❌ Error loading {file_path.name}: {e}")
         return []
 
 
-def load_documents_from_directory(directory: Path) -> List[Document]:
-    """Load all supported documents from a directory."""
+def _load_file_task(file_path: Path) -> Tuple[List[Document], Optional[str]]:
+    """Process-pool task: load one file and return (docs, error message)."""
+    try:
+        return _read_document(file_path), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def iter_loaded_files(
+    files: List[Path],
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[Path, List[Document], Optional[str]]]:
+    """Load files, yielding (path, docs, error) in the same order as `files`.
+    
+    Args:
+        files: Files to load
+        workers: Worker processes; None uses LOADER_WORKERS, 1 loads serially
+    """
+    if workers is None:
+        workers = LOADER_WORKERS
+    workers = max(1, min(workers, len(files)))
+    
+    if workers == 1:
+        for file_path in files:
+            docs, error = _load_file_task(file_path)
+            yield file_path, docs, error
+        return
+    
+    # Keep a bounded window of submitted files so results never pile up
+    # faster than the caller consumes them
+    window = workers * LOADER_PREFETCH
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        file_iter = iter(files)
+        for file_path in islice(file_iter, window):
+            pending.append((file_path, executor.submit(_load_file_task, file_path)))
+        
+        while pending:
+            file_path, future = pending.popleft()
+            docs, error = future.result()
+            next_path = next(file_iter, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(_load_file_task, next_path)))
+            yield file_path, docs, error
+
+
+def find_supported_files(directory: Path) -> List[Path]:
+    """Find all supported files under a directory, in a stable order."""
+    return sorted(
+        f for f in directory.rglob("*")
+        if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def load_documents_from_directory(
+    directory: Path,
+    workers: Optional[int] = None,
+) -> List[Document]:
+    """Load all supported documents from a directory.
+    
+    Args:
+        directory: Directory to scan recursively
+        workers: Worker processes for parsing; None uses LOADER_WORKERS
+    """
     all_documents = []
-    supported_extensions = {".pdf", ".txt", ".md"}
     
     # Find all supported files
-    files = [
-        f for f in directory.rglob("*") 
-        if f.is_file() and f.suffix.lower() in supported_extensions
-    ]
+    files = find_supported_files(directory)
     
     if not files:
         print(f"📂 No supported documents found in {directory}")
@@ -81,10 +151,16 @@ def load_documents_from_directory(directory: Path) -> List[Document]:
     
     print(f"📂 Found {len(files)} document(s) to load...")
     
-    for file_path in tqdm(files, desc="Loading documents"):
-        docs = load_single_document(file_path)
+    errors = []
+    results = iter_loaded_files(files, workers=workers)
+    for file_path, docs, error in tqdm(results, total=len(files), desc="Loading documents"):
+        if error:
+            errors.append((file_path, error))
         all_documents.extend(docs)
     
+    for file_path, error in errors:
+        print(f"❌ Error loading {file_path.name}: {error}")
+    
     print(f"✅ Loaded {len(all_documents)} document chunk(s)")
     return all_documents
 
@@ -117,13 +193,14 @@ def load_from_urls(urls: List[str]) -> List[Document]:
 
 def load_all_documents(
     directory: Optional[Path] = None,
-    urls: Optional[List[str]] = None
+    urls: Optional[List[str]] = None,
+    workers: Optional[int] = None,
 ) -> List[Document]:
     """Load documents from both directory and URLs."""
     all_docs = []
     
     if directory:
-        all_docs.extend(load_documents_from_directory(directory))
+        all_docs.extend(load_documents_from_directory(directory, workers=workers))
     
     if urls:
         all_docs.extend(load_from_urls(urls))
@@ -0,0 +1,185 @@
+"""
+Embedding Cache Module
+Disk-backed, content-addressed cache in front of any embedding backend
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES
+
+
+# SQLite caps the number of bound parameters per statement
+LOOKUP_BATCH_SIZE = 500
+
+
+def hash_text(text: str) -> str:
+    """Content address of a chunk text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that stores vectors in SQLite keyed by (model, text hash).
+
+    Only texts missing from the cache are sent to the wrapped backend, so
+    re-indexing an unchanged corpus makes no remote embedding calls.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        path: Path = EMBEDDING_CACHE_PATH,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _lookup(self, namespace: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for the given hashes and mark them as used."""
+        found = {}
+        for start in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+            batch = hashes[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings "
+                f"WHERE model = ? AND text_hash IN ({placeholders})",
+                [namespace, *batch],
+            ).fetchall()
+            for text_hash, blob in rows:
+                found[text_hash] = array("f", blob).tolist()
+
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(now, namespace, h) for h in found],
+            )
+            self._conn.commit()
+        return found
+
+    def _store(self, namespace: str, vectors: Dict[str, List[float]]) -> None:
+        """Insert new vectors and evict the least recently used beyond the cap."""
+        now = time.time()
+        cursor = self._conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (namespace, h, array("f", vector).tobytes(), now)
+                for h, vector in vectors.items()
+            ],
+        )
+        self._count += max(cursor.rowcount, 0)
+
+        if self.max_entries and self._count > self.max_entries:
+            overflow = self._count - self.max_entries
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self._conn.commit()
+
+    def _embed(self, texts: List[str], namespace: str, embed_fn) -> List[List[float]]:
+        """Serve texts from the cache, calling `embed_fn` only for misses."""
+        hashes = [hash_text(text) for text in texts]
+
+        with self._lock:
+            cached = self._lookup(namespace, list(set(hashes)))
+
+        # Deduplicate misses so repeated chunks are embedded once
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+
+        if missing:
+            new_vectors = embed_fn(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_vectors))
+            with self._lock:
+                self._store(namespace, computed)
+            cached.update(computed)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        return [cached[text_hash] for text_hash in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the backend only for cache misses."""
+        return self._embed(texts, self.model_name, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query, served from the cache when possible.
+
+        Query vectors live in their own namespace because backends such as
+        Gemini embed queries and documents with different task types.
+        """
+        return self._embed(
+            [text],
+            f"{self.model_name}#query",
+            lambda texts: [self.embeddings.embed_query(texts[0])],
+        )[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries, sending only cache misses to the backend (batched
+        when it supports `embed_queries`)."""
+        embed_fn = getattr(self.embeddings, "embed_queries", None) or (
+            lambda batch: [self.embeddings.embed_query(text) for text in batch]
+        )
+        return self._embed(texts, f"{self.model_name}#query", embed_fn)
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current cache size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": self._count,
+            }
+
+    def clear(self, model_only: bool = True) -> None:
+        """Drop cached vectors (for this model only by default)."""
+        with self._lock:
+            if model_only:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE model IN (?, ?)",
+                    (self.model_name, f"{self.model_name}#query"),
+                )
+            else:
+                self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
@@ -0,0 +1,194 @@
+"""
+Embedding Scheduler Module
+Batched, concurrent and rate-limit-aware embedding of large text lists
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MIN_BATCH_SIZE,
+    EMBEDDING_INITIAL_CONCURRENCY,
+    EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_REQUESTS_PER_MINUTE,
+    EMBEDDING_TOKENS_PER_MINUTE,
+    EMBEDDING_MAX_RETRIES,
+)
+from src.rate_limit import TokenBucket, is_rate_limit_error, estimate_tokens
+
+
+class EmbeddingScheduler:
+    """Embed texts in concurrent batches under request and token budgets.
+
+    Concurrency and batch size follow AIMD: both are halved when the
+    provider throttles (with exponential backoff and jitter), and
+    concurrency grows by one after each round of clean batches.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        min_batch_size: int = EMBEDDING_MIN_BATCH_SIZE,
+        initial_concurrency: int = EMBEDDING_INITIAL_CONCURRENCY,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        requests_per_minute: float = EMBEDDING_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = EMBEDDING_TOKENS_PER_MINUTE,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = batch_size
+        self.min_batch_size = min(min_batch_size, batch_size)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+        self.batch_size = batch_size
+        self.concurrency = max(1, min(initial_concurrency, max_concurrency))
+        self._success_streak = 0
+        self._throttle_streak = 0
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.throttled = 0
+        self.embedded = 0
+
+    def _throttle_wait(self, texts: List[str]) -> None:
+        """Wait out any backoff window, then take request and token budget."""
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.request_bucket.acquire(1)
+        self.token_bucket.acquire(sum(estimate_tokens(text) for text in texts))
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._throttle_streak = 0
+            self._success_streak += 1
+            if self._success_streak >= self.concurrency:
+                # One clean round: probe for more throughput
+                self._success_streak = 0
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+
+    def _on_throttled(self) -> None:
+        with self._lock:
+            self.throttled += 1
+            self._success_streak = 0
+            self._throttle_streak += 1
+            self.concurrency = max(1, self.concurrency // 2)
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self._throttle_streak - 1))
+            backoff *= random.uniform(0.5, 1.0)
+            self._resume_at = max(self._resume_at, time.monotonic() + backoff)
+
+    def _split(self, start: int, end: int) -> List[tuple]:
+        """Cut [start, end) into ranges of the current batch size."""
+        return [
+            (s, min(s + self.batch_size, end))
+            for s in range(start, end, self.batch_size)
+        ]
+
+    def embed(self, texts: List[str], embed_fn=None) -> List[List[float]]:
+        """Embed all texts, preserving input order.
+
+        Args:
+            texts: Texts to embed
+            embed_fn: Batch call to schedule (default: embed_documents)
+        """
+        if not texts:
+            return []
+        embed_fn = embed_fn or self.embeddings.embed_documents
+
+        results: List[List[float]] = [None] * len(texts)
+        pending = deque(self._split(0, len(texts)))
+        attempts: Dict[int, int] = {}
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while pending or in_flight:
+                while pending and len(in_flight) < self.concurrency:
+                    start, end = pending.popleft()
+                    self._throttle_wait(texts[start:end])
+                    future = pool.submit(embed_fn, texts[start:end])
+                    in_flight[future] = (start, end)
+                    self.requests += 1
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, end = in_flight.pop(future)
+                    try:
+                        vectors = future.result()
+                    except Exception as e:
+                        attempts[start] = attempts.get(start, 0) + 1
+                        if not is_rate_limit_error(e) or attempts[start] > self.max_retries:
+                            for other in in_flight:
+                                other.cancel()
+                            raise
+                        self._on_throttled()
+                        # Retry first, in smaller pieces
+                        pending.extendleft(reversed(self._split(start, end)))
+                        continue
+
+                    results[start:end] = vectors
+                    self.embedded += end - start
+                    self._on_success()
+
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        """Return request counters and the current operating point."""
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "embedded": self.embedded,
+            "concurrency": self.concurrency,
+            "batch_size": self.batch_size,
+        }
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Embeddings wrapper that routes document embedding through a scheduler.
+
+    `query_batch_fn` embeds a list of queries in one request (with the
+    backend's query task type); without it batched queries are embedded
+    one call each, still under the scheduler's budgets.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        scheduler: EmbeddingScheduler = None,
+        query_batch_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    ):
+        self.embeddings = embeddings
+        self.scheduler = scheduler or EmbeddingScheduler(embeddings)
+        self.query_batch_fn = query_batch_fn
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.scheduler.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.scheduler.request_bucket.acquire(1)
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries in scheduled batches, preserving order."""
+        embed_fn = self.query_batch_fn or (
+            lambda batch: [self.embeddings.embed_query(text) for text in batch]
+        )
+        return self.scheduler.embed(texts, embed_fn=embed_fn)
@@ -1,26 +1,48 @@
 """
 Embeddings Module
-Creates vector embeddings using Gemini
+Creates vector embeddings with the configured backend (Gemini by default)
 """
 from pathlib import Path
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import GOOGLE_API_KEY, EMBEDDING_MODEL
+from config import EMBEDDING_CACHE_ENABLED
+from src.backends import embedding_backend
+from src.embedding_cache import CachedEmbeddings
 
 
-def get_embeddings() -> GoogleGenerativeAIEmbeddings:
-    """Get the configured embedding model."""
-    if not GOOGLE_API_KEY:
-        raise ValueError(
-            "❌ GOOGLE_API_KEY not found!\n"
-            "Please set your API key in the .env file:\n"
-            "GOOGLE_API_KEY=your_api_key_here\n"
-            "Get your key from: https://aistudio.google.com/apikey"
-        )
+def get_embeddings(use_cache: Optional[bool] = None) -> Embeddings:
+    """Get the configured embedding model (see EMBEDDING_BACKEND).
+    
+    Args:
+        use_cache: Wrap the model in the on-disk embedding cache;
+            None follows EMBEDDING_CACHE_ENABLED (for backends worth caching)
+    """
+    backend = embedding_backend()
+    embeddings = backend.factory()
     
-    return GoogleGenerativeAIEmbeddings(
-        model=EMBEDDING_MODEL,
-        google_api_key=GOOGLE_API_KEY,
-    )
+    # The cache (if enabled) sits in front so only misses reach the model
+    if use_cache is None:
+        use_cache = EMBEDDING_CACHE_ENABLED and backend.cacheable
+    if use_cache:
+        return CachedEmbeddings(embeddings, model_name=backend.model_name)
+    return embeddings
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed many queries, batched when the model supports it."""
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+def report_cache_stats(embeddings: Embeddings) -> None:
+    """Print embedding cache hit/miss counters, if the model is cached."""
+    if isinstance(embeddings, CachedEmbeddings):
+        stats = embeddings.stats()
+        print(
+            f"💾 Embedding cache: {stats['hits']} hit(s), {stats['misses']} miss(es) "
+            f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} cached)"
+        )
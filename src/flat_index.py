@@ -0,0 +1,357 @@
+"""
+Flat Index Module
+In-process exact vector index: a contiguous float32 matrix of normalized
+embeddings plus parallel ID, text and metadata stores
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.ann_index import IVFIndex, auto_nlist
+
+
+VECTORS_FILE = "vectors.npy"
+DOCSTORE_FILE = "docstore.jsonl"
+IVF_FILE = "ivf.npz"
+
+# Query × row scores computed per block in batched search, to bound memory
+SEARCH_BLOCK_ELEMENTS = 1 << 24
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first (argpartition + sort of k)."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def batch_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Per-row indices of the k largest scores, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class FlatVectorStore(VectorStore):
+    """Cosine-similarity search over an in-memory float32 matrix.
+
+    Rows are kept contiguous: the matrix grows geometrically on insert and
+    deletes move the last row into the freed slot. With `index_type="ivf"`
+    searches go through an IVF index once the store holds `ivf_min_rows`
+    rows; smaller stores are always searched exactly.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        persist_directory: Optional[str] = None,
+        index_type: str = "exact",
+        nlist: int = 0,
+        nprobe: int = 8,
+        ivf_min_rows: int = 10_000,
+    ):
+        self._embedding = embedding
+        self.persist_directory = Path(persist_directory) if persist_directory else None
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ivf_min_rows = ivf_min_rows
+        self._ivf: Optional[IVFIndex] = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._row_of: dict = {}
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the live rows of the matrix."""
+        return self._matrix[:self._size]
+
+    def count(self) -> int:
+        return self._size
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        if self._matrix.shape[1] not in (0, dim):
+            raise ValueError(
+                f"Embedding dimension {dim} does not match index dimension {self._matrix.shape[1]}"
+            )
+        if rows <= self._matrix.shape[0] and self._matrix.shape[1] == dim:
+            return
+        capacity = max(rows, 2 * self._matrix.shape[0], 1024)
+        grown = np.empty((capacity, dim), dtype=np.float32)
+        if self._size:
+            grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def upsert_embeddings(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: List[dict],
+    ) -> None:
+        """Insert or overwrite rows with precomputed embeddings."""
+        if not ids:
+            return
+        normalized = normalize_rows(vectors)
+        self._reserve(self._size + len(ids), normalized.shape[1])
+        rows = np.empty(len(ids), dtype=np.int64)
+
+        for i, (chunk_id, vector, text, metadata) in enumerate(
+            zip(ids, normalized, texts, metadatas)
+        ):
+            row = self._row_of.get(chunk_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._row_of[chunk_id] = row
+                self._ids.append(chunk_id)
+                self._texts.append(text)
+                self._metadatas.append(metadata)
+            else:
+                self._texts[row] = text
+                self._metadatas[row] = metadata
+            self._matrix[row] = vector
+            rows[i] = row
+
+        if self._ivf is not None:
+            self._ivf.set_rows(rows, normalized)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if metadatas is None:
+            metadatas = [{} for _ in texts]
+        if ids is None:
+            start = self._size
+            ids = [f"chunk-{start + i}" for i in range(len(texts))]
+        self.upsert_embeddings(ids, self._embedding.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        for chunk_id in ids or []:
+            row = self._row_of.pop(chunk_id, None)
+            if row is None:
+                continue
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the hole to stay contiguous
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._texts[row] = self._texts[last]
+                self._metadatas[row] = self._metadatas[last]
+                self._row_of[self._ids[row]] = row
+                if self._ivf is not None:
+                    self._ivf.move_row(last, row)
+            self._ids.pop()
+            self._texts.pop()
+            self._metadatas.pop()
+            self._size = last
+        return True
+
+    def _document(self, row: int) -> Document:
+        return Document(
+            page_content=self._texts[row],
+            metadata=self._metadatas[row],
+            id=self._ids[row],
+        )
+
+    def build_ann(self, force: bool = False) -> bool:
+        """(Re)train the IVF index when configured and the store is large enough.
+
+        Retrains once the store has doubled since the last training, so the
+        centroids keep tracking the data. Returns True if the index is usable.
+        """
+        if self.index_type != "ivf" or self._size < self.ivf_min_rows:
+            self._ivf = None
+            return False
+        if force or self._ivf is None or self._size > 2 * self._ivf.trained_rows:
+            nlist = self.nlist or auto_nlist(self._size)
+            self._ivf = IVFIndex(nlist=nlist, nprobe=self.nprobe)
+            self._ivf.train(self.vectors)
+        return True
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, nprobe: Optional[int] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k rows by cosine similarity; approximate when the IVF index is on.
+
+        Args:
+            embedding: Query vector
+            k: Number of results
+            nprobe: IVF lists to visit (more = higher recall, slower)
+        """
+        if self._size == 0:
+            return []
+        query = normalize_rows(embedding)
+
+        if self.index_type == "ivf" and self.build_ann():
+            rows = self._ivf.candidates(query, self._size, nprobe or self.nprobe)
+            scores = self.vectors[rows] @ query
+            best = top_k(scores, k)
+            return [(self._document(rows[i]), float(scores[i])) for i in best]
+
+        scores = self.vectors @ query
+        return [(self._document(row), float(scores[row])) for row in top_k(scores, k)]
+
+    def batch_similarity_search_by_vector_with_score(
+        self, embeddings: List[List[float]], k: int = 4, nprobe: Optional[int] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Top-k rows for many query vectors at once.
+
+        Exact search runs as blocked matrix-matrix products, keeping a running
+        top-k per query, so memory stays bounded however large the store is.
+        """
+        if self._size == 0 or len(embeddings) == 0:
+            return [[] for _ in embeddings]
+        if self.index_type == "ivf" and self.build_ann():
+            # Each query probes different lists
+            return [
+                self.similarity_search_by_vector_with_score(embedding, k, nprobe)
+                for embedding in embeddings
+            ]
+
+        queries = normalize_rows(embeddings)
+        block_rows = max(1024, SEARCH_BLOCK_ELEMENTS // queries.shape[0])
+        best_rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+        best_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+
+        for start in range(0, self._size, block_rows):
+            block_scores = queries @ self.vectors[start:start + block_rows].T
+            block_ids = np.arange(start, start + block_scores.shape[1])
+            scores = np.concatenate([best_scores, block_scores], axis=1)
+            rows = np.concatenate(
+                [best_rows, np.broadcast_to(block_ids, block_scores.shape)], axis=1
+            )
+            keep = batch_top_k(scores, k)
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_rows = np.take_along_axis(rows, keep, axis=1)
+
+        return [
+            [(self._document(row), float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, nprobe: Optional[int] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [
+            doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, nprobe)
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, nprobe: Optional[int] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k, nprobe
+        )
+
+    def similarity_search(
+        self, query: str, k: int = 4, nprobe: Optional[int] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, nprobe)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def persist(self, directory: Optional[Path] = None) -> None:
+        """Write the matrix and docstore to disk (atomically per file)."""
+        directory = Path(directory or self.persist_directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        tmp_vectors = directory / (VECTORS_FILE + ".tmp")
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, self.vectors)
+        tmp_docstore = directory / (DOCSTORE_FILE + ".tmp")
+        with open(tmp_docstore, "w", encoding="utf-8") as f:
+            for chunk_id, text, metadata in zip(self._ids, self._texts, self._metadatas):
+                f.write(json.dumps({"id": chunk_id, "text": text, "metadata": metadata}) + "\n")
+
+        os.replace(tmp_vectors, directory / VECTORS_FILE)
+        os.replace(tmp_docstore, directory / DOCSTORE_FILE)
+
+        # Train (or refresh) the ANN index here rather than on the first query
+        if self.build_ann():
+            tmp_ivf = directory / (IVF_FILE + ".tmp.npz")
+            self._ivf.save(tmp_ivf)
+            os.replace(tmp_ivf, directory / IVF_FILE)
+        elif (directory / IVF_FILE).exists():
+            (directory / IVF_FILE).unlink()
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        return (Path(directory) / VECTORS_FILE).exists()
+
+    @classmethod
+    def load(cls, directory: Path, embedding: Embeddings, **kwargs: Any) -> "FlatVectorStore":
+        """Load a store written by `persist` (kwargs as for the constructor)."""
+        directory = Path(directory)
+        store = cls(embedding, persist_directory=str(directory), **kwargs)
+        store._matrix = np.ascontiguousarray(np.load(directory / VECTORS_FILE), dtype=np.float32)
+        with open(directory / DOCSTORE_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                store._ids.append(record["id"])
+                store._texts.append(record["text"])
+                store._metadatas.append(record["metadata"])
+        store._size = len(store._ids)
+        store._row_of = {chunk_id: row for row, chunk_id in enumerate(store._ids)}
+
+        if store.index_type == "ivf" and (directory / IVF_FILE).exists():
+            store._ivf = IVFIndex.load(directory / IVF_FILE, store._size)
+            store._ivf.nprobe = store.nprobe
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "FlatVectorStore":
+        store = cls(embedding, persist_directory=persist_directory, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        if persist_directory:
+            store.persist()
+        return store
@@ -1,19 +1,32 @@
 """
 Generator Module
-Uses Groq LLM to generate responses based on retrieved context
+Uses the configured LLM (Groq by default) to generate responses based on retrieved context
 Falls back to general knowledge when no relevant documents found
 """
+import asyncio
 import time
+import weakref
+from contextlib import asynccontextmanager
 from pathlib import Path
-from langchain_groq import ChatGroq
+from typing import AsyncIterator, Iterator, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import Runnable
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.retrievers import BaseRetriever
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import GROQ_API_KEY, LLM_MODEL
+from config import LLM_MAX_CONCURRENCY, SINGLE_FLIGHT_ENABLED
+from src.backends import llm_backend
+from src.context_packer import pack_context
+from src.metrics import atime_stream, increment, observe, register_collector, stage, time_stream
+from src.answer_cache import AnswerCache, answer_key, get_answer_cache, normalize_question
+from src.rate_limit import AdaptiveRateLimiter, CircuitOpenError, classify_error, get_llm_limiter
+from src.retriever import is_keyword_query
+from src.semantic_cache import SemanticCache
+from src.single_flight import SingleFlight
+from src.snapshot import index_version
 
 
 # RAG Prompt Template - with fallback to general knowledge
@@ -33,26 +46,26 @@ User Question: {question}
 
 Answer:"""
 
+# Used when retrieval finds nothing relevant: no context, a much smaller prompt
+GENERAL_PROMPT = """You are a helpful AI assistant. Answer the user's question directly from your general knowledge. Be accurate, concise, and well-organized.
 
-def get_llm() -> ChatGroq:
-    """Get the configured LLM (Groq)."""
-    if not GROQ_API_KEY:
-        raise ValueError(
-            "❌ GROQ_API_KEY not found!\n"
-            "Please set your API key in the .env file:\n"
-            "GROQ_API_KEY=your_api_key_here\n"
-            "Get your key from: https://console.groq.com/keys"
-        )
-    
-    return ChatGroq(
-        model=LLM_MODEL,
-        api_key=GROQ_API_KEY,
-        temperature=0.3,
-    )
+User Question: {question}
+
+Answer:"""
+
+
+def get_llm() -> BaseChatModel:
+    """Get the configured LLM (see LLM_BACKEND)."""
+    return llm_backend().factory()
 
 
 def format_docs(docs) -> str:
-    """Format retrieved documents into a single context string."""
+    """Format retrieved documents into a single context string.
+    
+    Overlapping chunks are merged, duplicates dropped and the result capped
+    at CONTEXT_TOKEN_BUDGET (see `pack_context`).
+    """
+    docs = pack_context(docs)
     if not docs:
         return "No relevant documents found."
     
@@ -63,35 +76,277 @@ def format_docs(docs) -> str:
     return "\n\n---\n\n".join(formatted)
 
 
-def create_rag_chain(retriever: VectorStoreRetriever):
-    """Create the complete RAG chain."""
+_llm_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def llm_slot():
+    """Hold one of LLM_MAX_CONCURRENCY async LLM call slots.
+
+    Slots are shared by every coroutine on the running event loop (a web
+    server runs one), so bursts queue here instead of at the provider.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    async with semaphore:
+        yield
+
+
+class RAGChain(Runnable):
+    """Retrieve-then-generate chain with caching and token streaming.
+
+    When retrieval returns no chunks and a `general_chain` is set, the
+    question goes to it (GENERAL_PROMPT) instead of the RAG prompt.
+
+    `invoke` returns the whole answer; `stream` yields tokens as the LLM
+    produces them (cached answers arrive as a single chunk). The async
+    variants run cache lookups and retrieval in a worker thread and the LLM
+    call natively async under `llm_slot`, so the event loop never blocks.
+    LLM calls are admitted by `limiter` and report their outcome to it.
+    """
+
+    def __init__(
+        self,
+        retriever: BaseRetriever,
+        answer_chain: Runnable,
+        cache: Optional[SemanticCache] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        general_chain: Optional[Runnable] = None,
+    ):
+        self.retriever = retriever
+        self.answer_chain = answer_chain
+        self.general_chain = general_chain
+        self.cache = cache
+        self.answer_cache = answer_cache
+        self.limiter = limiter
+
+    def _prepare(self, question: str) -> dict:
+        """Run everything before generation: cache lookups and retrieval.
+
+        Returns a state dict with either "answer" (a cache hit) or the
+        "chain" to run with its "inputs", plus what is needed to cache the
+        result.
+        """
+        state = {"question": question, "vector": None, "key": None, "answer": None}
+        
+        # Keyword lookups are answered from BM25 without embedding the
+        # question, so they bypass the semantic cache
+        if self.cache is not None and not is_keyword_query(question):
+            state["vector"] = self.cache.embed(question)
+            hit = self.cache.lookup(state["vector"])
+            if hit is not None:
+                state["answer"] = hit.answer
+                return state
+        
+        with stage("retrieve") as timer:
+            docs = self.retriever.invoke(question)
+            timer.items = len(docs)
+        state["doc_ids"] = [doc.id for doc in docs]
+        general = not docs and self.general_chain is not None
+        
+        # Same question over the same chunks and prompt: reuse the answer
+        if self.answer_cache is not None:
+            template = GENERAL_PROMPT if general else RAG_PROMPT
+            state["key"] = answer_key(question, state["doc_ids"], template)
+            state["answer"] = self.answer_cache.get(state["key"])
+            if state["answer"] is not None:
+                self._remember(state, state["answer"], store_answer=False)
+                return state
+        
+        if general:
+            state["chain"] = self.general_chain
+            state["inputs"] = {"question": question}
+        else:
+            state["chain"] = self.answer_chain
+            with stage("prompt_build", items=len(docs)):
+                state["inputs"] = {"context": format_docs(docs), "question": question}
+        return state
+
+    def _remember(self, state: dict, response: str, store_answer: bool = True) -> None:
+        if store_answer and self.answer_cache is not None:
+            self.answer_cache.put(state["key"], response)
+        if state["vector"] is not None:
+            self.cache.store(state["vector"], state["question"], response, state["doc_ids"])
+
+    def _record_success(self) -> None:
+        if self.limiter is not None:
+            self.limiter.record_success()
+
+    def _record_failure(self, error: Exception) -> None:
+        if self.limiter is not None:
+            self.limiter.record_failure(error)
+
+    def invoke(self, question: str, config=None, **kwargs) -> str:
+        state = self._prepare(question)
+        if state["answer"] is not None:
+            return state["answer"]
+        
+        if self.limiter is not None:
+            self.limiter.acquire()
+        try:
+            with stage("llm"):
+                response = state["chain"].invoke(state["inputs"], config)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+        self._remember(state, response)
+        return response
+
+    def stream(self, question: str, config=None, **kwargs) -> Iterator[str]:
+        state = self._prepare(question)
+        if state["answer"] is not None:
+            yield state["answer"]
+            return
+        
+        if self.limiter is not None:
+            self.limiter.acquire()
+        tokens = []
+        start = time.perf_counter()
+        try:
+            with stage("llm") as timer:
+                for token in state["chain"].stream(state["inputs"], config):
+                    if not tokens:
+                        observe("llm_first_token", time.perf_counter() - start)
+                        self._record_success()
+                    tokens.append(token)
+                    timer.items += 1
+                    yield token
+        except Exception as e:
+            if not tokens:
+                self._record_failure(e)
+            raise
+        self._remember(state, "".join(tokens))
+
+    async def ainvoke(self, question: str, config=None, **kwargs) -> str:
+        state = await asyncio.to_thread(self._prepare, question)
+        if state["answer"] is not None:
+            return state["answer"]
+        
+        async with llm_slot():
+            if self.limiter is not None:
+                await self.limiter.aacquire()
+            try:
+                with stage("llm"):
+                    response = await state["chain"].ainvoke(state["inputs"], config)
+            except Exception as e:
+                self._record_failure(e)
+                raise
+        self._record_success()
+        await asyncio.to_thread(self._remember, state, response)
+        return response
+
+    async def astream(self, question: str, config=None, **kwargs) -> AsyncIterator[str]:
+        state = await asyncio.to_thread(self._prepare, question)
+        if state["answer"] is not None:
+            yield state["answer"]
+            return
+        
+        tokens = []
+        async with llm_slot():
+            if self.limiter is not None:
+                await self.limiter.aacquire()
+            start = time.perf_counter()
+            try:
+                with stage("llm") as timer:
+                    async for token in state["chain"].astream(state["inputs"], config):
+                        if not tokens:
+                            observe("llm_first_token", time.perf_counter() - start)
+                            self._record_success()
+                        tokens.append(token)
+                        timer.items += 1
+                        yield token
+            except Exception as e:
+                if not tokens:
+                    self._record_failure(e)
+                raise
+        await asyncio.to_thread(self._remember, state, "".join(tokens))
+
+
+def create_rag_chain(
+    retriever: BaseRetriever,
+    cache: Optional[SemanticCache] = None,
+    answer_cache: Optional[AnswerCache] = None,
+    limiter: Optional[AdaptiveRateLimiter] = None,
+) -> RAGChain:
+    """Create the complete RAG chain.
+    
+    Args:
+        retriever: Retriever for context chunks
+        cache: Semantic cache; near-duplicate questions skip retrieval and
+            the LLM call and get the cached answer
+        answer_cache: Exact answer cache consulted after retrieval (default:
+            the process-wide cache, if enabled)
+        limiter: Rate limiter and circuit breaker for LLM calls (default:
+            the process-wide limiter)
+    """
     prompt = ChatPromptTemplate.from_template(RAG_PROMPT)
+    general_prompt = ChatPromptTemplate.from_template(GENERAL_PROMPT)
     llm = get_llm()
+    if answer_cache is None:
+        answer_cache = get_answer_cache()
     
-    rag_chain = (
-        {
-            "context": retriever | format_docs,
-            "question": RunnablePassthrough()
-        }
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+    if limiter is None:
+        limiter = get_llm_limiter()
     
-    return rag_chain
+    return RAGChain(
+        retriever,
+        prompt | llm | StrOutputParser(),
+        cache,
+        answer_cache,
+        limiter,
+        general_chain=general_prompt | llm | StrOutputParser(),
+    )
 
 
-def query(chain, question: str, max_retries: int = 3) -> str:
-    """Execute a query with retry logic for transient failures.
+def _retry_delay(error: Exception, attempt: int, max_retries: int) -> float:
+    """Seconds to wait before retrying after `error` (raises if not retryable).
     
-    Args:
-        chain: The RAG chain to execute
-        question: The user's question
-        max_retries: Maximum number of retry attempts
-        
-    Returns:
-        The generated response
+    Backoff is exponential with jitter and honours the provider's
+    Retry-After; the shared limiter separately holds back other requests.
     """
+    if isinstance(error, CircuitOpenError):
+        raise error
+    
+    kind = classify_error(error)
+    if kind == "auth":
+        raise ValueError(
+            "❌ API authentication failed. Please check your GROQ_API_KEY."
+        ) from error
+    if kind == "fatal":
+        # Malformed request: retrying would fail the same way
+        raise error
+    if attempt >= max_retries - 1:
+        return 0.0
+    
+    increment("llm_retries")
+    wait_time = get_llm_limiter().retry_delay(error, attempt)
+    if kind == "rate_limit":
+        print(f"⚠️  Rate limited, waiting {wait_time:.1f}s before retry...")
+    return wait_time
+
+
+_flights = SingleFlight()
+
+
+def _flight_key(chain, question: str) -> str:
+    """Requests coalesce when they ask the same chain the same normalized
+    question against the same index version."""
+    return f"{id(chain)}\x1f{index_version()}\x1f{normalize_question(question)}"
+
+
+def single_flight_stats() -> dict:
+    """Executions started vs. requests that joined one already in flight."""
+    return _flights.stats()
+
+
+register_collector("single_flight", single_flight_stats, counters=("executions", "coalesced"))
+
+
+def _query(chain, question: str, max_retries: int) -> str:
     last_error = None
     
     for attempt in range(max_retries):
@@ -99,25 +354,133 @@ def query(chain, question: str, max_retries: int = 3) -> str:
             return chain.invoke(question)
         except Exception as e:
             last_error = e
-            error_str = str(e).lower()
-            
-            # Check for non-retryable errors
-            if "api_key" in error_str or "authentication" in error_str:
-                raise ValueError(
-                    "❌ API authentication failed. Please check your GROQ_API_KEY."
-                ) from e
-            
-            if "rate_limit" in error_str or "429" in str(e):
-                # Rate limited - wait longer before retry
-                wait_time = (attempt + 1) * 2
-                print(f"⚠️  Rate limited, waiting {wait_time}s before retry...")
-                time.sleep(wait_time)
-            elif attempt < max_retries - 1:
-                # Other transient errors - brief wait
-                time.sleep(0.5)
+            time.sleep(_retry_delay(e, attempt, max_retries))
     
     # All retries failed
     raise RuntimeError(
         f"❌ Query failed after {max_retries} attempts. Last error: {last_error}"
     )
 
+
+def _stream_query(chain, question: str, max_retries: int) -> Iterator[str]:
+    # Failures before the first token are retried; once tokens have been
+    # yielded a failure is raised, since the caller already showed them
+    last_error = None
+    
+    for attempt in range(max_retries):
+        started = False
+        try:
+            for token in chain.stream(question):
+                started = True
+                yield token
+            return
+        except Exception as e:
+            if started:
+                raise
+            last_error = e
+            time.sleep(_retry_delay(e, attempt, max_retries))
+    
+    # All retries failed
+    raise RuntimeError(
+        f"❌ Query failed after {max_retries} attempts. Last error: {last_error}"
+    )
+
+
+async def _aquery(chain, question: str, max_retries: int) -> str:
+    last_error = None
+    
+    for attempt in range(max_retries):
+        try:
+            return await chain.ainvoke(question)
+        except Exception as e:
+            last_error = e
+            await asyncio.sleep(_retry_delay(e, attempt, max_retries))
+    
+    # All retries failed
+    raise RuntimeError(
+        f"❌ Query failed after {max_retries} attempts. Last error: {last_error}"
+    )
+
+
+async def _astream_query(chain, question: str, max_retries: int) -> AsyncIterator[str]:
+    last_error = None
+    
+    for attempt in range(max_retries):
+        started = False
+        try:
+            async for token in chain.astream(question):
+                started = True
+                yield token
+            return
+        except Exception as e:
+            if started:
+                raise
+            last_error = e
+            await asyncio.sleep(_retry_delay(e, attempt, max_retries))
+    
+    # All retries failed
+    raise RuntimeError(
+        f"❌ Query failed after {max_retries} attempts. Last error: {last_error}"
+    )
+
+
+def query(chain, question: str, max_retries: int = 3) -> str:
+    """Execute a query with retry logic for transient failures.
+    
+    Concurrent identical questions share one execution (single-flight), so
+    a burst of the same question costs one retrieval and one LLM call.
+    
+    Args:
+        chain: The RAG chain to execute
+        question: The user's question
+        max_retries: Maximum number of retry attempts
+        
+    Returns:
+        The generated response
+    """
+    with stage("query"):
+        if not SINGLE_FLIGHT_ENABLED:
+            return _query(chain, question, max_retries)
+        return "".join(_flights.stream(
+            _flight_key(chain, question), lambda: iter([_query(chain, question, max_retries)])
+        ))
+
+
+def stream_query(chain, question: str, max_retries: int = 3) -> Iterator[str]:
+    """Stream the answer token by token, with the retry logic of `query`.
+    
+    Failures before the first token are retried; once tokens have been
+    yielded a failure is raised, since the caller already showed them.
+    Requests joining an identical in-flight question replay its tokens so
+    far, then follow it live.
+    
+    Yields:
+        Answer text chunks as the LLM produces them
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return time_stream("query", _stream_query(chain, question, max_retries))
+    return time_stream("query", _flights.stream(
+        _flight_key(chain, question), lambda: _stream_query(chain, question, max_retries)
+    ))
+
+
+async def aquery(chain, question: str, max_retries: int = 3) -> str:
+    """Async `query`: same retries, but backoff waits without blocking the loop."""
+    async def produce():
+        yield await _aquery(chain, question, max_retries)
+    
+    with stage("query"):
+        if not SINGLE_FLIGHT_ENABLED:
+            return await _aquery(chain, question, max_retries)
+        flight = _flights.astream(_flight_key(chain, question), produce)
+        return "".join([token async for token in flight])
+
+
+def astream_query(chain, question: str, max_retries: int = 3) -> AsyncIterator[str]:
+    """Async `stream_query`: failures before the first token are retried with
+    non-blocking backoff."""
+    if not SINGLE_FLIGHT_ENABLED:
+        return atime_stream("query", _astream_query(chain, question, max_retries))
+    return atime_stream("query", _flights.astream(
+        _flight_key(chain, question), lambda: _astream_query(chain, question, max_retries)
+    ))
@@ -0,0 +1,395 @@
+"""
+Indexer Module
+Incremental, streaming indexing driven by a per-file content manifest
+"""
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    MANIFEST_PATH,
+    CHECKPOINT_INTERVAL_SECONDS,
+    INDEX_LOCK_PATH,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_SEPARATORS,
+    TEXT_SPLITTER,
+    VECTOR_STORE_BACKEND,
+)
+from src.document_loader import (
+    find_supported_files,
+    iter_loaded_files,
+    load_from_urls,
+)
+from src.backends import embedding_backend
+from src.embeddings import report_cache_stats
+from src.pipeline import IndexingPipeline
+from src.snapshot import read_snapshot_header, write_snapshot
+from src.vector_store import (
+    clear_vector_store,
+    open_vector_store,
+    delete_chunks,
+    persist_vector_store,
+)
+
+
+MANIFEST_VERSION = 1
+
+
+def compute_file_hash(file_path: Path, block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a file's full content."""
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def compute_text_hash(text: str) -> str:
+    """Compute the SHA-256 of a text (used for web pages)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def generate_chunk_id(source: str, content_hash: str, index: int) -> str:
+    """Generate a stable chunk ID from its source, source content and position."""
+    combined = f"{source}:{content_hash}:{index}"
+    return hashlib.md5(combined.encode()).hexdigest()
+
+
+def config_fingerprint() -> str:
+    """Hash of the settings that determine chunk boundaries, chunk metadata and vectors."""
+    settings = {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "separators": CHUNK_SEPARATORS,
+        # Same chunks, but only the fast splitter records end_index/whitespace_after
+        "text_splitter": TEXT_SPLITTER,
+        "embedding_model": embedding_backend().model_name,
+        "backend": VECTOR_STORE_BACKEND,
+    }
+    return compute_text_hash(json.dumps(settings, sort_keys=True))
+
+
+def corpus_fingerprint(manifest: dict) -> str:
+    """Hash of the indexing config plus every indexed source and its content hash."""
+    sources = sorted((key, entry["sha256"]) for key, entry in manifest["files"].items())
+    return compute_text_hash(json.dumps([manifest["config"], sources]))
+
+
+def new_manifest() -> dict:
+    """Return an empty manifest for the current indexing config.
+
+    Besides "files", a manifest written mid-run carries a "run" marker and
+    "partial": chunk IDs already committed for sources not yet finished.
+    A completed run also records the corpus "fingerprint".
+    """
+    return {
+        "version": MANIFEST_VERSION,
+        "config": config_fingerprint(),
+        "files": {},
+        "partial": {},
+    }
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Optional[dict]:
+    """Load the indexing manifest, or None if missing or unreadable."""
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Warning: Could not read manifest: {e}")
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        print("⚠️  Manifest version mismatch, ignoring it")
+        return None
+    return manifest
+
+
+def save_manifest(manifest: dict, path: Path = MANIFEST_PATH) -> None:
+    """Atomically write the indexing manifest."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def plan_file_changes(files: List[Path], manifest: dict) -> Dict[str, list]:
+    """Compare files on disk against the manifest.
+
+    Size and mtime are checked first; the content hash is only computed when
+    they differ, so a touched-but-identical file is not re-embedded.
+
+    Returns:
+        dict with "changed" (list of (path, stat, hash)), "unchanged"
+        (list of paths) and "removed" (list of manifest keys)
+    """
+    entries = manifest["files"]
+    changed, unchanged = [], []
+    seen = set()
+
+    for file_path in files:
+        key = str(file_path)
+        seen.add(key)
+        stat = file_path.stat()
+        entry = entries.get(key)
+
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            unchanged.append(file_path)
+            continue
+
+        file_hash = compute_file_hash(file_path)
+        if entry and entry["sha256"] == file_hash:
+            # Content identical, only the timestamp moved
+            entry["size"] = stat.st_size
+            entry["mtime"] = stat.st_mtime
+            unchanged.append(file_path)
+            continue
+
+        changed.append((file_path, stat, file_hash))
+
+    removed = [
+        key for key, entry in entries.items()
+        if entry.get("kind", "file") == "file" and key not in seen
+    ]
+    return {"changed": changed, "unchanged": unchanged, "removed": removed}
+
+
+def index_sources(
+    directory: Optional[Path],
+    urls: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    rebuild: bool = False,
+    resume: bool = False,
+) -> bool:
+    """Bring the vector store in line with a directory (and optional URLs).
+
+    Only new or changed sources are loaded, split and embedded, streaming
+    through the bounded indexing pipeline; chunks of changed and removed
+    sources are deleted by ID once their replacements are written. With
+    `rebuild` (or without a manifest, since the store's contents cannot be
+    attributed) the store is cleared and everything is indexed.
+
+    Progress is checkpointed to the manifest every CHECKPOINT_INTERVAL_SECONDS,
+    so `resume` continues an interrupted run: finished sources are skipped and
+    chunks committed from unfinished ones are not embedded again.
+
+    Returns:
+        bool: True if the store was updated, False if there was nothing to index
+    """
+    manifest = None if rebuild else load_manifest()
+    if manifest is not None and manifest.get("config") != config_fingerprint():
+        # Every chunk or vector would differ, so nothing can be reused
+        print("⚙️  Indexing settings changed since the last run, rebuilding the index")
+        manifest = None
+        rebuild = True
+    if resume:
+        if manifest is not None and manifest.get("run"):
+            started = manifest["run"]["started_at"]
+            print(f"⏯️  Resuming indexing run started at {started}")
+        else:
+            print("ℹ️  No interrupted indexing run found, running an incremental update")
+
+    if manifest is None:
+        if not rebuild:
+            print("📋 No manifest found, rebuilding the index from scratch")
+        clear_vector_store()
+        manifest = new_manifest()
+
+    entries = manifest["files"]
+    partial = manifest.setdefault("partial", {})
+    files = find_supported_files(directory) if directory else []
+    if not files and not urls and not entries:
+        return False
+
+    plan = plan_file_changes(files, manifest)
+    new_count = sum(1 for path, _, _ in plan["changed"] if str(path) not in entries)
+    print(
+        f"📋 Manifest: {new_count} new, {len(plan['changed']) - new_count} changed, "
+        f"{len(plan['removed'])} removed, {len(plan['unchanged'])} unchanged"
+    )
+
+    vector_store = open_vector_store()
+
+    # Drop chunks of removed files
+    for key in plan["removed"]:
+        delete_chunks(vector_store, entries.pop(key)["chunk_ids"])
+        partial.pop(key, None)
+
+    # Chunk IDs hash the source content, so committed IDs of a file that has
+    # changed since the interruption simply never match again
+    skip_ids = {chunk_id for ids in partial.values() for chunk_id in ids}
+
+    manifest["run"] = manifest.get("run") or {"started_at": datetime.now().isoformat()}
+    save_manifest(manifest)
+
+    changed = {str(path): (stat, file_hash) for path, stat, file_hash in plan["changed"]}
+    web_hashes = {}
+    last_checkpoint = time.monotonic()
+
+    def iter_sources():
+        changed_files = [path for path, _, _ in plan["changed"]]
+        for file_path, docs, error in iter_loaded_files(changed_files, workers=workers):
+            if error:
+                # Keep the previous chunks (if any) until the file loads cleanly
+                print(f"❌ Error loading {file_path.name}: {error}")
+                continue
+            yield str(file_path), changed[str(file_path)][1], docs
+
+        # Web pages have no cheap change signal, so they are fetched and hashed
+        for doc in load_from_urls(urls or []):
+            url = doc.metadata["source"]
+            page_hash = compute_text_hash(doc.page_content)
+            old_entry = entries.get(url)
+            if old_entry and old_entry["sha256"] == page_hash:
+                continue
+            web_hashes[url] = page_hash
+            yield url, page_hash, [doc]
+
+    def checkpoint(force: bool = False) -> None:
+        nonlocal last_checkpoint
+        if force or time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL_SECONDS:
+            # The store goes first so the manifest never claims unsaved chunks
+            persist_vector_store(vector_store)
+            save_manifest(manifest)
+            last_checkpoint = time.monotonic()
+
+    def on_batch_done(pairs: List[tuple]) -> None:
+        for key, chunk_id in pairs:
+            partial.setdefault(key, []).append(chunk_id)
+        checkpoint()
+
+    def on_source_done(key: str, ids: List[str]) -> None:
+        old_entry = entries.get(key)
+        if old_entry:
+            stale = set(old_entry["chunk_ids"]) - set(ids)
+            delete_chunks(vector_store, sorted(stale))
+
+        if key in changed:
+            stat, file_hash = changed[key]
+            entries[key] = {
+                "kind": "file",
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "sha256": file_hash,
+                "chunk_ids": ids,
+            }
+        else:
+            entries[key] = {"kind": "url", "sha256": web_hashes[key], "chunk_ids": ids}
+        partial.pop(key, None)
+
+    pipeline = IndexingPipeline(vector_store, chunk_id_fn=generate_chunk_id)
+    try:
+        stats = pipeline.run(
+            iter_sources(), on_source_done, on_batch_done=on_batch_done, skip_ids=skip_ids
+        )
+    except BaseException:
+        checkpoint(force=True)
+        print("💾 Progress checkpointed; continue with: python main.py --index --resume")
+        raise
+
+    # Leftover partial chunks belong to files that changed or failed to load
+    # since the interrupted run, and are no longer referenced
+    committed = {chunk_id for entry in entries.values() for chunk_id in entry["chunk_ids"]}
+    orphans = {chunk_id for ids in partial.values() for chunk_id in ids} - committed
+    delete_chunks(vector_store, sorted(orphans))
+    partial.clear()
+    manifest.pop("run", None)
+    manifest["fingerprint"] = corpus_fingerprint(manifest)
+
+    # A no-op run leaves the store as the current snapshot has it; rewriting
+    # the snapshot would also clear the semantic cache for nothing
+    header = read_snapshot_header()
+    if (
+        not plan["removed"] and not orphans and stats["sources"] == 0
+        and header is not None and header.get("fingerprint") == manifest["fingerprint"]
+    ):
+        save_manifest(manifest)
+        print("📸 No changes, keeping the current index snapshot")
+    else:
+        persist_vector_store(vector_store)
+        save_manifest(manifest)
+        write_snapshot(vector_store, header={"fingerprint": manifest["fingerprint"]})
+    report_cache_stats(vector_store.embeddings)
+
+    total = sum(len(entry["chunk_ids"]) for entry in entries.values())
+    rate = stats["chunks"] / stats["seconds"] if stats["seconds"] else 0.0
+    if stats["skipped"]:
+        print(f"⏭️  Skipped {stats['skipped']} chunk(s) committed before the interruption")
+    print(
+        f"✅ Embedded {stats['chunks']} chunk(s) from {stats['sources']} source(s) "
+        f"in {stats['seconds']:.1f}s ({rate:.0f} chunks/s); index holds {total} chunk(s)"
+    )
+    return True
+
+
+def index_is_current(directory: Path) -> bool:
+    """Check, without opening the vector store, that the index and its snapshot
+    match the files in `directory` and the current indexing config.
+
+    Only files whose size or mtime moved are hashed.
+    """
+    manifest = load_manifest()
+    if manifest is None or manifest.get("run") or manifest.get("config") != config_fingerprint():
+        return False
+
+    plan = plan_file_changes(find_supported_files(directory), manifest)
+    if plan["changed"] or plan["removed"]:
+        return False
+
+    header = read_snapshot_header()
+    return header is not None and header.get("fingerprint") == manifest.get("fingerprint")
+
+
+@contextmanager
+def index_lock(path: Path = INDEX_LOCK_PATH):
+    """Hold an exclusive lock on `path` across processes (blocks until free)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def ensure_index(directory: Path, workers: Optional[int] = None) -> bool:
+    """Reuse the persisted index when its fingerprint matches, else update it.
+
+    Startup path for the web apps: an unchanged corpus costs a manifest read
+    and a stat per file; otherwise only new or changed files are embedded
+    (everything, if the indexing config changed). Server workers starting
+    together share one manifest, store and snapshot, so only one of them
+    updates the index at a time; the others reuse its result.
+
+    Returns:
+        bool: True if an index (and its snapshot) is ready to serve
+    """
+    if index_is_current(directory):
+        print("✅ Index matches the corpus fingerprint, reusing it")
+        return True
+    with index_lock():
+        # Another worker may have rebuilt it while we waited
+        if index_is_current(directory):
+            print("✅ Index was updated by another process, reusing it")
+            return True
+        return index_sources(directory, workers=workers)
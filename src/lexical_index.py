@@ -0,0 +1,177 @@
+"""
+Lexical Index Module
+BM25 inverted index over chunk texts, stored as flat (mmap-able) arrays
+"""
+import hashlib
+import json
+import re
+from array import array
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import BM25_K1, BM25_B
+from src.flat_index import top_k
+
+
+BM25_PARAMS_FILE = "bm25.json"
+BM25_TERMS_FILE = "bm25_terms.npy"
+BM25_OFFSETS_FILE = "bm25_offsets.npy"
+BM25_ROWS_FILE = "bm25_rows.npy"
+BM25_TFS_FILE = "bm25_tfs.npy"
+BM25_DOC_LEN_FILE = "bm25_doc_len.npy"
+
+# Words, identifiers (ERR_CONN_RESET, v2) and single CJK characters
+_TOKEN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]|[^\W\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; CJK text is split per character."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def term_hash(term: str) -> int:
+    """Stable 64-bit term key, so the vocabulary is a sorted uint64 array."""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class BM25Builder:
+    """Accumulates postings row by row; rows are the order texts are added."""
+
+    def __init__(self):
+        self._term_ids: dict = {}
+        self._post_terms = array("i")
+        self._post_rows = array("i")
+        self._post_tfs = array("f")
+        self._doc_len = array("f")
+
+    def add(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            row = len(self._doc_len)
+            counts: dict = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                self._post_terms.append(self._term_ids.setdefault(term, len(self._term_ids)))
+                self._post_rows.append(row)
+                self._post_tfs.append(tf)
+            self._doc_len.append(sum(counts.values()))
+
+    def build(self, k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        """Group postings by term (CSR layout), terms ordered by hash."""
+        hashes = np.fromiter(
+            (term_hash(term) for term in self._term_ids), dtype=np.uint64, count=len(self._term_ids)
+        )
+        order = np.argsort(hashes, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.shape[0])
+
+        post_terms = rank[np.frombuffer(self._post_terms, dtype=np.int32)]
+        # Stable, so rows stay ascending within each term
+        by_term = np.argsort(post_terms, kind="stable")
+        return BM25Index(
+            terms=hashes[order],
+            offsets=np.searchsorted(post_terms[by_term], np.arange(order.shape[0] + 1)).astype(np.int64),
+            rows=np.frombuffer(self._post_rows, dtype=np.int32)[by_term],
+            tfs=np.frombuffer(self._post_tfs, dtype=np.float32)[by_term],
+            doc_len=np.frombuffer(self._doc_len, dtype=np.float32).copy(),
+            k1=k1,
+            b=b,
+        )
+
+
+class BM25Index:
+    """Okapi BM25 over a CSR inverted index.
+
+    A query only touches the postings of its own terms, so search cost is
+    proportional to how common those terms are, not to the corpus size.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        avgdl: Optional[float] = None,
+    ):
+        self.terms = terms
+        self.offsets = offsets
+        self.rows = rows
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.n_docs = doc_len.shape[0]
+        if avgdl is None:
+            avgdl = float(doc_len.mean()) if self.n_docs else 0.0
+        self.avgdl = avgdl
+
+    def _term_slots(self, query: str) -> List[int]:
+        slots = []
+        for term in set(tokenize(query)):
+            key = np.uint64(term_hash(term))
+            slot = int(np.searchsorted(self.terms, key))
+            if slot < self.terms.shape[0] and self.terms[slot] == key:
+                slots.append(slot)
+        return slots
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k rows by BM25 score, best first.
+
+        Returns:
+            (rows, scores); empty when no query term occurs in the corpus
+        """
+        slots = self._term_slots(query)
+        if not slots or self.avgdl == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        hit_rows, contributions = [], []
+        for slot in slots:
+            start, end = self.offsets[slot], self.offsets[slot + 1]
+            rows = self.rows[start:end]
+            tfs = self.tfs[start:end]
+            df = end - start
+            idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[rows] / self.avgdl)
+            hit_rows.append(rows)
+            contributions.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+
+        unique_rows, inverse = np.unique(np.concatenate(hit_rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions)).astype(np.float32)
+        best = top_k(scores, k)
+        return unique_rows[best].astype(np.int64), scores[best]
+
+    def save(self, directory: Path) -> None:
+        directory = Path(directory)
+        np.save(directory / BM25_TERMS_FILE, self.terms)
+        np.save(directory / BM25_OFFSETS_FILE, self.offsets)
+        np.save(directory / BM25_ROWS_FILE, self.rows)
+        np.save(directory / BM25_TFS_FILE, self.tfs)
+        np.save(directory / BM25_DOC_LEN_FILE, self.doc_len)
+        with open(directory / BM25_PARAMS_FILE, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "avgdl": self.avgdl}, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = "r") -> Optional["BM25Index"]:
+        """Load an index written by `save`, or None if there is none."""
+        directory = Path(directory)
+        if not (directory / BM25_PARAMS_FILE).exists():
+            return None
+        with open(directory / BM25_PARAMS_FILE, "r", encoding="utf-8") as f:
+            params = json.load(f)
+        return cls(
+            terms=np.load(directory / BM25_TERMS_FILE, mmap_mode=mmap_mode),
+            offsets=np.load(directory / BM25_OFFSETS_FILE, mmap_mode=mmap_mode),
+            rows=np.load(directory / BM25_ROWS_FILE, mmap_mode=mmap_mode),
+            tfs=np.load(directory / BM25_TFS_FILE, mmap_mode=mmap_mode),
+            doc_len=np.load(directory / BM25_DOC_LEN_FILE, mmap_mode=mmap_mode),
+            k1=params["k1"],
+            b=params["b"],
+            avgdl=params["avgdl"],
+        )
@@ -0,0 +1,157 @@
+"""
+Local Models Module
+Offline embedding and LLM backends: feature-hashed bag-of-words vectors and
+an extractive answerer that quotes the retrieved context
+"""
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Optional
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import LOCAL_EMBEDDING_DIM, LOCAL_LLM_MAX_SENTENCES
+from src.lexical_index import term_hash, tokenize
+
+
+_SIGN_BIT = 1 << 63
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_DOCUMENT_RE = re.compile(r"\[Document \d+\] Source: (.*)\n")
+# Question words that say nothing about which sentence answers it
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "should tell the this to what when where which who why with you your".split()
+)
+
+
+class HashingEmbeddings(Embeddings):
+    """Feature-hashed, sublinear-TF vectors of word unigrams and bigrams.
+
+    Each feature lands in one of `dim` buckets with a hash-derived sign, so
+    collisions cancel out on average. Vectors are L2-normalized. There is no
+    IDF term: stored vectors must not depend on the rest of the corpus
+    (BM25 in hybrid retrieval supplies term rarity instead).
+    """
+
+    def __init__(self, dim: int = LOCAL_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = tokenize(text)
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        for feature, tf in features.items():
+            h = term_hash(feature)
+            weight = 1.0 + math.log(tf)
+            vector[h % self.dim] += -weight if h & _SIGN_BIT else weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text).tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+def _section(prompt: str, start: str, end: str) -> str:
+    """Text between the `start` and `end` markers of a prompt ("" if absent)."""
+    begin = prompt.find(start)
+    if begin < 0:
+        return ""
+    begin += len(start)
+    stop = prompt.find(end, begin)
+    return prompt[begin:stop if stop >= 0 else len(prompt)].strip()
+
+
+class ExtractiveChatModel(BaseChatModel):
+    """Answers by quoting the context sentences that best match the question.
+
+    Reads the "Context from documents:" and "User Question:" sections of the
+    RAG prompt and returns up to `max_sentences` sentences, ranked by the
+    question terms they contain (rarer terms weigh more), with their
+    sources. Without context it says so. No network, deterministic,
+    streamed word by word.
+    """
+
+    max_sentences: int = LOCAL_LLM_MAX_SENTENCES
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-extractive"
+
+    def answer(self, prompt: str) -> str:
+        question = _section(prompt, "User Question:", "\n\nAnswer:") or prompt.strip()
+        context = _section(prompt, "Context from documents:", "\n\nUser Question:")
+        terms = set(tokenize(question)) - _STOPWORDS
+
+        sentences = []
+        for passage in context.split("\n\n---\n\n") if context else []:
+            match = _DOCUMENT_RE.match(passage)
+            source = match.group(1) if match else "Unknown"
+            body = passage[match.end():] if match else passage
+            for sentence in _SENTENCE_RE.split(body):
+                sentence = sentence.replace("**", "").strip(" \t#-*")
+                if sentence:
+                    sentences.append((sentence, source, terms.intersection(tokenize(sentence))))
+
+        # Rarer question terms (across the context's sentences) weigh more
+        df = Counter(term for _, _, found in sentences for term in found)
+        candidates = []
+        for i, (sentence, source, found) in enumerate(sentences):
+            score = sum(math.log(1 + len(sentences) / df[term]) for term in found)
+            if score:
+                candidates.append((-score, i, sentence, source))
+
+        if not candidates:
+            return f"No matching passages were found for: {question}"
+
+        best = sorted(candidates)[:self.max_sentences]
+        sources = list(dict.fromkeys(source for _, _, _, source in best))
+        lines = [f"According to the documents ({', '.join(sources)}):"]
+        lines += [f"- {sentence}" for _, _, sentence, _ in best]
+        return "\n".join(lines)
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        return re.findall(r"\S+\s*", self.answer(messages[-1].content))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content = "".join(self._tokens(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for token in self._tokens(messages):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for token in self._tokens(messages):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
@@ -0,0 +1,445 @@
+"""
+Metrics Module
+Per-stage wall time, item counts and errors for indexing and queries, with
+latency histograms, a Prometheus text endpoint and a persisted report
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import METRICS_ENABLED, METRICS_PATH, METRICS_PORT
+
+
+# Latency bucket upper bounds: 0.5 ms to ~7 min, 25% apart, so interpolated
+# percentiles are within a few percent
+BUCKETS = tuple(0.0005 * 1.25 ** i for i in range(62))
+
+# Display order of known stages in reports (others follow alphabetically)
+STAGE_ORDER = (
+    "load", "split", "embed", "upsert", "embed_upsert",
+    "query", "retrieve", "query_embed", "search", "lexical_search",
+    "prompt_build", "llm", "llm_first_token",
+)
+
+
+class Histogram:
+    """Bucketed latency distribution (Prometheus-style cumulative on export)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def percentile(self, q: float) -> float:
+        """Latency at quantile `q`, interpolated linearly inside its bucket."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= target:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (target - cumulative) / n
+            cumulative += n
+        return BUCKETS[-1]
+
+
+class StageStats:
+    """Latency histogram plus item and error counts of one stage."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.items = 0
+        self.errors = 0
+
+    def merge(self, other: "StageStats") -> None:
+        self.latency.merge(other.latency)
+        self.items += other.items
+        self.errors += other.errors
+
+
+class _Timer:
+    """Handed out by `Metrics.stage`; set `items` once the count is known."""
+
+    def __init__(self, items: int):
+        self.items = items
+
+
+class Metrics:
+    """Thread-safe registry of stage statistics and plain counters.
+
+    Every update goes to the live totals (served by the metrics endpoint)
+    and to a pending set that `flush` adds to the shared SQLite file, so
+    totals accumulate across CLI runs and server processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, float] = {}
+        self._pending_stages: Dict[str, StageStats] = {}
+        self._pending_counters: Dict[str, float] = {}
+        # Component state read on demand (see `register_collector`)
+        self.gauges: Dict[str, float] = {}
+        self._collectors: Dict[str, tuple] = {}
+        self._collected: Dict[str, float] = {}
+        # Told when a stage is entered and left in a thread (see src/profiler.py)
+        self.profiler = None
+
+    def observe(self, name: str, seconds: float, items: int = 0, error: bool = False) -> None:
+        """Record one execution of stage `name`."""
+        with self._lock:
+            for stages in (self.stages, self._pending_stages):
+                stats = stages.get(name)
+                if stats is None:
+                    stats = stages[name] = StageStats()
+                stats.latency.observe(seconds)
+                stats.items += items
+                stats.errors += error
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            for counters in (self.counters, self._pending_counters):
+                counters[name] = counters.get(name, 0) + amount
+
+    def register_collector(
+        self, name: str, collect: Callable[[], Dict[str, float]], counters: Iterable[str] = ()
+    ) -> None:
+        """Export a component's `collect()` values as `<name>_<key>` metrics.
+
+        Keys in `counters` are running totals: their growth since the last
+        collection is added to the counter of that name, so it is persisted
+        like any other counter. Other keys are gauges of this process only.
+        Registering a name again replaces the previous component.
+        """
+        with self._lock:
+            self._collectors[name] = (collect, frozenset(counters))
+            for key in [key for key in self._collected if key.startswith(f"{name}_")]:
+                # The new component counts from zero
+                self._collected[key] = 0
+
+    def collect(self) -> None:
+        """Read every registered component into `gauges` and `counters`."""
+        with self._lock:
+            collectors = dict(self._collectors)
+        for name, (collect, counter_keys) in collectors.items():
+            values = collect()
+            with self._lock:
+                for key, value in values.items():
+                    if value is None:
+                        continue
+                    metric = f"{name}_{key}"
+                    if key not in counter_keys:
+                        self.gauges[metric] = float(value)
+                        continue
+                    delta = value - self._collected.get(metric, 0)
+                    self._collected[metric] = value
+                    if delta > 0:
+                        for counters in (self.counters, self._pending_counters):
+                            counters[metric] = counters.get(metric, 0) + delta
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[_Timer]:
+        """Time the enclosed block as one execution of `name`; exceptions
+        count as errors and are re-raised."""
+        timer = _Timer(items)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enter(name)
+        start = time.perf_counter()
+        error = False
+        try:
+            yield timer
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, timer.items, error)
+            if profiler is not None:
+                profiler.exit(name)
+
+    def time_each(
+        self, name: str, iterable: Iterable, items: Callable[[object], int] = None
+    ) -> Iterator:
+        """Yield from `iterable`, timing how long each item takes to produce."""
+        iterator = iter(iterable)
+        while True:
+            profiler = self.profiler
+            if profiler is not None:
+                profiler.enter(name)
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            except Exception:
+                self.observe(name, time.perf_counter() - start, error=True)
+                raise
+            finally:
+                if profiler is not None:
+                    profiler.exit(name)
+            self.observe(name, time.perf_counter() - start, items(item) if items else 1)
+            yield item
+
+    def time_stream(self, name: str, iterator: Iterable) -> Iterator:
+        """Yield from `iterator`, timing the whole stream as one execution."""
+        with self.stage(name) as timer:
+            for item in iterator:
+                timer.items += 1
+                yield item
+
+    async def atime_stream(self, name: str, iterator: AsyncIterator) -> AsyncIterator:
+        """Async `time_stream`."""
+        with self.stage(name) as timer:
+            async for item in iterator:
+                timer.items += 1
+                yield item
+
+    def flush(self, path: Path = METRICS_PATH) -> None:
+        """Add pending updates to the totals stored at `path`."""
+        self.collect()
+        with self._lock:
+            stages, self._pending_stages = self._pending_stages, {}
+            counters, self._pending_counters = self._pending_counters, {}
+        if not stages and not counters:
+            return
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = _connect(path)
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                stored_stages, stored_counters = _read(conn)
+                for name, stats in stages.items():
+                    stored_stages.setdefault(name, StageStats()).merge(stats)
+                for name, value in counters.items():
+                    stored_counters[name] = stored_counters.get(name, 0) + value
+                conn.executemany(
+                    "INSERT OR REPLACE INTO stages (name, items, errors, sum, buckets) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (name, s.items, s.errors, s.latency.sum, json.dumps(s.latency.counts))
+                        for name, s in stored_stages.items()
+                        if name in stages
+                    ],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO counters (name, value) VALUES (?, ?)",
+                    [(name, stored_counters[name]) for name in counters],
+                )
+        finally:
+            conn.close()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS stages ("
+        " name TEXT PRIMARY KEY, items INTEGER, errors INTEGER, sum REAL, buckets TEXT)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL)")
+    return conn
+
+
+def _read(conn: sqlite3.Connection):
+    stages: Dict[str, StageStats] = {}
+    for name, items, errors, total, buckets in conn.execute(
+        "SELECT name, items, errors, sum, buckets FROM stages"
+    ):
+        stats = stages[name] = StageStats()
+        stats.items, stats.errors = items, errors
+        stats.latency.counts = json.loads(buckets)
+        stats.latency.count = sum(stats.latency.counts)
+        stats.latency.sum = total
+    counters = dict(conn.execute("SELECT name, value FROM counters"))
+    return stages, counters
+
+
+metrics = Metrics()
+
+stage = metrics.stage
+observe = metrics.observe
+increment = metrics.increment
+register_collector = metrics.register_collector
+time_each = metrics.time_each
+time_stream = metrics.time_stream
+atime_stream = metrics.atime_stream
+
+
+def _flush_at_exit() -> None:
+    try:
+        metrics.flush()
+    except Exception as e:
+        print(f"⚠️  Could not save metrics: {e}")
+
+
+if METRICS_ENABLED:
+    atexit.register(_flush_at_exit)
+
+
+def load_persisted(path: Path = METRICS_PATH) -> Metrics:
+    """Totals saved by every process so far, plus this one's pending updates."""
+    metrics.flush(path)
+    loaded = Metrics()
+    if Path(path).exists():
+        conn = _connect(path)
+        try:
+            loaded.stages, loaded.counters = _read(conn)
+        finally:
+            conn.close()
+    return loaded
+
+
+def _ordered(stages: Dict[str, StageStats]) -> List[str]:
+    known = [name for name in STAGE_ORDER if name in stages]
+    return known + sorted(name for name in stages if name not in STAGE_ORDER)
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def render_prometheus(registry: Optional[Metrics] = None) -> str:
+    """Prometheus text exposition of a registry (default: this process)."""
+    registry = registry or metrics
+    registry.collect()
+    with registry._lock:
+        stages = {name: registry.stages[name] for name in _ordered(registry.stages)}
+        counters = dict(registry.counters)
+        gauges = dict(registry.gauges)
+
+    lines = [
+        "# HELP rag_stage_seconds Wall time of one execution of a pipeline stage",
+        "# TYPE rag_stage_seconds histogram",
+    ]
+    for name, stats in stages.items():
+        cumulative = 0
+        for bound, n in zip(BUCKETS, stats.latency.counts):
+            cumulative += n
+            lines.append(f"rag_stage_seconds_bucket{_labels(stage=name, le=f'{bound:.6g}')} {cumulative}")
+        lines.append(f"rag_stage_seconds_bucket{_labels(stage=name, le='+Inf')} {stats.latency.count}")
+        lines.append(f"rag_stage_seconds_sum{_labels(stage=name)} {stats.latency.sum:.6f}")
+        lines.append(f"rag_stage_seconds_count{_labels(stage=name)} {stats.latency.count}")
+
+    lines += [
+        "# HELP rag_stage_latency_seconds Stage latency percentiles",
+        "# TYPE rag_stage_latency_seconds gauge",
+    ]
+    for name, stats in stages.items():
+        for q in (0.5, 0.95, 0.99):
+            value = stats.latency.percentile(q)
+            lines.append(f"rag_stage_latency_seconds{_labels(stage=name, quantile=q)} {value:.6f}")
+
+    for metric, attr, help_text in (
+        ("rag_stage_items_total", "items", "Items processed by a stage (documents, chunks, tokens)"),
+        ("rag_stage_errors_total", "errors", "Stage executions that raised"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for name, stats in stages.items():
+            lines.append(f"{metric}{_labels(stage=name)} {getattr(stats, attr)}")
+
+    for name in sorted(counters):
+        lines += [f"# TYPE rag_{name}_total counter", f"rag_{name}_total {counters[name]:g}"]
+    for name in sorted(gauges):
+        lines += [f"# TYPE rag_{name} gauge", f"rag_{name} {gauges[name]:g}"]
+    return "\n".join(lines) + "\n"
+
+
+def _format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def report_stats(registry: Optional[Metrics] = None) -> None:
+    """Print a per-stage table: calls, items, errors, p50/p95/p99 and throughput."""
+    registry = registry or metrics
+    if not registry.stages and not registry.counters:
+        print("📊 No metrics recorded yet")
+        return
+
+    print(
+        f"{'stage':<16} {'calls':>7} {'items':>9} {'errors':>6} "
+        f"{'p50':>9} {'p95':>9} {'p99':>9} {'items/s':>9}"
+    )
+    for name in _ordered(registry.stages):
+        stats = registry.stages[name]
+        latency = stats.latency
+        rate = f"{stats.items / latency.sum:.0f}" if latency.sum > 0 and stats.items else "-"
+        print(
+            f"{name:<16} {latency.count:>7} {stats.items:>9} {stats.errors:>6} "
+            f"{_format_seconds(latency.percentile(0.5)):>9} "
+            f"{_format_seconds(latency.percentile(0.95)):>9} "
+            f"{_format_seconds(latency.percentile(0.99)):>9} {rate:>9}"
+        )
+    for name in sorted(registry.counters):
+        print(f"🔢 {name}: {registry.counters[name]:g}")
+    # Hit rates of the caches registered with `register_collector`
+    for name in sorted(registry.counters):
+        prefix = name[:-len("hits")]
+        if name.endswith("_hits") and prefix + "misses" in registry.counters:
+            hits, misses = registry.counters[name], registry.counters[prefix + "misses"]
+            if hits + misses:
+                print(f"🎯 {prefix}hit_rate: {hits / (hits + misses):.1%}")
+    for name in sorted(registry.gauges):
+        print(f"📟 {name}: {registry.gauges[name]:g}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """Serve this process's metrics at http://0.0.0.0:<port>/metrics.
+
+    Does nothing when `port` is 0 or a server is already running. A port
+    that is taken (say, by another worker) only costs the endpoint: a
+    warning is printed and None returned.
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                print(f"⚠️  Metrics endpoint not started on port {port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+            print(f"📈 Metrics at http://localhost:{port}/metrics")
+        return _server
@@ -0,0 +1,195 @@
+"""
+Indexing Pipeline Module
+Streams sources through split → embed → upsert in bounded batches
+"""
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from langchain_core.documents import Document
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import PIPELINE_BATCH_SIZE, PIPELINE_MAX_INFLIGHT_CHUNKS
+from src.metrics import stage, time_each
+from src.text_splitter import create_text_splitter
+from src.vector_store import upsert_embedded_chunks
+
+
+# A loaded source: (source key, content hash, documents)
+Source = Tuple[str, str, List[Document]]
+
+
+class _Batch:
+    """Chunks travelling together through the embed and upsert stages."""
+
+    def __init__(self):
+        self.chunks: List[Document] = []
+        self.ids: List[str] = []
+        self.keys: List[str] = []
+        self.vectors: List[List[float]] = []
+        # Sources whose last chunk is in this batch, with all their chunk IDs
+        self.completed: List[Tuple[str, List[str]]] = []
+
+
+class IndexingPipeline:
+    """Bounded-memory indexing: split, embed and upsert run as separate stages.
+
+    Stages are connected by bounded queues, so a slow stage blocks the ones
+    before it (back-pressure) and at most `max_inflight_chunks` chunks are
+    held in memory between loading and the vector store.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        chunk_id_fn: Callable[[str, str, int], str],
+        batch_size: int = PIPELINE_BATCH_SIZE,
+        max_inflight_chunks: int = PIPELINE_MAX_INFLIGHT_CHUNKS,
+    ):
+        self.vector_store = vector_store
+        self.embeddings = vector_store.embeddings
+        self.chunk_id_fn = chunk_id_fn
+        self.batch_size = batch_size
+        # Two queues plus the batches being built, embedded and upserted
+        queue_size = max(1, (max_inflight_chunks // batch_size - 3) // 2)
+        self._embed_queue = queue.Queue(maxsize=queue_size)
+        self._upsert_queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._error = None
+        self.stats = {"sources": 0, "chunks": 0, "skipped": 0, "batches": 0, "seconds": 0.0}
+
+    def _put(self, q: queue.Queue, item) -> None:
+        """Blocking put that gives up once another stage has failed."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("Pipeline stopped")
+
+    def _get(self, q: queue.Queue):
+        """Blocking get that gives up once another stage has failed."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise RuntimeError("Pipeline stopped")
+
+    def _fail(self, error: Exception) -> None:
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _split_stage(self, sources: Iterable[Source], skip_ids: Set[str]) -> None:
+        """Split sources into chunks and group them into batches.
+
+        Chunks in `skip_ids` were committed by an interrupted run and are not
+        embedded again, but still count towards their source's IDs.
+        """
+        try:
+            splitter = create_text_splitter()
+            batch = _Batch()
+            # "load" is the wait for each parsed source (parsing may run in workers)
+            for key, content_hash, docs in time_each("load", sources, items=lambda s: len(s[2])):
+                with stage("split") as timer:
+                    chunks = splitter.split_documents(docs)
+                    timer.items = len(chunks)
+                ids = [self.chunk_id_fn(key, content_hash, i) for i in range(len(chunks))]
+                self.stats["sources"] += 1
+
+                for chunk, chunk_id in zip(chunks, ids):
+                    if chunk_id in skip_ids:
+                        self.stats["skipped"] += 1
+                        continue
+                    chunk.metadata["chunk_id"] = chunk_id
+                    batch.chunks.append(chunk)
+                    batch.ids.append(chunk_id)
+                    batch.keys.append(key)
+                    if len(batch.chunks) >= self.batch_size:
+                        self._put(self._embed_queue, batch)
+                        batch = _Batch()
+                batch.completed.append((key, ids))
+
+            self._put(self._embed_queue, batch)
+            self._put(self._embed_queue, None)
+        except Exception as e:
+            self._fail(e)
+
+    def _embed_stage(self) -> None:
+        """Embed each batch (the embedding client fans out requests)."""
+        try:
+            while True:
+                batch = self._get(self._embed_queue)
+                if batch is None:
+                    break
+                if batch.chunks:
+                    with stage("embed", items=len(batch.chunks)):
+                        batch.vectors = self.embeddings.embed_documents(
+                            [chunk.page_content for chunk in batch.chunks]
+                        )
+                self._put(self._upsert_queue, batch)
+            self._put(self._upsert_queue, None)
+        except Exception as e:
+            self._fail(e)
+
+    def run(
+        self,
+        sources: Iterable[Source],
+        on_source_done: Callable[[str, List[str]], None],
+        on_batch_done: Optional[Callable[[List[Tuple[str, str]]], None]] = None,
+        skip_ids: Optional[Set[str]] = None,
+    ) -> Dict[str, float]:
+        """Index all sources.
+
+        Args:
+            sources: Loaded sources, consumed lazily
+            on_source_done: Called with (key, ids) once every chunk of a
+                source has been written to the vector store
+            on_batch_done: Called with the (key, id) pairs of each written batch
+            skip_ids: Chunk IDs already in the store (from a resumed run)
+
+        Returns:
+            dict with source, chunk, skipped and batch counts and elapsed seconds
+        """
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(
+                target=self._split_stage, args=(sources, skip_ids or set()), daemon=True
+            ),
+            threading.Thread(target=self._embed_stage, daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Upserts and callbacks stay on the calling thread
+        try:
+            while True:
+                batch = self._get(self._upsert_queue)
+                if batch is None:
+                    break
+                if batch.chunks:
+                    with stage("upsert", items=len(batch.chunks)):
+                        upsert_embedded_chunks(
+                            self.vector_store, batch.chunks, batch.ids, batch.vectors
+                        )
+                    self.stats["chunks"] += len(batch.chunks)
+                    self.stats["batches"] += 1
+                    if on_batch_done:
+                        on_batch_done(list(zip(batch.keys, batch.ids)))
+                for key, ids in batch.completed:
+                    on_source_done(key, ids)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stats["seconds"] = time.perf_counter() - start
+        if self._error is not None:
+            raise self._error
+        return self.stats
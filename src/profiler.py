@@ -0,0 +1,279 @@
+"""
+Profiler Module
+Per-stage cProfile dumps, sampled collapsed stacks and tracemalloc peaks for
+a profiled run (python main.py --profile)
+"""
+import cProfile
+import json
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import BASE_DIR, PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_TOP_ALLOCATORS
+from src.metrics import STAGE_ORDER, metrics
+
+
+# Root frame of sampled stacks from threads outside any stage
+UNSTAGED = "(other threads)"
+
+# Take a new top-allocators snapshot once traced memory grows this much
+SNAPSHOT_GROWTH = 1.25
+SNAPSHOT_MIN_BYTES = 1 << 20
+
+
+def _path_prefixes() -> List[str]:
+    """Install locations stripped from frame file names, longest first."""
+    paths = sysconfig.get_paths()
+    prefixes = {str(BASE_DIR)} | {paths[key] for key in ("purelib", "platlib", "stdlib") if key in paths}
+    return sorted((prefix.rstrip("/\\") + "/" for prefix in prefixes), key=len, reverse=True)
+
+
+class Profiler:
+    """Profiles every `metrics` stage while active.
+
+    - cProfile: one profile per stage and thread, merged into one pstats
+      file per stage. Profiles measure the thread's CPU time, and only the
+      innermost stage of a thread is profiled at a time, so time is never
+      counted twice.
+    - Sampling: every `interval` seconds each thread's stack is recorded
+      under its current stage, as collapsed stacks for flame graphs. This is
+      wall time, so waiting on the network or a queue shows up as well.
+    - tracemalloc: the peak of traced memory, and the top allocating source
+      lines at the high-water mark.
+
+    Use as a context manager; files are written to `directory` on exit.
+    """
+
+    def __init__(self, label: str, root: Path = PROFILE_DIR, interval: float = PROFILE_SAMPLE_INTERVAL):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.directory = Path(root) / f"{stamp}-{label}"
+        self.interval = interval
+        self._lock = threading.Lock()
+        # Thread ident -> stack of (stage, profile) entries; only the top is enabled
+        self._stacks: Dict[int, List[Tuple[str, Optional[cProfile.Profile]]]] = {}
+        self._profiles: Dict[Tuple[str, int], cProfile.Profile] = {}
+        self._calls: Counter = Counter()
+        self._skipped: Counter = Counter()
+        self._samples: Dict[str, Counter] = defaultdict(Counter)
+        self._labels: Dict[object, str] = {}
+        self._prefixes = _path_prefixes()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_size = 0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    # Stage hooks, called by Metrics.stage and Metrics.time_each
+
+    def _enable(self, name: str, profile: cProfile.Profile) -> Optional[cProfile.Profile]:
+        try:
+            profile.enable()
+            return profile
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per process
+            self._skipped[name] += 1
+            return None
+
+    def enter(self, name: str) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._stacks.setdefault(ident, [])
+            profile = self._profiles.get((name, ident))
+            if profile is None:
+                profile = self._profiles[(name, ident)] = cProfile.Profile(time.thread_time)
+            self._calls[name] += 1
+        if stack and stack[-1][1] is not None:
+            stack[-1][1].disable()
+        stack.append((name, self._enable(name, profile)))
+
+    def exit(self, name: str) -> None:
+        stack = self._stacks.get(threading.get_ident())
+        if not stack:
+            return
+        # Stages left out of order (interleaved generators) are just dropped
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == name:
+                break
+        else:
+            return
+        _, profile = stack.pop(i)
+        if i == len(stack):
+            if profile is not None:
+                profile.disable()
+            if stack:
+                outer, _ = stack[-1]
+                stack[-1] = (outer, self._enable(outer, self._profiles[(outer, threading.get_ident())]))
+
+    # Sampling
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename.replace("\\", "/")
+            for prefix in self._prefixes:
+                if path.startswith(prefix):
+                    path = path[len(prefix):]
+                    break
+            # Flame graph tools split frames on ";"
+            label = self._labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+        return label
+
+    def _collapse(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = dict(self._stacks)
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                try:
+                    stage = stacks[ident][-1][0]
+                except (KeyError, IndexError):
+                    stage = UNSTAGED
+                self._samples[stage][self._collapse(frame)] += 1
+            frames = frame = None
+
+            current, _ = tracemalloc.get_traced_memory()
+            if current >= max(SNAPSHOT_MIN_BYTES, self._snapshot_size * SNAPSHOT_GROWTH):
+                self._snapshot = tracemalloc.take_snapshot()
+                self._snapshot_size = current
+
+    # Lifecycle
+
+    def start(self) -> "Profiler":
+        tracemalloc.start()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+        metrics.profiler = self
+        return self
+
+    def stop(self) -> Path:
+        """Stop profiling and write the profile files; returns their directory."""
+        metrics.profiler = None
+        self._stop.set()
+        self._sampler.join()
+        elapsed = time.perf_counter() - self._started
+        current, peak = tracemalloc.get_traced_memory()
+        if self._snapshot is None or current > self._snapshot_size:
+            self._snapshot, self._snapshot_size = tracemalloc.take_snapshot(), current
+        tracemalloc.stop()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        summary = {
+            "seconds": elapsed,
+            "sample_interval": self.interval,
+            "peak_traced_bytes": peak,
+            "python": sys.version.split()[0],
+            "command": sys.argv,
+            "stages": {},
+        }
+        for name in self._stage_names():
+            summary["stages"][name] = self._write_stage(name)
+        self._write_collapsed("all.collapsed", {
+            f"{stage};{stack}": n
+            for stage, samples in self._samples.items()
+            for stack, n in samples.items()
+        })
+        self._write_memory(peak)
+        (self.directory / "summary.json").write_text(json.dumps(summary, indent=2))
+        return self.directory
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.report(self.stop())
+
+    # Output
+
+    def _stage_names(self) -> List[str]:
+        names = set(self._calls) | (set(self._samples) - {UNSTAGED})
+        known = [name for name in STAGE_ORDER if name in names]
+        return known + sorted(names - set(known))
+
+    def _write_stage(self, name: str) -> dict:
+        profiles = [profile for (stage, _), profile in self._profiles.items() if stage == name]
+        stats = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        if stats is not None:
+            stats.dump_stats(self.directory / f"{name}.pstats")
+        self._write_collapsed(f"{name}.collapsed", self._samples.get(name, {}))
+
+        top = None
+        if stats is not None and stats.stats:
+            (file, line, func), (_, _, tottime, _, _) = max(stats.stats.items(), key=lambda kv: kv[1][2])
+            # Built-ins are recorded with file "~"
+            label = func if file == "~" else f"{func} ({Path(file).name}:{line})"
+            top = {"function": label, "seconds": tottime}
+        return {
+            "calls": self._calls[name],
+            "profiled_seconds": stats.total_tt if stats is not None else 0.0,
+            "samples": sum(self._samples.get(name, {}).values()),
+            "unprofiled_calls": self._skipped[name],
+            "top_function": top,
+        }
+
+    def _write_collapsed(self, filename: str, samples: Dict[str, int]) -> None:
+        with open(self.directory / filename, "w", encoding="utf-8") as f:
+            for stack, n in sorted(samples.items()):
+                f.write(f"{stack} {n}\n")
+
+    def _write_memory(self, peak: int) -> None:
+        snapshot = self._snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ])
+        lines = [
+            f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB",
+            f"Top {PROFILE_TOP_ALLOCATORS} allocating lines at the high-water mark "
+            f"({self._snapshot_size / 1024 / 1024:.1f} MiB traced):",
+            "",
+        ]
+        for i, stat in enumerate(snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATORS], 1):
+            frame = stat.traceback[0]
+            lines.append(
+                f"#{i:<3} {stat.size / 1024 / 1024:8.2f} MiB {stat.count:>9} blocks  "
+                f"{frame.filename}:{frame.lineno}"
+            )
+        (self.directory / "memory.txt").write_text("\n".join(lines) + "\n")
+
+    def report(self, directory: Path) -> None:
+        """Print the per-stage summary written to `directory`."""
+        summary = json.loads((directory / "summary.json").read_text())
+        print(f"\n🔬 Profile ({summary['seconds']:.1f}s, peak traced memory "
+              f"{summary['peak_traced_bytes'] / 1024 / 1024:.1f} MiB)")
+        print(f"   {'stage':<16} {'calls':>7} {'cpu':>9} {'samples':>8}  top function (self time)")
+        for name, stage in summary["stages"].items():
+            top = stage["top_function"]
+            top = f"{top['function']} {top['seconds']:.2f}s" if top else "-"
+            print(f"   {name:<16} {stage['calls']:>7} {stage['profiled_seconds']:>8.2f}s "
+                  f"{stage['samples']:>8}  {top}")
+        print(f"📁 Profiles written to {directory}")
+        print("   <stage>.pstats: python -m pstats, snakeviz; "
+              "*.collapsed: flamegraph.pl, speedscope; memory.txt: top allocators")
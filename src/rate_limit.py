@@ -0,0 +1,394 @@
+"""
+Rate Limit Module
+Token buckets, throttling detection, and the adaptive limiter and circuit
+breaker shared by the API clients
+"""
+import asyncio
+import email.utils
+import random
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_MIN_REQUESTS_PER_MINUTE,
+    LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS,
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_CIRCUIT_RESET_SECONDS,
+)
+from src.metrics import register_collector
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate_per_minute`.
+
+    The bucket holds at most one minute's worth of tokens, matching the
+    per-minute windows providers enforce.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate_per_minute: float, capacity: float = None) -> None:
+        """Change the refill rate (and capacity), keeping tokens already earned."""
+        with self._lock:
+            self._refill()
+            self.rate = rate_per_minute / 60.0
+            self.capacity = capacity if capacity is not None else rate_per_minute
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens if available.
+
+        Returns:
+            0.0 on success, otherwise the seconds to wait before retrying
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Block until `amount` tokens are available, then take them."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+def http_status(error: Exception) -> Optional[int]:
+    """HTTP status of an API error, if the client exposes one.
+
+    Reads `status_code` (Groq/OpenAI-style clients), an integer `code`
+    (Google API errors) or the status of the error's HTTP response.
+    """
+    for status in (
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(status, int) and not isinstance(status, bool):
+            return status
+    return None
+
+
+_RATE_LIMIT_RE = re.compile(r"\b429\b|rate_limit|rate limit|resource_exhausted|quota")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if an API error signals throttling.
+
+    Decided by the HTTP status (429) when there is one; only errors without
+    a status are matched on their message.
+    """
+    status = http_status(error)
+    if status is not None:
+        return status == 429
+    return _RATE_LIMIT_RE.search(str(error).lower()) is not None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+# Groq puts the wait in the message too: "Please try again in 1m2.5s"
+_TRY_AGAIN_RE = re.compile(r"try again in (?:(\d+)m)?(\d+(?:\.\d+)?)(ms|s)")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait before retrying, if it said so.
+
+    Reads `retry-after-ms` / `Retry-After` (seconds or HTTP date) from the
+    error's HTTP response, then falls back to the error message.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after-ms")) / 1000
+    except (TypeError, ValueError):
+        pass
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            parsed = email.utils.parsedate_tz(retry_after)
+            if parsed is not None:
+                return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+    match = _TRY_AGAIN_RE.search(str(error))
+    if match:
+        minutes, amount, unit = match.groups()
+        seconds = float(amount) / (1000 if unit == "ms" else 1)
+        return int(minutes or 0) * 60 + seconds
+    return None
+
+
+def classify_error(error: Exception) -> str:
+    """Sort an API error into "auth", "rate_limit", "fatal" or "transient".
+
+    Uses the HTTP status when the client exposes one; errors without a
+    status (connection resets, timeouts, unknown failures) are transient.
+    """
+    status = http_status(error)
+    if status is None:
+        if is_rate_limit_error(error):
+            return "rate_limit"
+        error_str = str(error).lower()
+        if "api_key" in error_str or "authentication" in error_str:
+            return "auth"
+        return "transient"
+    if status in (401, 403):
+        return "auth"
+    if status == 429:
+        return "rate_limit"
+    if 400 <= status < 500:
+        return "fatal"
+    return "transient"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+class AdaptiveRateLimiter:
+    """Process-wide admission control for one API: shared backoff, an AIMD
+    request rate and a circuit breaker.
+
+    - A throttled call pauses every caller until the provider's Retry-After
+      (or an exponential backoff) has passed, and halves the request rate
+      (never below `min_requests_per_minute`); each success adds one
+      request per minute back, up to the configured rate or, when none is
+      set, the rate observed when throttling began.
+    - `failure_threshold` consecutive provider failures (5xx, timeouts,
+      connection errors) open the circuit: calls fail fast with
+      CircuitOpenError for `reset_seconds`, then a single probe call is let
+      through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        min_requests_per_minute: float = LLM_MIN_REQUESTS_PER_MINUTE,
+        base_backoff: float = LLM_BACKOFF_BASE_SECONDS,
+        max_backoff: float = LLM_BACKOFF_MAX_SECONDS,
+        failure_threshold: int = LLM_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = LLM_CIRCUIT_RESET_SECONDS,
+    ):
+        self.min_rate = min_requests_per_minute
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+
+        # 0 = no limit until the provider throttles
+        self._ceiling = requests_per_minute or None
+        self.rate = self._ceiling
+        self._bucket = TokenBucket(self.rate, self._burst(self.rate)) if self.rate else None
+        self._recent = deque()
+        self._resume_at = 0.0
+        self._throttle_streak = 0
+
+        self.circuit = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = None
+
+        self.requests = 0
+        self.throttled = 0
+        self.failures = 0
+        self.rejected = 0
+        self.circuit_opens = 0
+        self.last_retry_after = None
+
+    @staticmethod
+    def _burst(rate: float) -> float:
+        # Five seconds' worth, so a recovered rate is not spent in one burst
+        return max(1.0, rate / 12)
+
+    def _set_rate(self, rate: float) -> None:
+        self.rate = rate
+        if self._bucket is None:
+            self._bucket = TokenBucket(rate, self._burst(rate))
+        else:
+            self._bucket.set_rate(rate, self._burst(rate))
+
+    def _admit(self) -> float:
+        """Take a slot, or return the seconds to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            if self.circuit == "open":
+                if now - self._opened_at < self.reset_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        f"LLM provider unavailable after {self._failures} consecutive "
+                        f"failures; retrying in {self.reset_seconds - (now - self._opened_at):.0f}s"
+                    )
+                self.circuit = "half_open"
+            if self.circuit == "half_open":
+                # One probe at a time (a probe that never reported back expires)
+                if self._probe_started is not None and now - self._probe_started < self.reset_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError("LLM provider unavailable; waiting on a probe request")
+            if self._resume_at > now:
+                return self._resume_at - now
+            bucket = self._bucket
+        if bucket is not None:
+            wait = bucket.try_acquire(1)
+            if wait > 0:
+                return wait
+        with self._lock:
+            if self.circuit == "half_open":
+                self._probe_started = time.monotonic()
+            self.requests += 1
+            self._recent.append(time.monotonic())
+        return 0.0
+
+    def acquire(self) -> None:
+        """Block until a call may start (raises CircuitOpenError)."""
+        while True:
+            wait = self._admit()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Async `acquire`: waits without blocking the event loop."""
+        while True:
+            wait = self._admit()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _backoff(self, attempt: int) -> float:
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def _observed_rate(self, now: float) -> float:
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        return float(len(self._recent))
+
+    def record_success(self) -> None:
+        """The provider answered: close the circuit and probe for more rate."""
+        with self._lock:
+            self._failures = 0
+            self._throttle_streak = 0
+            self._probe_started = None
+            self.circuit = "closed"
+            if self.rate is not None and self._ceiling is not None and self.rate < self._ceiling:
+                self._set_rate(min(self._ceiling, self.rate + 1))
+
+    def record_failure(self, error: Exception) -> None:
+        """Update shared state from a failed call."""
+        kind = classify_error(error)
+        with self._lock:
+            now = time.monotonic()
+            self._probe_started = None
+            if kind == "rate_limit":
+                # Throttling means the provider is up
+                self.throttled += 1
+                self._failures = 0
+                if self.circuit == "half_open":
+                    self.circuit = "closed"
+                retry_after = retry_after_seconds(error)
+                self.last_retry_after = retry_after
+                pause = retry_after if retry_after is not None else self._backoff(self._throttle_streak)
+                self._throttle_streak += 1
+                self._resume_at = max(self._resume_at, now + pause)
+
+                # At a trickle of requests the limit hit is not the request
+                # rate (tokens, daily quota); the pause alone handles that
+                current = self.rate or self._observed_rate(now)
+                if current / 2 >= self.min_rate:
+                    if self._ceiling is None:
+                        self._ceiling = current
+                    self._set_rate(current / 2)
+            elif kind == "transient":
+                self.failures += 1
+                self._failures += 1
+                if self.circuit == "half_open" or self._failures >= self.failure_threshold:
+                    if self.circuit != "open":
+                        self.circuit_opens += 1
+                    self.circuit = "open"
+                    self._opened_at = now
+            elif self.circuit == "half_open":
+                # Auth or request errors: the provider itself responded
+                self.circuit = "closed"
+                self._failures = 0
+
+    def retry_delay(self, error: Exception, attempt: int) -> float:
+        """Seconds this caller should wait before retry `attempt` + 1:
+        exponential backoff with jitter, never less than the provider's
+        Retry-After."""
+        delay = self._backoff(attempt)
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after + random.uniform(0, self.base_backoff))
+        return delay
+
+    def state(self) -> Dict[str, object]:
+        """Snapshot of limiter and breaker state for monitoring."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "circuit": self.circuit,
+                "consecutive_failures": self._failures,
+                "requests_per_minute": self.rate,
+                "observed_requests_per_minute": self._observed_rate(now),
+                "paused_seconds": max(0.0, self._resume_at - now),
+                "last_retry_after": self.last_retry_after,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "circuit_opens": self.circuit_opens,
+            }
+
+    def gauges(self) -> Dict[str, Optional[float]]:
+        """`state()` as numbers, for src/metrics.py (circuit: 0 closed,
+        1 half-open, 2 open)."""
+        state = self.state()
+        state["circuit"] = CIRCUIT_STATES[state["circuit"]]
+        return state
+
+
+# state() keys that are running totals
+LIMITER_COUNTERS = ("requests", "throttled", "failures", "rejected", "circuit_opens")
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+_llm_limiter: Optional[AdaptiveRateLimiter] = None
+_llm_limiter_lock = threading.Lock()
+
+
+def get_llm_limiter() -> AdaptiveRateLimiter:
+    """The limiter shared by every LLM call in the process."""
+    global _llm_limiter
+    with _llm_limiter_lock:
+        if _llm_limiter is None:
+            _llm_limiter = AdaptiveRateLimiter()
+            register_collector("llm_limiter", _llm_limiter.gauges, counters=LIMITER_COUNTERS)
+        return _llm_limiter
@@ -1,24 +1,281 @@
 """
 Retriever Module
-Retrieves relevant documents from vector store
+Retrieves relevant documents from vector store, optionally fusing dense
+results with BM25 keyword matches
 """
+import re
 from pathlib import Path
-from langchain_chroma import Chroma
-from langchain_core.vectorstores import VectorStoreRetriever
+from typing import Any, Dict, List, Optional, Set
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import TOP_K
+from config import (
+    TOP_K,
+    IVF_NPROBE,
+    RETRIEVAL_MODE,
+    HYBRID_CANDIDATES,
+    RRF_K,
+    KEYWORD_QUERY_MAX_TERMS,
+    QUERY_BATCH_SIZE,
+    ADAPTIVE_RETRIEVAL,
+    RELEVANCE_THRESHOLD,
+    ADAPTIVE_MIN_K,
+    ADAPTIVE_MAX_K,
+)
+from src.embeddings import embed_queries
+from src.flat_index import FlatVectorStore
+from src.metrics import stage
+from src.snapshot import SnapshotVectorStore
+from src.vector_store import (
+    batch_search_by_vectors,
+    cosine_similarity_search,
+    search_with_score,
+    set_search_ef,
+)
 
 
-def create_retriever(vector_store: Chroma, k: int = None) -> VectorStoreRetriever:
-    """Create a retriever from the vector store."""
+# Digits, underscores, camelCase or joined parts (v2, ERR_42, getUser, a.b, x-y)
+_IDENTIFIER_RE = re.compile(r"\d|_|[a-z][A-Z]|\w[.:/-]\w")
+
+
+def is_keyword_query(query: str) -> bool:
+    """Whether a query looks like a keyword lookup rather than a question.
+
+    Quoted queries, single words and short queries containing an
+    identifier-like token qualify.
+    """
+    query = query.strip()
+    if len(query) > 1 and query[0] == query[-1] == '"':
+        return True
+    words = query.split()
+    if not words or len(words) > KEYWORD_QUERY_MAX_TERMS or query.endswith("?"):
+        return False
+    return len(words) == 1 or any(_IDENTIFIER_RE.search(word) for word in words)
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], rrf_k: int = RRF_K) -> List[Document]:
+    """Fuse rankings by summing 1 / (rrf_k + rank) per chunk ID."""
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(doc.id, doc)
+    return [docs[doc_id] for doc_id in sorted(scores, key=scores.get, reverse=True)]
+
+
+def adaptive_cut(ranked: List[Document], qualifying: Set[str], min_k: int, max_k: int) -> List[Document]:
+    """Keep up to `max_k` qualifying chunks in rank order, padded to `min_k`
+    with the best of the rest; nothing at all when none qualifies."""
+    kept = [doc for doc in ranked if doc.id in qualifying][:max_k]
+    if not kept:
+        return []
+    if len(kept) < min_k:
+        kept_ids = {doc.id for doc in kept}
+        for doc in ranked:
+            if len(kept_ids) >= min_k:
+                break
+            kept_ids.add(doc.id)
+        kept = [doc for doc in ranked if doc.id in kept_ids]
+    return kept
+
+
+class DenseRetriever(BaseRetriever):
+    """Top-k similarity search on any vector store."""
+
+    vector_store: VectorStore
+    k: int = TOP_K
+    search_kwargs: Dict[str, Any] = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [
+            doc for doc, _ in search_with_score(self.vector_store, query, self.k, **self.search_kwargs)
+        ]
+
+
+class ThresholdRetriever(BaseRetriever):
+    """Dense retrieval that returns between `min_k` and `k` chunks scoring at
+    least `threshold` cosine similarity, or none for off-topic queries."""
+
+    vector_store: VectorStore
+    k: int = ADAPTIVE_MAX_K
+    min_k: int = ADAPTIVE_MIN_K
+    threshold: float = RELEVANCE_THRESHOLD
+    search_kwargs: Dict[str, Any] = {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        scored = cosine_similarity_search(self.vector_store, query, self.k, **self.search_kwargs)
+        qualifying = {doc.id for doc, score in scored if score >= self.threshold}
+        return adaptive_cut([doc for doc, _ in scored], qualifying, self.min_k, self.k)
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense + BM25 retrieval over a snapshot, fused with reciprocal rank fusion.
+
+    Keyword-like queries with lexical matches are answered from BM25 alone,
+    so they need no embedding call. With a `threshold`, only fused chunks
+    whose dense cosine similarity reaches it count (see `adaptive_cut`).
+    """
+
+    store: SnapshotVectorStore
+    k: int = TOP_K
+    candidates: int = HYBRID_CANDIDATES
+    rrf_k: int = RRF_K
+    search_kwargs: Dict[str, Any] = {}
+    threshold: Optional[float] = None
+    min_k: int = ADAPTIVE_MIN_K
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with stage("lexical_search") as timer:
+            lexical = [
+                doc for doc, _ in self.store.lexical_search_with_score(query, self.candidates)
+            ]
+            timer.items = len(lexical)
+        if lexical and is_keyword_query(query):
+            return lexical[:self.k]
+
+        scored = search_with_score(
+            self.store, query, max(self.k, self.candidates), **self.search_kwargs
+        )
+        fused = reciprocal_rank_fusion([[doc for doc, _ in scored], lexical], self.rrf_k)
+        if self.threshold is None:
+            return fused[:self.k]
+        qualifying = {doc.id for doc, score in scored if score >= self.threshold}
+        return adaptive_cut(fused, qualifying, self.min_k, self.k)
+
+
+def create_retriever(
+    vector_store: VectorStore,
+    k: int = None,
+    nprobe: int = None,
+    search_ef: int = None,
+    mode: str = None,
+    adaptive: bool = None,
+    threshold: float = None,
+    min_k: int = None,
+) -> BaseRetriever:
+    """Create a retriever from the vector store.
+    
+    Args:
+        vector_store: Store to search
+        k: Number of chunks to retrieve (default TOP_K; in adaptive mode the
+            maximum, default ADAPTIVE_MAX_K)
+        nprobe: IVF lists visited per query on the flat backend (default IVF_NPROBE)
+        search_ef: HNSW candidate list size on Chroma, including snapshots
+            served from it (default: the collection's)
+        mode: "hybrid" or "dense" (default RETRIEVAL_MODE); hybrid needs a
+            snapshot with a BM25 index and falls back to dense otherwise
+        adaptive: Return only chunks scoring at least `threshold` cosine
+            similarity, between `min_k` and `k` of them, and none for
+            off-topic questions (default ADAPTIVE_RETRIEVAL)
+        threshold: Relevance cutoff (default RELEVANCE_THRESHOLD)
+        min_k: Minimum chunks once any qualifies (default ADAPTIVE_MIN_K)
+    """
+    if adaptive is None:
+        adaptive = ADAPTIVE_RETRIEVAL
+    if k is None:
+        k = ADAPTIVE_MAX_K if adaptive else TOP_K
+    if mode is None:
+        mode = RETRIEVAL_MODE
+    if threshold is None:
+        threshold = RELEVANCE_THRESHOLD
+    if min_k is None:
+        min_k = ADAPTIVE_MIN_K
+    
+    search_kwargs = {}
+    # Snapshots of a Chroma store without IVF search its HNSW graph
+    hnsw = getattr(vector_store, "dense", None) or vector_store
+    if isinstance(vector_store, FlatVectorStore):
+        search_kwargs["nprobe"] = nprobe or IVF_NPROBE
+    if search_ef is not None and not isinstance(hnsw, FlatVectorStore):
+        set_search_ef(hnsw, search_ef)
+    
+    if (
+        mode == "hybrid"
+        and isinstance(vector_store, SnapshotVectorStore)
+        and vector_store.lexical is not None
+    ):
+        return HybridRetriever(
+            store=vector_store,
+            k=k,
+            search_kwargs=search_kwargs,
+            threshold=threshold if adaptive else None,
+            min_k=min_k,
+        )
+    
+    if adaptive:
+        return ThresholdRetriever(
+            vector_store=vector_store,
+            k=k,
+            min_k=min_k,
+            threshold=threshold,
+            search_kwargs=search_kwargs,
+        )
+    
+    return DenseRetriever(vector_store=vector_store, k=k, search_kwargs=search_kwargs)
+
+
+def batch_retrieve(
+    vector_store: VectorStore,
+    queries: List[str],
+    k: int = None,
+    nprobe: int = None,
+    mode: str = None,
+    batch_size: int = QUERY_BATCH_SIZE,
+) -> List[List[Document]]:
+    """Retrieve chunks for many queries at once, for evaluation and bulk QA.
+    
+    Queries are embedded in batched requests and searched `batch_size` at a
+    time with one index operation, instead of one embedding call and one
+    search per query. Hybrid mode (as in `create_retriever`) adds per-query
+    BM25 results and keyword-like queries skip embedding entirely.
+    
+    Returns:
+        One list of documents per query, in query order
+    """
     if k is None:
         k = TOP_K
+    if mode is None:
+        mode = RETRIEVAL_MODE
+    if nprobe is None:
+        nprobe = IVF_NPROBE
     
-    retriever = vector_store.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": k}
+    hybrid = (
+        mode == "hybrid"
+        and isinstance(vector_store, SnapshotVectorStore)
+        and vector_store.lexical is not None
     )
+    candidates = max(k, HYBRID_CANDIDATES) if hybrid else k
+    
+    results: List[List[Document]] = [None] * len(queries)
+    lexical: Dict[int, List[Document]] = {}
+    dense_positions = []
+    for i, query in enumerate(queries):
+        if hybrid:
+            lexical[i] = [
+                doc for doc, _ in vector_store.lexical_search_with_score(query, candidates)
+            ]
+            if lexical[i] and is_keyword_query(query):
+                results[i] = lexical[i][:k]
+                continue
+        dense_positions.append(i)
+    
+    for start in range(0, len(dense_positions), batch_size):
+        positions = dense_positions[start:start + batch_size]
+        vectors = embed_queries(vector_store.embeddings, [queries[i] for i in positions])
+        hits = batch_search_by_vectors(vector_store, vectors, candidates, nprobe)
+        for i, scored in zip(positions, hits):
+            dense = [doc for doc, _ in scored]
+            results[i] = reciprocal_rank_fusion([dense, lexical[i]])[:k] if hybrid else dense
     
-    return retriever
+    return results
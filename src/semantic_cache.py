@@ -0,0 +1,169 @@
+"""
+Semantic Cache Module
+Reuses answers for near-duplicate questions, matched by query-embedding
+cosine similarity
+"""
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_TTL_SECONDS,
+)
+from src.flat_index import normalize_rows
+from src.metrics import register_collector, stage
+from src.snapshot import index_version
+
+
+class _Entry:
+    """A cached question with its retrieved chunk IDs and final answer."""
+
+    def __init__(self, question: str, answer: str, doc_ids: List[str], slot: int):
+        self.question = question
+        self.answer = answer
+        self.doc_ids = doc_ids
+        self.slot = slot
+        self.created = time.monotonic()
+
+
+class SemanticCache:
+    """In-memory cache of answers keyed by normalized query embeddings.
+
+    A lookup scores the query against every cached embedding with one
+    matrix-vector product and hits when the best cosine similarity reaches
+    `threshold`. Entries are evicted least-recently-used beyond
+    `max_entries` and expire after `ttl_seconds`; everything is dropped when
+    `version_fn` reports a different index version.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+        version_fn: Callable[[], str] = index_version,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_fn = version_fn
+        self._lock = threading.Lock()
+        self._version = version_fn()
+        self._matrix: Optional[np.ndarray] = None
+        self._live = np.zeros(max_entries, dtype=bool)
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._free = list(range(max_entries - 1, -1, -1))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def embed(self, question: str) -> np.ndarray:
+        """Normalized query embedding, shared by `lookup` and `store`."""
+        with stage("query_embed"):
+            return normalize_rows(self.embeddings.embed_query(question))
+
+    def _check_version(self) -> None:
+        version = self.version_fn()
+        if version != self._version:
+            self._clear()
+            self._version = version
+            self.invalidations += 1
+
+    def _remove(self, slot: int) -> None:
+        del self._entries[slot]
+        self._live[slot] = False
+        self._free.append(slot)
+
+    def _clear(self) -> None:
+        for slot in list(self._entries):
+            self._remove(slot)
+
+    def lookup(self, vector: np.ndarray) -> Optional[_Entry]:
+        """Return the closest live entry within the threshold, if any."""
+        with self._lock:
+            self._check_version()
+            if self._entries:
+                scores = np.where(self._live, self._matrix @ vector, -np.inf)
+                slot = int(np.argmax(scores))
+                if scores[slot] >= self.threshold:
+                    entry = self._entries[slot]
+                    if time.monotonic() - entry.created <= self.ttl_seconds:
+                        self._entries.move_to_end(slot)
+                        self.hits += 1
+                        return entry
+                    self._remove(slot)
+                    self.expirations += 1
+            self.misses += 1
+            return None
+
+    def store(self, vector: np.ndarray, question: str, answer: str, doc_ids: List[str]) -> None:
+        """Cache an answer under its query embedding."""
+        with self._lock:
+            self._check_version()
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            if not self._free:
+                lru_slot = next(iter(self._entries))
+                self._remove(lru_slot)
+                self.evictions += 1
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._live[slot] = True
+            self._entries[slot] = _Entry(question, answer, doc_ids, slot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# stats() keys that are running totals
+SEMANTIC_CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations", "invalidations")
+
+
+def create_semantic_cache(embeddings: Embeddings) -> Optional[SemanticCache]:
+    """A semantic cache over `embeddings`, or None when disabled in config."""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    cache = SemanticCache(embeddings)
+    register_collector("semantic_cache", cache.stats, counters=SEMANTIC_CACHE_COUNTERS)
+    return cache
+
+
+def report_semantic_cache_stats(cache: Optional[SemanticCache]) -> None:
+    """Print semantic cache counters, if a cache is in use."""
+    if cache is None:
+        return
+    stats = cache.stats()
+    print(
+        f"🧠 Semantic cache: {stats['hits']} hit(s), {stats['misses']} miss(es) "
+        f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} cached, "
+        f"{stats['evictions']} evicted, {stats['invalidations']} invalidation(s))"
+    )
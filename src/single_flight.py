@@ -0,0 +1,154 @@
+"""
+Single-Flight Module
+Coalesces identical in-flight requests: concurrent callers with the same key
+share one execution and all receive its token stream
+"""
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class _Flight:
+    """Token buffer of one execution, replayable by any number of followers.
+
+    Followers can be threads (blocking on a condition) or coroutines on any
+    event loop (woken through call_soon_threadsafe).
+    """
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def _wake(self) -> None:
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+        self._async_waiters.clear()
+        self._cond.notify_all()
+
+    def publish(self, token: str) -> None:
+        with self._cond:
+            self.tokens.append(token)
+            self._wake()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._wake()
+
+    def follow(self) -> Iterator[str]:
+        """Replay tokens so far, then block for new ones until the flight ends."""
+        position = 0
+        while True:
+            with self._cond:
+                while position >= len(self.tokens) and not self.done:
+                    self._cond.wait()
+                chunk = self.tokens[position:]
+                finished = self.done and position + len(chunk) == len(self.tokens)
+            position += len(chunk)
+            yield from chunk
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+    async def afollow(self) -> AsyncIterator[str]:
+        """Async `follow`: waits on an event instead of blocking the loop."""
+        position = 0
+        loop = asyncio.get_running_loop()
+        while True:
+            event = None
+            with self._cond:
+                chunk = self.tokens[position:]
+                finished = self.done
+                if not chunk and not finished:
+                    event = asyncio.Event()
+                    self._async_waiters.append((loop, event))
+            if event is not None:
+                await event.wait()
+                continue
+            position += len(chunk)
+            for token in chunk:
+                yield token
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """Registry of in-flight executions keyed by request identity.
+
+    The first caller for a key starts the producer in the background (a
+    thread, or a task on the caller's event loop); every caller, the first
+    included, then follows the shared stream. A caller that disconnects
+    therefore never cancels the work others are waiting on.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def _join(self, key: str) -> Tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.executions += 1
+            return flight, True
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stream(self, key: str, produce: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Tokens of `produce()`, executed once per key among concurrent callers."""
+        flight, leader = self._join(key)
+        if leader:
+            def drive():
+                try:
+                    for token in produce():
+                        flight.publish(token)
+                    self._land(key, flight)
+                    flight.finish()
+                except BaseException as e:
+                    self._land(key, flight)
+                    flight.finish(e)
+
+            threading.Thread(target=drive, daemon=True).start()
+        yield from flight.follow()
+
+    async def astream(self, key: str, produce: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Async `stream`; the producer runs as a task on the current event loop."""
+        flight, leader = self._join(key)
+        if leader:
+            async def drive():
+                try:
+                    async for token in produce():
+                        flight.publish(token)
+                    self._land(key, flight)
+                    flight.finish()
+                except BaseException as e:
+                    self._land(key, flight)
+                    flight.finish(e)
+
+            flight.task = asyncio.get_running_loop().create_task(drive())
+        async for token in flight.afollow():
+            yield token
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
@@ -0,0 +1,349 @@
+"""
+Snapshot Module
+Compact, memory-mapped index snapshots for near-instant server startup
+
+A snapshot directory holds:
+    snapshot.json       header (version, count, dim, creation time, ...)
+    vectors.npy         float32 matrix of normalized embeddings (mmap-able)
+    texts.bin           UTF-8 chunk texts, back to back
+    text_offsets.npy    int64 offsets into texts.bin (count + 1 entries)
+    records.bin         JSON {"id", "metadata"} per chunk, back to back
+    record_offsets.npy  int64 offsets into records.bin (count + 1 entries)
+    ivf.npz             optional IVF index over the matrix rows (written
+                        with FLAT_INDEX_TYPE=ivf from IVF_MIN_ROWS chunks on)
+    bm25*.npy, bm25.json  BM25 inverted index over the same rows
+
+Every file is opened read-only with mmap, so worker processes serving the
+same snapshot share its pages through the OS page cache. Snapshots of a
+Chroma store without an IVF index hand dense search to Chroma's HNSW graph.
+"""
+import json
+import mmap
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import DB_DIR, SNAPSHOT_DIR, FLAT_INDEX_TYPE, IVF_NLIST, IVF_NPROBE, IVF_MIN_ROWS
+from src.ann_index import IVFIndex, auto_nlist
+from src.flat_index import FlatVectorStore, normalize_rows, IVF_FILE
+from src.lexical_index import BM25Builder, BM25Index
+from src.vector_store import batch_search_by_vectors, distances_to_cosine, open_chroma
+
+
+SNAPSHOT_VERSION = 1
+HEADER_FILE = "snapshot.json"
+VECTORS_FILE = "vectors.npy"
+TEXTS_FILE = "texts.bin"
+TEXT_OFFSETS_FILE = "text_offsets.npy"
+RECORDS_FILE = "records.bin"
+RECORD_OFFSETS_FILE = "record_offsets.npy"
+
+# Rows exported per page when reading a Chroma collection
+EXPORT_PAGE_SIZE = 5000
+
+
+def _iter_rows(vector_store: VectorStore) -> Iterator[Tuple[List[str], np.ndarray, List[str], List[dict]]]:
+    """Yield (ids, vectors, texts, metadatas) pages from a flat or Chroma store."""
+    if isinstance(vector_store, FlatVectorStore):
+        n = vector_store.count()
+        for start in range(0, n, EXPORT_PAGE_SIZE):
+            end = min(start + EXPORT_PAGE_SIZE, n)
+            yield (
+                vector_store._ids[start:end],
+                vector_store.vectors[start:end],
+                vector_store._texts[start:end],
+                vector_store._metadatas[start:end],
+            )
+        return
+
+    collection = vector_store._collection
+    offset = 0
+    while True:
+        page = collection.get(
+            limit=EXPORT_PAGE_SIZE,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"],
+        )
+        if not page["ids"]:
+            return
+        yield (
+            page["ids"],
+            normalize_rows(page["embeddings"]),
+            page["documents"],
+            [metadata or {} for metadata in page["metadatas"]],
+        )
+        offset += len(page["ids"])
+
+
+def _count_rows(vector_store: VectorStore) -> int:
+    if isinstance(vector_store, FlatVectorStore):
+        return vector_store.count()
+    return vector_store._collection.count()
+
+
+def write_snapshot(
+    vector_store: VectorStore,
+    directory: Path = SNAPSHOT_DIR,
+    header: Optional[dict] = None,
+    index_type: str = FLAT_INDEX_TYPE,
+    ivf_min_rows: int = IVF_MIN_ROWS,
+) -> Path:
+    """Export a vector store to a snapshot directory, streaming page by page.
+
+    The snapshot is written next to `directory` and swapped in at the end;
+    processes that still map the old files keep reading them safely.
+
+    Args:
+        vector_store: Flat or Chroma store to export
+        directory: Snapshot location
+        header: Extra fields for snapshot.json
+        index_type: "ivf" to write an IVF index over the exported matrix
+            once it has `ivf_min_rows` rows, whatever the store's backend
+
+    Returns:
+        The snapshot directory
+    """
+    directory = Path(directory)
+    tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    count = _count_rows(vector_store)
+    matrix = None
+    dim = 0
+    row = 0
+    text_offsets = np.zeros(count + 1, dtype=np.int64)
+    record_offsets = np.zeros(count + 1, dtype=np.int64)
+    lexical = BM25Builder()
+
+    with open(tmp_dir / TEXTS_FILE, "wb") as texts_file, \
+            open(tmp_dir / RECORDS_FILE, "wb") as records_file:
+        for ids, vectors, texts, metadatas in _iter_rows(vector_store):
+            if matrix is None:
+                dim = vectors.shape[1]
+                matrix = np.lib.format.open_memmap(
+                    tmp_dir / VECTORS_FILE, mode="w+", dtype=np.float32, shape=(count, dim)
+                )
+            end = row + len(ids)
+            matrix[row:end] = vectors
+            lexical.add(texts)
+            for i, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                texts_file.write(text.encode("utf-8"))
+                records_file.write(
+                    json.dumps({"id": chunk_id, "metadata": metadata}).encode("utf-8")
+                )
+                text_offsets[row + i + 1] = texts_file.tell()
+                record_offsets[row + i + 1] = records_file.tell()
+            row = end
+
+    if matrix is None:
+        np.save(tmp_dir / VECTORS_FILE, np.empty((0, 0), dtype=np.float32))
+    else:
+        matrix.flush()
+        del matrix
+    np.save(tmp_dir / TEXT_OFFSETS_FILE, text_offsets)
+    np.save(tmp_dir / RECORD_OFFSETS_FILE, record_offsets)
+    lexical.build().save(tmp_dir)
+
+    ann = None
+    if index_type == "ivf" and count >= ivf_min_rows:
+        if isinstance(vector_store, FlatVectorStore) and vector_store.build_ann():
+            ivf = vector_store._ivf
+        else:
+            ivf = IVFIndex(nlist=IVF_NLIST or auto_nlist(count), nprobe=IVF_NPROBE)
+            ivf.train(np.load(tmp_dir / VECTORS_FILE, mmap_mode="r"))
+        ivf.save(tmp_dir / IVF_FILE)
+        ann = "ivf"
+
+    with open(tmp_dir / HEADER_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": SNAPSHOT_VERSION,
+            "count": count,
+            "dim": dim,
+            "backend": "flat" if isinstance(vector_store, FlatVectorStore) else "chroma",
+            "ann": ann,
+            "created_at": datetime.now().isoformat(),
+            **(header or {}),
+        }, f, indent=2)
+
+    # Swap the new snapshot in
+    old_dir = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    if directory.exists():
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    print(f"📸 Wrote index snapshot with {count} chunks to {directory}")
+    return directory
+
+
+def _map_file(path: Path):
+    """Read-only mmap of a file (empty files map to b"")."""
+    if path.stat().st_size == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_snapshot_header(directory: Path = SNAPSHOT_DIR) -> Optional[dict]:
+    """Return the snapshot header, or None if there is no usable snapshot."""
+    header_path = Path(directory) / HEADER_FILE
+    if not header_path.exists():
+        return None
+    with open(header_path, "r", encoding="utf-8") as f:
+        header = json.load(f)
+    if header.get("version") != SNAPSHOT_VERSION:
+        return None
+    return header
+
+
+_version_cache: dict = {}
+
+
+def index_version(directory: Path = SNAPSHOT_DIR) -> str:
+    """Identifier of the latest completed index (changes with every snapshot).
+
+    Only the header's stat is checked on repeat calls, so this is cheap
+    enough to call per query.
+    """
+    header_path = Path(directory) / HEADER_FILE
+    try:
+        stat = header_path.stat()
+    except OSError:
+        return ""
+    key = (str(header_path), stat.st_mtime_ns, stat.st_size)
+    if key not in _version_cache:
+        header = read_snapshot_header(directory) or {}
+        _version_cache.clear()
+        _version_cache[key] = f"{header.get('fingerprint', '')}@{header.get('created_at', '')}"
+    return _version_cache[key]
+
+
+class SnapshotVectorStore(FlatVectorStore):
+    """Read-only flat index served straight from a memory-mapped snapshot.
+
+    Texts and metadata are decoded only for the rows a search returns. The
+    snapshot's BM25 index (`lexical`) answers keyword searches over the same
+    rows without embedding the query. Dense searches use the snapshot's IVF
+    index if it has one, else the `dense` store if given (the Chroma
+    collection the snapshot was exported from), else an exact scan.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        embedding: Embeddings,
+        nprobe: int = IVF_NPROBE,
+        dense: Optional[VectorStore] = None,
+    ):
+        directory = Path(directory)
+        super().__init__(embedding, index_type="exact", nprobe=nprobe)
+        self.directory = directory
+        self.dense = None
+        self.header = read_snapshot_header(directory)
+        if self.header is None:
+            raise ValueError(f"No usable snapshot in {directory}")
+
+        self._matrix = np.load(directory / VECTORS_FILE, mmap_mode="r")
+        self._size = self.header["count"]
+        self._text_offsets = np.load(directory / TEXT_OFFSETS_FILE, mmap_mode="r")
+        self._record_offsets = np.load(directory / RECORD_OFFSETS_FILE, mmap_mode="r")
+        self._text_blob = _map_file(directory / TEXTS_FILE)
+        self._record_blob = _map_file(directory / RECORDS_FILE)
+        self.lexical = BM25Index.load(directory)
+
+        if (directory / IVF_FILE).exists():
+            self.index_type = "ivf"
+            self._ivf = IVFIndex.load(directory / IVF_FILE, self._size)
+            self._ivf.nprobe = nprobe
+        else:
+            self.dense = dense
+
+    def _document(self, row: int) -> Document:
+        text = self._text_blob[self._text_offsets[row]:self._text_offsets[row + 1]]
+        record = json.loads(
+            self._record_blob[self._record_offsets[row]:self._record_offsets[row + 1]]
+        )
+        return Document(
+            page_content=text.decode("utf-8"),
+            metadata=record["metadata"],
+            id=record["id"],
+        )
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, nprobe: Optional[int] = None
+    ) -> List[Tuple[Document, float]]:
+        if self.dense is None:
+            return super().similarity_search_by_vector_with_score(embedding, k, nprobe)
+        # Chroma returns distances; scores here are cosine similarities
+        results = self.dense.similarity_search_by_vector_with_relevance_scores(embedding, k)
+        return distances_to_cosine(self.dense, results)
+
+    def batch_similarity_search_by_vector_with_score(
+        self, embeddings: List[List[float]], k: int = 4, nprobe: Optional[int] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        if self.dense is None:
+            return super().batch_similarity_search_by_vector_with_score(embeddings, k, nprobe)
+        if len(embeddings) == 0:
+            return []
+        return [
+            distances_to_cosine(self.dense, results)
+            for results in batch_search_by_vectors(self.dense, embeddings, k)
+        ]
+
+    def lexical_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Top-k chunks by BM25 score (empty if no query term occurs)."""
+        if self.lexical is None:
+            return []
+        rows, scores = self.lexical.search(query, k)
+        return [(self._document(row), float(score)) for row, score in zip(rows, scores)]
+
+    def build_ann(self, force: bool = False) -> bool:
+        # Snapshots are never retrained; they use the IVF index they were written with
+        return self._ivf is not None
+
+    def upsert_embeddings(self, *args: Any, **kwargs: Any) -> None:
+        raise NotImplementedError("Snapshots are read-only; re-index and write a new one")
+
+    def add_texts(self, *args: Any, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("Snapshots are read-only; re-index and write a new one")
+
+    def delete(self, *args: Any, **kwargs: Any) -> Optional[bool]:
+        raise NotImplementedError("Snapshots are read-only; re-index and write a new one")
+
+    def persist(self, *args: Any, **kwargs: Any) -> None:
+        raise NotImplementedError("Snapshots are written with write_snapshot()")
+
+
+def open_snapshot(
+    embedding: Embeddings,
+    directory: Path = SNAPSHOT_DIR,
+) -> Optional[SnapshotVectorStore]:
+    """Open the snapshot if one exists, else return None.
+
+    A snapshot of a Chroma store without an IVF index serves dense search
+    from the Chroma collection, so HNSW (not an exact scan) answers queries.
+    """
+    header = read_snapshot_header(directory)
+    if header is None:
+        return None
+
+    start = time.perf_counter()
+    dense = None
+    # The Chroma collection the snapshot was exported from lives in DB_DIR
+    if header.get("backend") == "chroma" and not header.get("ann") and Path(directory).parent == DB_DIR:
+        dense = open_chroma(embedding)
+    store = SnapshotVectorStore(directory, embedding, dense=dense)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    search = "IVF" if store._ivf is not None else "Chroma HNSW" if store.dense is not None else "exact"
+    print(f"⚡ Opened index snapshot with {store.count()} chunks ({search} search) in {elapsed_ms:.1f} ms")
+    return store
@@ -2,25 +2,187 @@
 Text Splitter Module
 Splits documents into smaller chunks for embedding
 """
-from typing import List
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+import numpy as np
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 import sys
 sys.path.insert(0, str(__file__).rsplit("/", 2)[0])
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS, TEXT_SPLITTER
+from src.metrics import stage
 
 
-def create_text_splitter() -> RecursiveCharacterTextSplitter:
-    """Create a text splitter with configured parameters."""
+# (chunk text, start offset, end offset) in the source text
+Span = Tuple[str, int, int]
+
+_WHITESPACE_RE = re.compile(r"\s*")
+
+
+class FastTextSplitter:
+    """Offset-based equivalent of LangChain's RecursiveCharacterTextSplitter.
+
+    Produces the same chunks as RecursiveCharacterTextSplitter with
+    `keep_separator=True`, `strip_whitespace=True` and `len` as length
+    function, for the same chunk size, overlap and separators.
+
+    With the separator kept, the pieces of a split tile the text, so they
+    are represented by their boundary offsets: a prefix sum computed from
+    one `str.split` per separator level, applied only to the pieces that are
+    still too long. Each chunk's end, and the start of the overlap carried
+    into the next chunk, are then found by bisecting the boundaries instead
+    of adding and popping pieces one by one. Text is only copied for the
+    emitted chunks.
+
+    Chunk metadata gets the chunk's exact `start_index` and `end_index`
+    character offsets in the source text, and the whitespace that follows
+    it there (`whitespace_after`), so the context packer can rejoin chunks
+    separated only by whitespace the splitter stripped.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = CHUNK_SIZE,
+        chunk_overlap: int = CHUNK_OVERLAP,
+        separators: Optional[List[str]] = None,
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if not 0 <= chunk_overlap <= chunk_size:
+            raise ValueError(f"chunk_overlap must be in [0, chunk_size], got {chunk_overlap}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators if separators is not None else CHUNK_SEPARATORS)
+
+    def _boundaries(self, text: str, start: int, end: int, separator: str) -> List[int]:
+        """Offsets [b0, ..., bn] of the pieces of text[start:end] split
+        before each `separator` (which starts the following piece); piece k
+        is text[b[k]:b[k + 1]] and empty pieces are dropped."""
+        if not separator:
+            return list(range(start, end + 1))
+        parts = (text if start == 0 and end == len(text) else text[start:end]).split(separator)
+        lengths = np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))
+        del parts
+        lengths[1:] += len(separator)
+        bounds = np.empty(len(lengths) + 1, dtype=np.int64)
+        bounds[0] = 0
+        np.cumsum(lengths, out=bounds[1:])
+        bounds += start
+        bounds = bounds.tolist()
+        if bounds[1] == bounds[0]:
+            # Only the text before the first separator can be empty
+            del bounds[0]
+        return bounds
+
+    def _emit(self, text: str, start: int, end: int, spans: List[Span]) -> None:
+        """Add text[start:end] without surrounding whitespace, if any is left."""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            spans.append((text[start:end], start, end))
+
+    def _merge(self, text: str, bounds: List[int], lo: int, hi: int, spans: List[Span]) -> None:
+        """Join pieces lo..hi-1 (each shorter than chunk_size) into chunks.
+
+        Same result as LangChain's `_merge_splits`: a chunk takes pieces
+        while they fit in chunk_size, and the next chunk starts with the
+        trailing pieces of it that fit in chunk_overlap (and leave room for
+        the piece that did not fit).
+        """
+        size, overlap = self.chunk_size, self.chunk_overlap
+        first, search_from = lo, lo + 1
+        while True:
+            # Pieces first..j-1 fit; piece j would overflow
+            j = bisect_right(bounds, bounds[first] + size, search_from, hi + 1) - 1
+            if j >= hi:
+                self._emit(text, bounds[first], bounds[hi], spans)
+                return
+            self._emit(text, bounds[first], bounds[j], spans)
+            first = max(
+                bisect_left(bounds, bounds[j] - overlap, first, j + 1),
+                bisect_left(bounds, bounds[j + 1] - size, first, j + 1),
+            )
+            search_from = j + 2
+
+    def _split(self, text: str, start: int, end: int, level: int, spans: List[Span]) -> None:
+        # The first remaining separator present in the piece (or "")
+        separator, next_level = self.separators[-1], len(self.separators)
+        for i in range(level, len(self.separators)):
+            candidate = self.separators[i]
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator, next_level = candidate, i + 1
+                break
+
+        bounds = self._boundaries(text, start, end, separator)
+        pieces = len(bounds) - 1
+        if pieces == 0:
+            return
+        lengths = np.diff(bounds)
+        good_from = 0
+        for k in np.flatnonzero(lengths >= self.chunk_size).tolist():
+            if k > good_from:
+                self._merge(text, bounds, good_from, k, spans)
+            good_from = k + 1
+            if next_level >= len(self.separators):
+                # Nothing left to split on: kept whole (and unstripped)
+                spans.append((text[bounds[k]:bounds[k + 1]], bounds[k], bounds[k + 1]))
+            else:
+                self._split(text, bounds[k], bounds[k + 1], next_level, spans)
+        if pieces > good_from:
+            self._merge(text, bounds, good_from, pieces, spans)
+
+    def split_spans(self, text: str) -> List[Span]:
+        """Split `text` into (chunk, start, end) spans."""
+        spans: List[Span] = []
+        self._split(text, 0, len(text), 0, spans)
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for chunk, _, _ in self.split_spans(text)]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split each document, copying its metadata into every chunk."""
+        chunks = []
+        for doc in documents:
+            text = doc.page_content
+            for chunk, start, end in self.split_spans(text):
+                metadata = {
+                    **doc.metadata,
+                    "start_index": start,
+                    "end_index": end,
+                    "whitespace_after": _WHITESPACE_RE.match(text, end).group(),
+                }
+                chunks.append(Document(page_content=chunk, metadata=metadata))
+        return chunks
+
+
+def create_langchain_splitter() -> RecursiveCharacterTextSplitter:
+    """LangChain splitter with the configured parameters (the reference for
+    FastTextSplitter)."""
     return RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE,
         chunk_overlap=CHUNK_OVERLAP,
         length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""],
+        separators=CHUNK_SEPARATORS,
+        # Chunk offsets let the context packer merge overlapping neighbours
+        add_start_index=True,
     )
 
 
+def create_text_splitter():
+    """Create a text splitter with configured parameters (see TEXT_SPLITTER)."""
+    if TEXT_SPLITTER == "langchain":
+        return create_langchain_splitter()
+    return FastTextSplitter(CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS)
+
+
 def split_documents(documents: List[Document]) -> List[Document]:
     """Split documents into smaller chunks."""
     if not documents:
@@ -28,7 +190,9 @@ def split_documents(documents: List[Document]) -> List[Document]:
         return []
     
     splitter = create_text_splitter()
-    chunks = splitter.split_documents(documents)
+    with stage("split") as timer:
+        chunks = splitter.split_documents(documents)
+        timer.items = len(chunks)
     
     print(f"📄 Split {len(documents)} document(s) into {len(chunks)} chunk(s)")
     return chunks
@@ -1,17 +1,67 @@
 """
 Vector Store Module
-Manages ChromaDB for storing and retrieving document embeddings
+Manages the vector store (ChromaDB or the in-process flat index) for
+storing and retrieving document embeddings
 """
 import shutil
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from pathlib import Path
 from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
 from langchain_chroma import Chroma
+from chromadb.api.client import SharedSystemClient
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import DB_DIR, COLLECTION_NAME
-from src.embeddings import get_embeddings
+from config import (
+    DB_DIR,
+    COLLECTION_NAME,
+    UPSERT_BATCH_SIZE,
+    VECTOR_STORE_BACKEND,
+    FLAT_INDEX_DIR,
+    HNSW_M,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_SEARCH_EF,
+    FLAT_INDEX_TYPE,
+    IVF_NLIST,
+    IVF_NPROBE,
+    IVF_MIN_ROWS,
+)
+from src.embeddings import get_embeddings, report_cache_stats
+from src.flat_index import FlatVectorStore
+from src.metrics import stage
+
+
+# HNSW parameters for Chroma (only applied when a collection is created)
+HNSW_METADATA = {
+    "hnsw:M": HNSW_M,
+    "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+    "hnsw:search_ef": HNSW_SEARCH_EF,
+}
+
+# Index parameters for the flat backend
+FLAT_INDEX_KWARGS = {
+    "index_type": FLAT_INDEX_TYPE,
+    "nlist": IVF_NLIST,
+    "nprobe": IVF_NPROBE,
+    "ivf_min_rows": IVF_MIN_ROWS,
+}
+
+
+def open_chroma(embeddings) -> Chroma:
+    """The persisted Chroma collection (created empty if missing)."""
+    return Chroma(
+        collection_name=COLLECTION_NAME,
+        embedding_function=embeddings,
+        persist_directory=str(DB_DIR),
+        collection_metadata=HNSW_METADATA,
+    )
+
+
+def _open_flat(embeddings) -> FlatVectorStore:
+    if FlatVectorStore.exists(FLAT_INDEX_DIR):
+        return FlatVectorStore.load(FLAT_INDEX_DIR, embeddings, **FLAT_INDEX_KWARGS)
+    return FlatVectorStore(embeddings, persist_directory=str(FLAT_INDEX_DIR), **FLAT_INDEX_KWARGS)
 
 
 def clear_vector_store() -> bool:
@@ -22,6 +72,8 @@ def clear_vector_store() -> bool:
     """
     try:
         if DB_DIR.exists():
+            # Drop cached Chroma clients so later opens don't write to deleted files
+            SharedSystemClient.clear_system_cache()
             shutil.rmtree(DB_DIR)
             DB_DIR.mkdir(parents=True, exist_ok=True)
             print("🗑️  Cleared existing vector store")
@@ -32,7 +84,7 @@ def clear_vector_store() -> bool:
         return False
 
 
-def create_vector_store(documents: List[Document], clear_existing: bool = True) -> Chroma:
+def create_vector_store(documents: List[Document], clear_existing: bool = True) -> VectorStore:
     """Create a new vector store from documents.
     
     Args:
@@ -50,18 +102,172 @@ def create_vector_store(documents: List[Document], clear_existing: bool = True)
     
     embeddings = get_embeddings()
     
-    vector_store = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        collection_name=COLLECTION_NAME,
-        persist_directory=str(DB_DIR),
-    )
+    with stage("embed_upsert", items=len(documents)):
+        if VECTOR_STORE_BACKEND == "flat":
+            vector_store = FlatVectorStore.from_documents(
+                documents=documents,
+                embedding=embeddings,
+                persist_directory=str(FLAT_INDEX_DIR),
+                **FLAT_INDEX_KWARGS,
+            )
+        else:
+            vector_store = Chroma.from_documents(
+                documents=documents,
+                embedding=embeddings,
+                collection_name=COLLECTION_NAME,
+                persist_directory=str(DB_DIR),
+                collection_metadata=HNSW_METADATA,
+            )
     
+    report_cache_stats(embeddings)
     print(f"✅ Vector store created and saved to {DB_DIR}")
     return vector_store
 
 
-def load_vector_store() -> Optional[Chroma]:
+def open_vector_store() -> VectorStore:
+    """Open the persistent store for in-place updates, creating it if missing."""
+    DB_DIR.mkdir(parents=True, exist_ok=True)
+    
+    if VECTOR_STORE_BACKEND == "flat":
+        return _open_flat(get_embeddings())
+    return open_chroma(get_embeddings())
+
+
+def upsert_embedded_chunks(
+    vector_store: VectorStore,
+    chunks: List[Document],
+    ids: List[str],
+    vectors: List[List[float]],
+    batch_size: int = UPSERT_BATCH_SIZE,
+) -> None:
+    """Write already-embedded chunks under explicit IDs, in batches Chroma accepts."""
+    if isinstance(vector_store, FlatVectorStore):
+        vector_store.upsert_embeddings(
+            ids,
+            vectors,
+            [chunk.page_content for chunk in chunks],
+            [chunk.metadata for chunk in chunks],
+        )
+        return
+    
+    collection = vector_store._collection
+    for start in range(0, len(chunks), batch_size):
+        end = start + batch_size
+        collection.upsert(
+            ids=ids[start:end],
+            embeddings=vectors[start:end],
+            metadatas=[chunk.metadata for chunk in chunks[start:end]],
+            documents=[chunk.page_content for chunk in chunks[start:end]],
+        )
+
+
+def delete_chunks(
+    vector_store: VectorStore,
+    ids: List[str],
+    batch_size: int = UPSERT_BATCH_SIZE,
+) -> None:
+    """Delete chunks by ID."""
+    for start in range(0, len(ids), batch_size):
+        vector_store.delete(ids=ids[start:start + batch_size])
+
+
+def count_chunks(vector_store: VectorStore) -> int:
+    """Number of chunks held by the store."""
+    if isinstance(vector_store, FlatVectorStore):
+        return vector_store.count()
+    return vector_store._collection.count()
+
+
+def persist_vector_store(vector_store: VectorStore) -> None:
+    """Flush in-process stores to disk (Chroma persists on every write)."""
+    if isinstance(vector_store, FlatVectorStore):
+        vector_store.persist()
+
+
+def batch_search_by_vectors(
+    vector_store: VectorStore,
+    vectors: List[List[float]],
+    k: int,
+    nprobe: Optional[int] = None,
+) -> List[List[Tuple[Document, float]]]:
+    """Top-k (document, score) lists for many query vectors in one index call.
+
+    Flat stores score all queries with blocked matrix products; Chroma runs
+    one batched collection query. Scores follow each backend's
+    single-query convention (cosine similarity / distance).
+    """
+    if isinstance(vector_store, FlatVectorStore):
+        return vector_store.batch_similarity_search_by_vector_with_score(vectors, k, nprobe)
+    
+    hits = vector_store._collection.query(
+        query_embeddings=vectors,
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
+    )
+    return [
+        [
+            (Document(page_content=text, metadata=metadata or {}, id=chunk_id), distance)
+            for chunk_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
+        for ids, texts, metadatas, distances in zip(
+            hits["ids"], hits["documents"], hits["metadatas"], hits["distances"]
+        )
+    ]
+
+
+def search_with_score(
+    vector_store: VectorStore, query: str, k: int, **kwargs
+) -> List[Tuple[Document, float]]:
+    """`similarity_search_with_score`, with the query embedding and the
+    index search timed as separate stages. Scores are the backend's own."""
+    with stage("query_embed"):
+        vector = vector_store.embeddings.embed_query(query)
+    with stage("search") as timer:
+        if isinstance(vector_store, FlatVectorStore):
+            results = vector_store.similarity_search_by_vector_with_score(vector, k, **kwargs)
+        else:
+            # Despite the name, Chroma returns raw distances here
+            results = vector_store.similarity_search_by_vector_with_relevance_scores(vector, k, **kwargs)
+        timer.items = len(results)
+    return results
+
+
+def cosine_similarity_search(
+    vector_store: VectorStore, query: str, k: int, **kwargs
+) -> List[Tuple[Document, float]]:
+    """Top-k (document, cosine similarity) pairs on any backend.
+
+    Flat stores already score by cosine similarity. Chroma distances are
+    converted assuming normalized embeddings (squared L2 = 2 - 2·cos; cosine
+    and inner-product distances are 1 - cos), so one relevance threshold
+    means the same thing on every backend.
+    """
+    results = search_with_score(vector_store, query, k, **kwargs)
+    if isinstance(vector_store, FlatVectorStore):
+        return results
+    return distances_to_cosine(vector_store, results)
+
+
+def distances_to_cosine(
+    vector_store: Chroma, results: List[Tuple[Document, float]]
+) -> List[Tuple[Document, float]]:
+    """Convert Chroma (document, distance) pairs to cosine similarities."""
+    space = (vector_store._collection.metadata or {}).get("hnsw:space", "l2")
+    scale = 0.5 if space == "l2" else 1.0
+    return [(doc, 1.0 - distance * scale) for doc, distance in results]
+
+
+def set_search_ef(vector_store: Chroma, ef: int) -> None:
+    """Change the HNSW query-time candidate list size of a Chroma collection."""
+    collection = vector_store._collection
+    try:
+        collection.modify(configuration={"hnsw": {"ef_search": ef}})
+    except TypeError:
+        # Chroma < 1.0 only knows the metadata form
+        collection.modify(metadata={**(collection.metadata or {}), "hnsw:search_ef": ef})
+
+
+def load_vector_store() -> Optional[VectorStore]:
     """Load an existing vector store."""
     if not DB_DIR.exists() or not any(DB_DIR.iterdir()):
         print("⚠️  No existing vector store found")
@@ -71,16 +277,22 @@ def load_vector_store() -> Optional[Chroma]:
     
     embeddings = get_embeddings()
     
-    vector_store = Chroma(
-        collection_name=COLLECTION_NAME,
-        embedding_function=embeddings,
-        persist_directory=str(DB_DIR),
-    )
+    if VECTOR_STORE_BACKEND == "flat":
+        if not FlatVectorStore.exists(FLAT_INDEX_DIR):
+            print("⚠️  No existing flat index found")
+            return None
+        vector_store = _open_flat(embeddings)
+        if vector_store.count() == 0:
+            print("⚠️  Vector store is empty")
+            return None
+        print(f"✅ Loaded flat index with {vector_store.count()} chunks")
+        return vector_store
+    
+    vector_store = open_chroma(embeddings)
     
     # Check if collection has documents
     try:
-        collection = vector_store._collection
-        count = collection.count()
+        count = count_chunks(vector_store)
         
         if count == 0:
             print("⚠️  Vector store is empty")
@@ -93,7 +305,7 @@ def load_vector_store() -> Optional[Chroma]:
         return None
 
 
-def get_or_create_vector_store(documents: Optional[List[Document]] = None) -> Chroma:
+def get_or_create_vector_store(documents: Optional[List[Document]] = None) -> VectorStore:
     """Get existing vector store or create new one if documents provided."""
     existing_store = load_vector_store()
     
@@ -1,7 +1,6 @@
 """
 RAG System - Streamlit Web Interface (Premium Dark Theme)
 """
-import os
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -485,35 +484,42 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def init_metrics_server():
+    """Start the metrics endpoint once per process (cached); a taken
+    METRICS_PORT only prints a warning."""
+    from src.metrics import start_metrics_server
+    return start_metrics_server()
+
+
 @st.cache_resource
 def init_rag():
     """Initialize RAG system (cached)."""
-    google_key = os.getenv("GOOGLE_API_KEY")
-    groq_key = os.getenv("GROQ_API_KEY")
+    from src.backends import missing_api_keys
     
-    if not google_key:
-        return None, "❌ Missing GOOGLE_API_KEY", 0
-    if not groq_key:
-        return None, "❌ Missing GROQ_API_KEY", 0
+    # Only the keys of the configured backends are needed (none offline)
+    missing = missing_api_keys()
+    if missing:
+        return None, f"❌ Missing {missing[0]}", 0
     
     try:
         from config import DATA_DIR
-        from src.document_loader import load_all_documents
-        from src.text_splitter import split_documents
-        from src.vector_store import create_vector_store
+        from src.embeddings import get_embeddings
+        from src.indexer import ensure_index
+        from src.snapshot import open_snapshot
         from src.retriever import create_retriever
         from src.generator import create_rag_chain
+        from src.semantic_cache import create_semantic_cache
         
-        docs = load_all_documents(directory=DATA_DIR)
-        if not docs:
+        # Reuse the persisted index unless the corpus or indexing config changed
+        vs = open_snapshot(get_embeddings()) if ensure_index(DATA_DIR) else None
+        if vs is None or vs.count() == 0:
             return None, "❌ No documents found", 0
         
-        chunks = split_documents(docs)
-        vs = create_vector_store(chunks)
         retriever = create_retriever(vs)
-        chain = create_rag_chain(retriever)
+        chain = create_rag_chain(retriever, cache=create_semantic_cache(vs.embeddings))
         
-        return chain, "✅ System Online", len(chunks)
+        return chain, "✅ System Online", vs.count()
         
     except Exception as e:
         import traceback
@@ -556,6 +562,7 @@ def render_message(role: str, content: str, timestamp: str = None):
 
 def main():
     # Initialize RAG
+    init_metrics_server()
     rag_chain, status, chunk_count = init_rag()
     
     # Initialize session state
@@ -563,14 +570,17 @@ def main():
         st.session_state.messages = []
     
     # Sidebar
+    from src.backends import embedding_backend, llm_backend
+    llm_name = llm_backend().model_name
+    embedding_name = embedding_backend().model_name
     with st.sidebar:
         st.markdown("""
         <div class="status-card">
             <div class="status-title">🔧 System Status</div>
             <div class="status-item"><span class="status-dot"></span>""" + status + """</div>
             <div class="status-item">📊 """ + str(chunk_count) + """ document chunks</div>
-            <div class="status-item">🤖 Llama 3.3 70B</div>
-            <div class="status-item">🔍 Gemini Embeddings</div>
+            <div class="status-item">🤖 """ + llm_name + """</div>
+            <div class="status-item">🔍 """ + embedding_name + """</div>
         </div>
         """, unsafe_allow_html=True)
         
@@ -647,21 +657,33 @@ def main():
         })
         
         if rag_chain:
-            with st.spinner("🔍 Searching documents..."):
-                try:
-                    from src.generator import query
-                    answer = query(rag_chain, question)
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": answer,
-                        "time": datetime.now().strftime("%H:%M")
-                    })
-                except Exception as e:
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": f"❌ Error: {e}",
-                        "time": datetime.now().strftime("%H:%M")
-                    })
+            render_message("user", question, current_time)
+            placeholder = st.empty()
+            answer = ""
+            try:
+                from src.generator import stream_query
+                with st.spinner("🔍 Searching documents..."):
+                    tokens = stream_query(rag_chain, question)
+                    first = next(tokens, "")
+                answer = first
+                with placeholder.container():
+                    render_message("assistant", answer + "▌")
+                # Render the answer as it streams in
+                for token in tokens:
+                    answer += token
+                    with placeholder.container():
+                        render_message("assistant", answer + "▌")
+                st.session_state.messages.append({
+                    "role": "assistant", 
+                    "content": answer,
+                    "time": datetime.now().strftime("%H:%M")
+                })
+            except Exception as e:
+                st.session_state.messages.append({
+                    "role": "assistant", 
+                    "content": f"❌ Error: {e}",
+                    "time": datetime.now().strftime("%H:%M")
+                })
         else:
             st.session_state.messages.append({
                 "role": "assistant", 
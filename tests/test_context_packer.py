@@ -0,0 +1,71 @@
+"""
+Context Packer Tests
+"""
+import sys
+from pathlib import Path
+from langchain_core.documents import Document
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.context_packer import pack_context
+from src.text_splitter import FastTextSplitter
+
+
+def chunk(chunk_id, text, start, **metadata):
+    metadata = {"source": "report.pdf", "start_index": start, **metadata}
+    return Document(id=chunk_id, page_content=text, metadata=metadata)
+
+
+def test_pages_of_one_source_are_not_merged():
+    # PDF pages share a source and each counts offsets from 0
+    page_one = chunk("a", "PAGE ONE " + "x" * 991, 0, page=0)
+    page_two = chunk("b", "PAGE TWO " + "y" * 991, 500, page=1)
+
+    packed = pack_context([page_two, page_one], token_budget=10_000)
+
+    assert [doc.page_content for doc in packed] == [page_two.page_content, page_one.page_content]
+    assert [doc.metadata["chunk_ids"] for doc in packed] == [["b"], ["a"]]
+    assert [doc.metadata["end_index"] for doc in packed] == [1500, 1000]
+
+
+def test_overlapping_chunks_of_one_page_are_merged():
+    first = chunk("a", "alpha beta gamma", 0, page=2)
+    second = chunk("b", "gamma delta", 11, page=2)
+
+    (packed,) = pack_context([second, first], token_budget=10_000)
+
+    assert packed.page_content == "alpha beta gamma delta"
+    assert sorted(packed.metadata["chunk_ids"]) == ["a", "b"]
+    assert (packed.metadata["start_index"], packed.metadata["end_index"]) == (0, 22)
+
+
+def test_chunks_separated_by_stripped_whitespace_are_merged():
+    text = "First paragraph here.\n\nSecond paragraph here."
+    chunks = FastTextSplitter(chunk_size=25, chunk_overlap=0, separators=["\n\n", " "]).split_documents(
+        [Document(page_content=text, metadata={"source": "notes.md"})]
+    )
+    assert len(chunks) == 2
+
+    (packed,) = pack_context(chunks, token_budget=10_000)
+
+    assert packed.page_content == text
+    assert (packed.metadata["start_index"], packed.metadata["end_index"]) == (0, len(text))
+    assert "whitespace_after" not in packed.metadata
+
+
+def test_chunks_separated_by_text_are_not_merged():
+    first = chunk("a", "alpha beta", 0, whitespace_after=" ")
+    second = chunk("b", "delta epsilon", 17)
+
+    packed = pack_context([first, second], token_budget=10_000)
+
+    assert len(packed) == 2
+
+
+def test_truncated_passage_end_index_covers_included_text():
+    doc = chunk("a", "word " * 400, 100)
+
+    (packed,) = pack_context([doc], token_budget=50)
+
+    assert packed.page_content.endswith(" …")
+    included = packed.page_content[:-len(" …")]
+    assert packed.metadata["end_index"] - packed.metadata["start_index"] == len(included)
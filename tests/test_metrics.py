@@ -0,0 +1,39 @@
+"""
+Metrics Tests
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.metrics import Metrics, load_persisted, render_prometheus
+from src.rate_limit import LIMITER_COUNTERS, AdaptiveRateLimiter
+
+
+def test_collectors_export_counters_and_gauges():
+    registry = Metrics()
+    limiter = AdaptiveRateLimiter()
+    registry.register_collector("llm_limiter", limiter.gauges, counters=LIMITER_COUNTERS)
+
+    limiter.requests, limiter.throttled, limiter.circuit = 3, 1, "open"
+    text = render_prometheus(registry)
+    assert "rag_llm_limiter_requests_total 3" in text
+    assert "rag_llm_limiter_throttled_total 1" in text
+    assert "# TYPE rag_llm_limiter_circuit gauge\nrag_llm_limiter_circuit 2" in text
+
+    # Only the growth since the last collection is added
+    limiter.requests = 5
+    registry.collect()
+    registry.collect()
+    assert registry.counters["llm_limiter_requests"] == 5
+
+
+def test_collected_counters_are_persisted(tmp_path, monkeypatch):
+    import src.metrics as metrics_module
+
+    registry = Metrics()
+    monkeypatch.setattr(metrics_module, "metrics", registry)
+    stats = {"hits": 3, "misses": 1, "entries": 2}
+    registry.register_collector("answer_cache", lambda: stats, counters=("hits", "misses"))
+
+    loaded = load_persisted(tmp_path / "metrics.sqlite")
+    assert loaded.counters == {"answer_cache_hits": 3, "answer_cache_misses": 1}
@@ -0,0 +1,28 @@
+"""
+Rate Limit Tests
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.rate_limit import classify_error, is_rate_limit_error
+
+
+class APIError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def test_http_status_decides_over_the_message():
+    assert classify_error(APIError("quota service unavailable", 503)) == "transient"
+    assert classify_error(APIError("bad request 4291: quota field invalid", 400)) == "fatal"
+    assert classify_error(APIError("slow down", 429)) == "rate_limit"
+    assert classify_error(APIError("rate limit key revoked", 401)) == "auth"
+    assert not is_rate_limit_error(APIError("quota", 503))
+
+
+def test_message_is_matched_without_a_status():
+    assert classify_error(APIError("429 RESOURCE_EXHAUSTED: quota exceeded")) == "rate_limit"
+    assert classify_error(APIError("request 14290 failed")) == "transient"
+    assert classify_error(APIError("invalid api_key")) == "auth"
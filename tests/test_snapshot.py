@@ -0,0 +1,69 @@
+"""
+Snapshot Tests
+"""
+import json
+import sys
+from pathlib import Path
+import pytest
+from langchain_chroma import Chroma
+from chromadb.api.client import SharedSystemClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.local_models import HashingEmbeddings
+from src.snapshot import HEADER_FILE, SnapshotVectorStore, write_snapshot
+
+
+TOPICS = ["neural networks", "gradient descent", "tokenization", "reinforcement learning",
+          "image segmentation", "vector databases", "retrieval augmented generation"]
+
+
+def note(i):
+    return f"Note {i} about {TOPICS[i % len(TOPICS)]} and item {i}"
+
+
+@pytest.fixture
+def chroma_store(tmp_path):
+    embeddings = HashingEmbeddings(dim=64)
+    store = Chroma(
+        collection_name="test",
+        embedding_function=embeddings,
+        persist_directory=str(tmp_path / "chroma"),
+    )
+    texts = [note(i) for i in range(300)]
+    store.add_texts(texts, ids=[f"chunk-{i}" for i in range(len(texts))])
+    yield store
+    SharedSystemClient.clear_system_cache()
+
+
+def test_chroma_snapshot_searches_through_ivf(chroma_store, tmp_path, monkeypatch):
+    directory = write_snapshot(chroma_store, tmp_path / "snapshot", index_type="ivf", ivf_min_rows=100)
+    header = json.loads((directory / HEADER_FILE).read_text())
+    assert (header["backend"], header["ann"]) == ("chroma", "ivf")
+
+    snapshot = SnapshotVectorStore(directory, chroma_store.embeddings, dense=chroma_store)
+    assert snapshot.index_type == "ivf" and snapshot.dense is None
+
+    probed = []
+    candidates = snapshot._ivf.candidates
+    monkeypatch.setattr(snapshot._ivf, "candidates", lambda *args: probed.append(args) or candidates(*args))
+    (doc, score), *_ = snapshot.similarity_search_with_score(note(42), k=3)
+
+    assert probed
+    assert doc.id == "chunk-42"
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_small_chroma_snapshot_searches_chroma(chroma_store, tmp_path):
+    directory = write_snapshot(chroma_store, tmp_path / "snapshot", index_type="ivf", ivf_min_rows=10_000)
+    assert json.loads((directory / HEADER_FILE).read_text())["ann"] is None
+
+    snapshot = SnapshotVectorStore(directory, chroma_store.embeddings, dense=chroma_store)
+    assert snapshot._ivf is None and snapshot.dense is chroma_store
+
+    query = chroma_store.embeddings.embed_query(note(7))
+    (doc, score), *_ = snapshot.similarity_search_by_vector_with_score(query, k=3)
+    assert doc.id == "chunk-7"
+    # Chroma distances are reported as cosine similarities, like the flat index
+    assert score == pytest.approx(1.0, abs=1e-5)
+    (batch_doc, _), *_ = snapshot.batch_similarity_search_by_vector_with_score([query], k=3)[0]
+    assert batch_doc.id == "chunk-7"
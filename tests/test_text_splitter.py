@@ -0,0 +1,54 @@
+"""
+Text Splitter Tests
+"""
+import random
+import sys
+from pathlib import Path
+from langchain_core.documents import Document
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS
+from bench_text_splitter import check_equivalence, compare, langchain_splitter, offsets_match, random_text
+from src.text_splitter import FastTextSplitter
+
+
+def test_matches_langchain_on_random_texts():
+    assert check_equivalence(cases=300, seed=0)
+
+
+def test_random_texts_hit_every_separator_level():
+    rng = random.Random(0)
+    texts = [random_text(rng, 10) for _ in range(50)]
+    for separator in CHUNK_SEPARATORS[:-1]:
+        assert any(separator in text for text in texts)
+    # Words no separator but "" can break
+    assert any("w" * 10 in text for text in texts)
+
+
+def test_empty_text():
+    assert FastTextSplitter().split_documents([Document(page_content="")]) == []
+
+
+def test_text_shorter_than_chunk_size():
+    text = "  A short note.\n\n"
+    (chunk,) = FastTextSplitter().split_documents([Document(page_content=text, metadata={"source": "a.md"})])
+    assert len(text) < CHUNK_SIZE
+    assert chunk.page_content == "A short note."
+    assert chunk.metadata == {"source": "a.md", "start_index": 2, "end_index": 15, "whitespace_after": "\n\n"}
+
+
+def test_zero_overlap():
+    rng = random.Random(1)
+    reference = langchain_splitter(CHUNK_SIZE // 10, 0, CHUNK_SEPARATORS)
+    fast = FastTextSplitter(CHUNK_SIZE // 10, 0, CHUNK_SEPARATORS)
+    for _ in range(200):
+        mismatched, bad_offsets, _ = compare(random_text(rng, CHUNK_SIZE // 10), reference, fast)
+        assert (mismatched, bad_offsets) == (0, 0)
+
+
+def test_offsets_slice_chunks_out_of_the_text():
+    text = "First paragraph.\n\nSecond paragraph, a bit longer.\nThird line. " * 20
+    chunks = FastTextSplitter(60, CHUNK_OVERLAP // 20).split_documents([Document(page_content=text)])
+    assert len(chunks) > 1
+    assert all(offsets_match(text, chunk) for chunk in chunks)